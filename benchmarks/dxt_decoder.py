@@ -0,0 +1,64 @@
+"""Compares the speed of the NumPy DXT decoder with VTFLib's, tests/test_dxt.py checks their results are equal.
+
+    python benchmarks/dxt_decoder.py [--sizes 512 2048 4096] [--workers 1 4] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy  # noqa: E402
+
+from pyvtflib import VTFImageFormat, VTFLib  # noqa: E402
+from pyvtflib.header import compute_image_size  # noqa: E402
+
+
+def _random_blocks(width: int, height: int, img_format: VTFImageFormat, seed: int = 0) -> bytes:
+    data = numpy.random.default_rng(seed).integers(0, 256, compute_image_size(width, height, 1, 1, img_format),
+                                                   dtype=numpy.uint8)
+    blocks = data.reshape(-1, 16 if img_format in (VTFImageFormat.IMAGE_FORMAT_DXT3,
+                                                   VTFImageFormat.IMAGE_FORMAT_DXT5) else 8)
+    color = blocks.shape[1] - 8
+    # equal color endpoints select the 3 color mode of DXT1, equal alpha endpoints the 6 alpha mode of DXT5
+    blocks[::5, color + 2:color + 4] = blocks[::5, color:color + 2]
+    if img_format == VTFImageFormat.IMAGE_FORMAT_DXT5:
+        blocks[::7, 1] = blocks[::7, 0]
+    return data.tobytes()
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 2048, 4096])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:<10} {:>6} {:>12}".format("format", "size", "vtflib ms")
+          + "".join(" {:>12}".format("{} thr ms".format(workers)) for workers in args.workers))
+    for img_format in (VTFImageFormat.IMAGE_FORMAT_DXT1, VTFImageFormat.IMAGE_FORMAT_DXT5):
+        for size in args.sizes:
+            data = _random_blocks(size, size, img_format)
+            dest = bytearray(size * size * 4)
+            native = _best_time(lambda: VTFLib.convert_to_rgba8888_into(data, dest, size, size, img_format),
+                                args.repeat)
+            times = [_best_time(lambda: VTFLib.decode_dxt_into(data, dest, size, size, img_format, workers),
+                                args.repeat) for workers in args.workers]
+            print("{:<10} {:>6} {:>12.2f}".format(img_format.name[len("IMAGE_FORMAT_"):], size, native * 1000)
+                  + "".join(" {:>12.2f}".format(elapsed * 1000) for elapsed in times))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
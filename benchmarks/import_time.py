@@ -0,0 +1,82 @@
+"""Measures the time it takes to import pyvtflib in a fresh interpreter.
+
+Also fails if importing the package, or using only its enums and structures, loads the native library,
+or if loading the library and binding every function eagerly would cost less than --min-saving-ms,
+which is what the lazy loading saves each import.
+
+    python benchmarks/import_time.py [--runs N] [--max-ms MS] [--min-saving-ms MS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHECK_LAZY = """
+import pyvtflib, pyvtflib.header
+pyvtflib.VTFImageFormat.IMAGE_FORMAT_DXT1, pyvtflib.VTFImageFlag.TEXTUREFLAGS_ENVMAP, pyvtflib.SVTFCreateOptions()
+assert pyvtflib._vtflib is None, "importing pyvtflib loaded the native library"
+"""
+
+_TIME_EAGER = """
+import time
+import pyvtflib
+start = time.perf_counter()
+pyvtflib._load_library()
+for function in pyvtflib._functions.values():
+    function.bind()
+print(time.perf_counter() - start)
+"""
+
+
+def _eager_time_ms() -> float:
+    result = subprocess.run([sys.executable, "-c", _TIME_EAGER], env=dict(os.environ, PYTHONPATH=_ROOT),
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return float(result.stdout) * 1000
+
+
+def _import_time_us(module: str) -> int:
+    env = dict(os.environ, PYTHONPATH=_ROOT)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise RuntimeError("no import time reported for " + module)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median import time is higher")
+    parser.add_argument("--min-saving-ms", type=float, default=2.0,
+                        help="fail if the median time lazy loading saves is lower")
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, "-c", _CHECK_LAZY], env=dict(os.environ, PYTHONPATH=_ROOT), check=True)
+
+    _import_time_us("pyvtflib")  # warm up bytecode caches
+    times = [_import_time_us("pyvtflib") / 1000 for _ in range(args.runs)]
+    median = statistics.median(times)
+    print("import pyvtflib: median {:.1f} ms, min {:.1f} ms, max {:.1f} ms over {} runs".format(
+        median, min(times), max(times), args.runs))
+    if args.max_ms is not None and median > args.max_ms:
+        print("import time regression: {:.1f} ms > {:.1f} ms".format(median, args.max_ms), file=sys.stderr)
+        return 1
+
+    savings = [_eager_time_ms() for _ in range(args.runs)]
+    saving = statistics.median(savings)
+    print("saved by lazy loading: median {:.1f} ms, min {:.1f} ms, max {:.1f} ms over {} runs".format(
+        saving, min(savings), max(savings), args.runs))
+    if saving < args.min_saving_ms:
+        print("lazy loading saves too little: {:.1f} ms < {:.1f} ms".format(saving, args.min_saving_ms),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Compares the NumPy backend of flip, mirror and channel reordering conversions against the fallbacks
+used without numpy: VTFLib for flip, pure Python for the others.
+
+    python benchmarks/numpy_backend.py [--sizes 512 2048 4096] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy  # noqa: E402
+
+from pyvtflib import VTFImageFormat, VTFLib, set_numpy_backend  # noqa: E402
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _cases(size: int) -> List[tuple]:
+    rgba = numpy.random.default_rng(0).integers(0, 256, size * size * 4, dtype=numpy.uint8).tobytes()
+    rgb = rgba[:size * size * 3]
+    dest = bytearray(size * size * 4)
+    rgba_format = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+    return [
+        ("flip", lambda: VTFLib.flip_image_into(rgba, dest, size, size)),
+        ("mirror", lambda: VTFLib.mirror_image_into(rgba, dest, size, size)),
+        ("RGBA8888->BGRA8888",
+         lambda: VTFLib.convert_into(rgba, dest, size, size, rgba_format, VTFImageFormat.IMAGE_FORMAT_BGRA8888)),
+        ("ABGR8888->RGBA8888",
+         lambda: VTFLib.convert_to_rgba8888_into(rgba, dest, size, size, VTFImageFormat.IMAGE_FORMAT_ABGR8888)),
+        ("RGB888->BGR888",
+         lambda: VTFLib.convert_into(rgb, dest, size, size, VTFImageFormat.IMAGE_FORMAT_RGB888,
+                                     VTFImageFormat.IMAGE_FORMAT_BGR888)),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 2048, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("{:<20} {:>6} {:>12} {:>12} {:>8}".format("operation", "size", "fallback ms", "numpy ms", "speedup"))
+    for size in args.sizes:
+        for name, function in _cases(size):
+            set_numpy_backend(False)
+            fallback = _best_time(function, args.repeat)
+            set_numpy_backend(True)
+            function()  # imports the backend
+            vectorized = _best_time(function, args.repeat)
+            print("{:<20} {:>6} {:>12.2f} {:>12.2f} {:>7.1f}x".format(
+                name, size, fallback * 1000, vectorized * 1000, fallback / vectorized))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
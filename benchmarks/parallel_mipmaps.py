@@ -0,0 +1,80 @@
+"""Compares VTFLib's serial mipmap generation against image_generate_all_mipmaps_parallel.
+
+Fails if the parallel results differ from VTFLib's or depend on the number of workers. Needs a VTFLib build
+that can resize (the Windows DLLs, the bundled Linux library has no NVDXT).
+
+    python benchmarks/parallel_mipmaps.py [--size 1024] [--frames 16] [--cubemap] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyvtflib import VTFException, VTFImageFormat, VTFLib  # noqa: E402
+
+
+def _create(size: int, frames: int, cubemap: bool, img_format: VTFImageFormat) -> VTFLib:
+    vtf = VTFLib()
+    faces = 6 if cubemap else 1
+    vtf.create_image(size, size, 1 if cubemap else frames, faces, img_format=img_format, thumbnail=False)
+    for frame in range(vtf.image_frame_count()):
+        for face in range(faces):
+            vtf.image_from_rgba8888(os.urandom(size * size * 4), frame, face)
+    return vtf
+
+
+def _timed(function: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--cubemap", action="store_true")
+    parser.add_argument("--format", default="RGBA8888")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    img_format = VTFImageFormat["IMAGE_FORMAT_" + args.format.upper()]
+
+    vtf = _create(args.size, args.frames, args.cubemap, img_format)
+    source = vtf.save_image_bytes()
+    try:
+        serial = _timed(vtf.image_generate_all_mipmaps)
+        native = vtf.save_image_bytes()
+        print("{:<12} {:>10.1f} ms".format("vtflib", serial * 1000))
+    except VTFException as e:
+        print("vtflib: {}".format(" ".join(str(e).split())), file=sys.stderr)
+        serial, native = 0., b""
+
+    results = {}
+    for workers in args.workers:
+        vtf.load_image_bytes(source)
+        try:
+            elapsed = _timed(lambda: vtf.image_generate_all_mipmaps_parallel(max_workers=workers))
+        except VTFException as e:
+            print("parallel: {}".format(" ".join(str(e).split())), file=sys.stderr)
+            return 1
+        results[workers] = vtf.save_image_bytes()
+        print("{:<12} {:>10.1f} ms {:>7.1f}x{}".format(
+            "{} workers".format(workers), elapsed * 1000, serial / elapsed if serial else 0.,
+            "" if results[workers] == native else " (differs from vtflib)"))
+    vtf.close()
+
+    if len(set(results.values())) > 1:
+        print("parallel results depend on the number of workers", file=sys.stderr)
+        return 1
+    if not native or native not in results.values():
+        print("parallel results differ from vtflib" if native else "no vtflib results to compare",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""Benchmark suite of the VTFLib operations on synthetic images: load, decode, convert, resize, mipmap generation,
+normal map conversion and save, on 2D textures, cubemaps and multi-frame textures.
+
+Reports the throughput in megapixels per second of the largest image of each operation (including every frame or
+face, not counting mipmaps) and the peak RSS. Every case runs in a fresh process, so the peak RSS is its own.
+Results can be saved as JSON and compared against a previous run, exiting with 1 if any case got slower than the
+threshold. Cases that the VTFLib build doesn't support (e.g. resizing without NVDXT) are reported as skipped.
+
+    python benchmarks/suite.py [--sizes 256 1024 4096] [--frames 4] [--filter REGEX] [--repeat N]
+                               [--json results.json] [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import json
+import multiprocessing
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy  # noqa: E402
+
+from pyvtflib import VTFException, VTFImageFormat, VTFLib, VTFMipMapFilter  # noqa: E402
+
+RGBA8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+DXT5 = VTFImageFormat.IMAGE_FORMAT_DXT5
+# frames and faces of the texture layouts, frames is replaced by --frames
+LAYOUTS = {"2d": (1, 1), "cubemap": (1, 6), "frames": (4, 1)}
+
+
+class Case(NamedTuple):
+    name: str
+    # frames * faces * width * height of the top mipmap level
+    pixels: int
+    # prepares the data outside of the timing and returns the function to time
+    setup: Callable[[], Callable[[], Any]]
+
+
+class Result(NamedTuple):
+    name: str
+    megapixels: float
+    best_s: float
+    median_s: float
+    mp_per_s: float
+    peak_rss_mb: float
+    rss_delta_mb: float
+    error: Optional[str]
+
+
+def _format_name(img_format: VTFImageFormat) -> str:
+    return VTFImageFormat(img_format).name[len("IMAGE_FORMAT_"):]
+
+
+def _random_bytes(size: int, seed: int = 0) -> bytes:
+    return numpy.random.default_rng(seed).integers(0, 256, size, dtype=numpy.uint8).tobytes()
+
+
+def _texture(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> VTFLib:
+    # the top level of each frame and face is filled with the same random data, written as is instead of
+    # converted, so DXT textures don't need a VTFLib build that can compress
+    vtf = VTFLib()
+    vtf.create_image(size, size, frames, faces, img_format=img_format)
+    data = _random_bytes(VTFLib.compute_image_size(size, size, 1, 1, img_format))
+    for frame in range(frames):
+        for face in range(faces):
+            vtf.image_set_data(data, frame, face)
+    return vtf
+
+
+def _load_bytes(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> Callable[[], Any]:
+    with _texture(size, frames, faces, img_format) as source:
+        data = source.save_image_bytes()
+    vtf = VTFLib()
+    return lambda: vtf.load_image_bytes(data)
+
+
+def _load_file(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> Callable[[], Any]:
+    # the file stays in the page cache, so this measures parsing and copying rather than the disk
+    fd, file_path = tempfile.mkstemp(".vtf")
+    os.close(fd)
+    atexit.register(os.remove, file_path)
+    with _texture(size, frames, faces, img_format) as source:
+        source.save_image_file(file_path)
+    vtf = VTFLib()
+
+    def load() -> None:
+        vtf.load_image_file(file_path)
+    return load
+
+
+def _decode(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> Callable[[], Any]:
+    vtf = _texture(size, frames, faces, img_format)
+
+    def decode() -> None:
+        for frame in range(frames):
+            for face in range(faces):
+                vtf.image_as_rgba8888(frame, face)
+    return decode
+
+
+def _save(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> Callable[[], Any]:
+    vtf = _texture(size, frames, faces, img_format)
+    return vtf.save_image_bytes
+
+
+def _mipmaps(size: int, frames: int, faces: int, img_format: VTFImageFormat) -> Callable[[], Any]:
+    vtf = _texture(size, frames, faces, img_format)
+    return vtf.image_generate_all_mipmaps
+
+
+def _convert(size: int, source_format: VTFImageFormat, dest_format: VTFImageFormat) -> Callable[[], Any]:
+    source = _random_bytes(VTFLib.compute_image_size(size, size, 1, 1, source_format))
+    dest = bytearray(VTFLib.compute_image_size(size, size, 1, 1, dest_format))
+    return lambda: VTFLib.convert_into(source, dest, size, size, source_format, dest_format)
+
+
+def _resize(size: int, resize_filter: VTFMipMapFilter) -> Callable[[], Any]:
+    source = _random_bytes(size * size * 4)
+    dest = bytearray(size * size)
+    return lambda: VTFLib.resize_into(source, dest, size, size, size // 2, size // 2, resize_filter)
+
+
+def _normal_map(size: int) -> Callable[[], Any]:
+    source = _random_bytes(size * size * 4)
+    dest = bytearray(size * size * 4)
+    return lambda: VTFLib.convert_to_normal_map_into(source, dest, size, size)
+
+
+def _supported_formats() -> Iterator[VTFImageFormat]:
+    for img_format in VTFImageFormat:
+        if img_format >= 0 and img_format != VTFImageFormat.IMAGE_FORMAT_COUNT \
+                and VTFLib.get_image_format_info(img_format).bIsSupported:
+            yield img_format
+
+
+def _cases(sizes: List[int], frames: int) -> Iterator[Case]:
+    layouts = dict(LAYOUTS, frames=(frames, 1))
+    for size in sizes:
+        for layout, (layout_frames, faces) in layouts.items():
+            pixels = layout_frames * faces * size * size
+            for img_format in (RGBA8888, DXT5):
+                suffix = "{}/{}/{}".format(layout, _format_name(img_format), size)
+                for operation, function in (("load_bytes", _load_bytes), ("load_file", _load_file),
+                                            ("decode", _decode), ("save", _save)):
+                    yield Case("{}/{}".format(operation, suffix), pixels,
+                               partial(function, size, layout_frames, faces, img_format))
+            yield Case("mipmap/{}/RGBA8888/{}".format(layout, size), pixels,
+                       partial(_mipmaps, size, layout_frames, faces, RGBA8888))
+        for img_format in _supported_formats():
+            if img_format == RGBA8888:
+                continue
+            for source_format, dest_format in ((RGBA8888, img_format), (img_format, RGBA8888)):
+                yield Case("convert/{}->{}/{}".format(_format_name(source_format), _format_name(dest_format), size),
+                           size * size, partial(_convert, size, source_format, dest_format))
+        for resize_filter in VTFMipMapFilter:
+            if resize_filter != VTFMipMapFilter.MIPMAP_FILTER_COUNT:
+                yield Case("resize/{}/{}".format(resize_filter.name[len("MIPMAP_FILTER_"):], size), size * size,
+                           partial(_resize, size, resize_filter))
+        yield Case("normal_map/{}".format(size), size * size, partial(_normal_map, size))
+
+
+def _peak_rss_mb() -> float:
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.WinDLL("kernel32")
+        process = kernel32.GetCurrentProcess
+        process.restype = wintypes.HANDLE
+        ctypes.WinDLL("psapi").GetProcessMemoryInfo(process(), ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 2**20
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _run_case(case: Case, repeat: int) -> Result:
+    baseline = _peak_rss_mb()
+    megapixels = case.pixels / 1e6
+    try:
+        function = case.setup()
+        # the first call also binds the VTFLib functions, autorange calls it until it takes 0.2 s
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    except VTFException as e:
+        peak = _peak_rss_mb()
+        return Result(case.name, megapixels, 0., 0., 0., peak, peak - baseline, " ".join(str(e).split()))
+    peak = _peak_rss_mb()
+    best = min(times)
+    return Result(case.name, megapixels, best, statistics.median(times), megapixels / best, peak, peak - baseline,
+                  None)
+
+
+def _run_isolated(name: str, sizes: List[int], frames: int, repeat: int) -> Result:
+    # runs in a fresh process, which builds the cases again to find its own
+    for case in _cases(sizes, frames):
+        if case.name == name:
+            return _run_case(case, repeat)
+    raise KeyError(name)
+
+
+def _compare(results: List[Result], baseline_path: str, threshold: float) -> List[Tuple[str, float]]:
+    # the cases whose throughput dropped by more than threshold, with the ratio to the baseline
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result.name)
+        if result.error is None and old is not None and old["error"] is None:
+            ratio = result.mp_per_s / old["mp_per_s"]
+            if ratio < 1 - threshold:
+                regressions.append((result.name, ratio))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--frames", type=int, default=LAYOUTS["frames"][0])
+    parser.add_argument("--filter", default="", help="only run the cases whose name matches this regex")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="run the cases in this process, faster but the peak RSS is cumulative")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="compare against the results of an earlier --json run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    pattern = re.compile(args.filter)
+    cases = [case for case in _cases(args.sizes, args.frames) if pattern.search(case.name)]
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return 0
+
+    print("{:<40} {:>9} {:>11} {:>10} {:>10} {:>10}".format(
+        "case", "MP", "best ms", "MP/s", "peak MB", "delta MB"))
+    results: List[Result] = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        if args.no_isolate:
+            result = _run_case(case, args.repeat)
+        else:
+            with ProcessPoolExecutor(1, context) as executor:
+                result = executor.submit(_run_isolated, case.name, args.sizes, args.frames, args.repeat).result()
+        results.append(result)
+        if result.error is not None:
+            print("{:<40} skipped: {}".format(result.name, result.error))
+        else:
+            print("{:<40} {:>9.3f} {:>11.3f} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+                result.name, result.megapixels, result.best_s * 1000, result.mp_per_s, result.peak_rss_mb,
+                result.rss_delta_mb))
+
+    if args.json:
+        data: Dict[str, Any] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "vtflib": VTFLib.get_version_str(),
+            "results": [result._asdict() for result in results],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+    if args.compare:
+        regressions = _compare(results, args.compare, args.threshold)
+        for name, ratio in regressions:
+            print("regression: {} at {:.0%} of the baseline throughput".format(name, ratio), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
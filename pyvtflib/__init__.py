@@ -1,10 +1,21 @@
-from ctypes import CDLL, CFUNCTYPE, POINTER, Structure, byref, pointer, create_string_buffer, string_at, cast
-from ctypes import c_uint, c_char_p, c_bool, c_int, c_float, c_ubyte, c_void_p
+from ctypes import CDLL, CFUNCTYPE, POINTER, Structure, byref, pointer, create_string_buffer, string_at, cast, memmove
+from ctypes import c_uint, c_char_p, c_bool, c_int, c_long, c_float, c_ubyte, c_void_p, c_ssize_t, py_object, pythonapi
+from contextlib import ExitStack, contextmanager
+from functools import wraps
 from enum import IntEnum, IntFlag
+from io import BytesIO
 import os
 from os import path, fsencode, fsdecode
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from typing import Type, TypeVar, TYPE_CHECKING
 import sys
+from threading import RLock
+import weakref
+
+if TYPE_CHECKING:
+    import numpy
+    from .header import SubresourceLayout
+    from .vmt import VMTNode
 
 
 class _CEnum(IntEnum):
@@ -237,6 +248,16 @@ class VTFResourceEntryTypeFlag(_CFlag):
     RSRCF_HAS_NO_DATA_CHUNK = 0x02
 
 
+class VTFResourceEntryType(_CEnum):
+    VTF_LEGACY_RSRC_LOW_RES_IMAGE = 0x01
+    VTF_LEGACY_RSRC_IMAGE = 0x30
+    VTF_LEGACY_RSRC_SHEET = 0x10
+    VTF_RSRC_CRC = 0x02435243
+    VTF_RSRC_TEXTURE_LOD_SETTINGS = 0x02444f4c
+    VTF_RSRC_TEXTURE_SETTINGS_EX = 0x584f5354
+    VTF_RSRC_KEY_VALUE_DATA = 0x44564b
+
+
 class VMTParseMode(_CEnum):
     PARSE_MODE_STRICT = 0
     PARSE_MODE_LOOSE = 1
@@ -373,187 +394,305 @@ class VLSeekMode(_CEnum):
     SEEK_MODE_END = 2
 
 
+_library_path: Optional[str]
 if os.name == 'posix':
     _library_path = path.join(path.dirname(__file__), "bin", "libVTFLib13.so")
 elif os.name == 'nt':
     _is_64 = sys.maxsize > 2**32
     _library_path = path.join(path.dirname(__file__), "bin", "x64" if _is_64 else "x86", "VTFLib.dll")
 else:
-    raise Exception("unsupported os")
+    _library_path = None
+
+# the native library is loaded and each function bound on first use,
+# so the enums and structures can be used without loading it at all
+_vtflib: Optional[CDLL] = None
+
+
+def _load_library() -> CDLL:
+    global _vtflib
+    if _vtflib is None:
+        if _library_path is None:
+            raise Exception("unsupported os")
+        _vtflib = CDLL(_library_path)
+    return _vtflib
+
+
+_library_available: Optional[bool] = None
+
+
+def _is_library_available() -> bool:
+    # whether the native library can be loaded at all, e.g. sandboxes may forbid loading it
+    global _library_available
+    if _library_available is None:
+        try:
+            _load_library()
+            _library_available = True
+        except Exception:
+            _library_available = False
+    return _library_available
+
+
+# wraps the native functions as they're bound, set by pyvtflib.profiling while it's enabled
+_native_hook: Optional[Callable[[str, Callable[..., Any]], Callable[..., Any]]] = None
+
+
+def _hooked(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+    return function if _native_hook is None else _native_hook(name, function)
+
+
+class _LazyFunction():
+    def __init__(self, name: str, restype: Any, *argtypes: Any) -> None:
+        self.name = name
+        self.restype = restype
+        self.argtypes = argtypes
+        self.global_name = ""
+        self.function: Optional[Callable[..., Any]] = None
+
+    def bind(self) -> Callable[..., Any]:
+        if self.function is None:
+            self.function = CFUNCTYPE(self.restype, *self.argtypes)((self.name, _load_library()))
+            # later calls from this module go straight to the bound function
+            globals()[self.global_name] = _hooked(self.name, self.function)
+        return self.function
+
+    def __call__(self, *args: Any) -> Any:
+        self.bind()
+        return globals()[self.global_name](*args)
+
 
-_vtflib = CDLL(_library_path)
+def _function(name: str, restype: Any, *argtypes: Any) -> Any:
+    return _LazyFunction(name, restype, *argtypes)
 
-_vl_get_version: Callable[[], int] = CFUNCTYPE(c_uint)(("vlGetVersion", _vtflib))
-_vl_get_version_string: Callable[[], bytes] = CFUNCTYPE(c_char_p)(("vlGetVersionString", _vtflib))
 
-_vl_get_last_error: Callable[[], bytes] = CFUNCTYPE(c_char_p)(("vlGetLastError", _vtflib))
+_vl_get_version: Callable[[], int] = _function("vlGetVersion", c_uint)
+_vl_get_version_string: Callable[[], bytes] = _function("vlGetVersionString", c_char_p)
 
-_vl_initialize: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlInitialize", _vtflib))
-_vl_shutdown: Callable[[], None] = CFUNCTYPE(None)(("vlShutdown", _vtflib))
+_vl_get_last_error: Callable[[], bytes] = _function("vlGetLastError", c_char_p)
 
-_vl_get_boolean: Callable[[VTFLibOption], bool] = CFUNCTYPE(c_bool, c_int)(("vlGetBoolean", _vtflib))
-_vl_set_boolean: Callable[[VTFLibOption, bool], None] = CFUNCTYPE(None, c_int, c_bool)(("vlSetBoolean", _vtflib))
+_vl_initialize: Callable[[], bool] = _function("vlInitialize", c_bool)
+_vl_shutdown: Callable[[], None] = _function("vlShutdown", None)
 
-_vl_get_integer: Callable[[VTFLibOption], int] = CFUNCTYPE(c_int, c_int)(("vlGetInteger", _vtflib))
-_vl_set_integer: Callable[[VTFLibOption, int], None] = CFUNCTYPE(None, c_int, c_int)(("vlSetInteger", _vtflib))
+_vl_get_boolean: Callable[[VTFLibOption], bool] = _function("vlGetBoolean", c_bool, c_int)
+_vl_set_boolean: Callable[[VTFLibOption, bool], None] = _function("vlSetBoolean", None, c_int, c_bool)
 
-_vl_get_float: Callable[[VTFLibOption], float] = CFUNCTYPE(c_float, c_int)(("vlGetFloat", _vtflib))
-_vl_set_float: Callable[[VTFLibOption, float], None] = CFUNCTYPE(None, c_int, c_float)(("vlSetFloat", _vtflib))
+_vl_get_integer: Callable[[VTFLibOption], int] = _function("vlGetInteger", c_int, c_int)
+_vl_set_integer: Callable[[VTFLibOption, int], None] = _function("vlSetInteger", None, c_int, c_int)
 
-_vl_set_proc: Callable[[VLProc, int], None] = CFUNCTYPE(None, c_int, c_void_p)(("vlSetProc", _vtflib))
-_vl_get_proc: Callable[[VLProc], int] = CFUNCTYPE(c_void_p, c_int)(("vlGetProc", _vtflib))
+_vl_get_float: Callable[[VTFLibOption], float] = _function("vlGetFloat", c_float, c_int)
+_vl_set_float: Callable[[VTFLibOption, float], None] = _function("vlSetFloat", None, c_int, c_float)
 
-_vl_image_is_bound: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageIsBound", _vtflib))
-_vl_bind_image: Callable[[c_uint], bool] = CFUNCTYPE(c_bool, c_uint)(("vlBindImage", _vtflib))
+_vl_set_proc: Callable[[VLProc, int], None] = _function("vlSetProc", None, c_int, c_void_p)
+_vl_get_proc: Callable[[VLProc], int] = _function("vlGetProc", c_void_p, c_int)
 
-_vl_create_image: Callable[[Any], bool] = CFUNCTYPE(c_bool, POINTER(c_uint))(("vlCreateImage", _vtflib))
-_vl_delete_image: Callable[[c_uint], None] = CFUNCTYPE(None, c_uint)(("vlDeleteImage", _vtflib))
+_vl_image_is_bound: Callable[[], bool] = _function("vlImageIsBound", c_bool)
+_vl_bind_image: Callable[[c_uint], bool] = _function("vlBindImage", c_bool, c_uint)
+
+_vl_create_image: Callable[[Any], bool] = _function("vlCreateImage", c_bool, POINTER(c_uint))
+_vl_delete_image: Callable[[c_uint], None] = _function("vlDeleteImage", None, c_uint)
 
 _vl_image_create_default_create_structure: Callable[[Any], None] = \
-    CFUNCTYPE(None, POINTER(SVTFCreateOptions))(("vlImageCreateDefaultCreateStructure", _vtflib))
+    _function("vlImageCreateDefaultCreateStructure", None, POINTER(SVTFCreateOptions))
 
 _vl_image_create: Callable[[int, int, int, int, int, VTFImageFormat, bool, bool, bool], bool] = \
-    CFUNCTYPE(c_bool, c_uint, c_uint, c_uint, c_uint, c_uint, c_int, c_bool, c_bool, c_bool)(("vlImageCreate", _vtflib))
+    _function("vlImageCreate", c_bool, c_uint, c_uint, c_uint, c_uint, c_uint, c_int, c_bool, c_bool, c_bool)
 _vl_image_create_single: Callable[[int, int, Any, Any], bool] = \
-    CFUNCTYPE(c_bool, c_uint, c_uint, c_char_p, POINTER(SVTFCreateOptions))(("vlImageCreateSingle", _vtflib))
+    _function("vlImageCreateSingle", c_bool, c_uint, c_uint, c_void_p, POINTER(SVTFCreateOptions))
 _vl_image_create_multiple: Callable[[int, int, int, int, int, Any, Any], bool] = \
-    CFUNCTYPE(c_bool, c_uint, c_uint, c_uint, c_uint, c_uint, POINTER(c_char_p), POINTER(SVTFCreateOptions))(
-        ("vlImageCreateMultiple", _vtflib))
-_vl_image_destroy: Callable[[], None] = CFUNCTYPE(None)(("vlImageDestroy", _vtflib))
+    _function("vlImageCreateMultiple", c_bool, c_uint, c_uint, c_uint, c_uint, c_uint, POINTER(c_void_p),
+              POINTER(SVTFCreateOptions))
+_vl_image_destroy: Callable[[], None] = _function("vlImageDestroy", None)
 
-_vl_image_is_loaded: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageIsLoaded", _vtflib))
+_vl_image_is_loaded: Callable[[], bool] = _function("vlImageIsLoaded", c_bool)
 
-_vl_image_load: Callable[[bytes, bool], bool] = CFUNCTYPE(c_bool, c_char_p, c_bool)(("vlImageLoad", _vtflib))
-_vl_image_load_lump: Callable[[c_void_p, int, bool], bool] = CFUNCTYPE(c_bool, c_void_p, c_uint, c_bool)(
-    ("vlImageLoadLump", _vtflib))
-_vl_image_load_proc: Callable[[int, bool], bool] = CFUNCTYPE(c_bool, c_void_p, c_bool)(("vlImageLoadProc", _vtflib))
+_vl_image_load: Callable[[bytes, bool], bool] = _function("vlImageLoad", c_bool, c_char_p, c_bool)
+_vl_image_load_lump: Callable[[c_void_p, int, bool], bool] = \
+    _function("vlImageLoadLump", c_bool, c_void_p, c_uint, c_bool)
+_vl_image_load_proc: Callable[[int, bool], bool] = _function("vlImageLoadProc", c_bool, c_void_p, c_bool)
 
-_vl_image_save: Callable[[bytes], bool] = CFUNCTYPE(c_bool, c_char_p)(("vlImageSave", _vtflib))
-_vl_image_save_lump: Callable[[c_void_p, int, Any], bool] = CFUNCTYPE(c_bool, c_void_p, c_uint, POINTER(c_uint))(
-    ("vlImageSaveLump", _vtflib))
-_vl_image_save_proc: Callable[[int], bool] = CFUNCTYPE(c_bool, c_void_p)(("vlImageSaveProc", _vtflib))
+_vl_image_save: Callable[[bytes], bool] = _function("vlImageSave", c_bool, c_char_p)
+_vl_image_save_lump: Callable[[c_void_p, int, Any], bool] = \
+    _function("vlImageSaveLump", c_bool, c_void_p, c_uint, POINTER(c_uint))
+_vl_image_save_proc: Callable[[int], bool] = _function("vlImageSaveProc", c_bool, c_void_p)
 
-_vl_image_get_has_image: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetHasImage", _vtflib))
+_vl_image_get_has_image: Callable[[], int] = _function("vlImageGetHasImage", c_uint)
 
-_vl_image_get_major_version: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetMajorVersion", _vtflib))
-_vl_image_get_minor_version: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetMinorVersion", _vtflib))
-_vl_image_get_size: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetSize", _vtflib))
+_vl_image_get_major_version: Callable[[], int] = _function("vlImageGetMajorVersion", c_uint)
+_vl_image_get_minor_version: Callable[[], int] = _function("vlImageGetMinorVersion", c_uint)
+_vl_image_get_size: Callable[[], int] = _function("vlImageGetSize", c_uint)
 
-_vl_image_get_width: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetWidth", _vtflib))
-_vl_image_get_height: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetHeight", _vtflib))
-_vl_image_get_depth: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetDepth", _vtflib))
+_vl_image_get_width: Callable[[], int] = _function("vlImageGetWidth", c_uint)
+_vl_image_get_height: Callable[[], int] = _function("vlImageGetHeight", c_uint)
+_vl_image_get_depth: Callable[[], int] = _function("vlImageGetDepth", c_uint)
 
-_vl_image_get_frame_count: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetFrameCount", _vtflib))
-_vl_image_get_face_count: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetFaceCount", _vtflib))
-_vl_image_get_mipmap_count: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetMipmapCount", _vtflib))
+_vl_image_get_frame_count: Callable[[], int] = _function("vlImageGetFrameCount", c_uint)
+_vl_image_get_face_count: Callable[[], int] = _function("vlImageGetFaceCount", c_uint)
+_vl_image_get_mipmap_count: Callable[[], int] = _function("vlImageGetMipmapCount", c_uint)
 
-_vl_image_get_start_frame: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetStartFrame", _vtflib))
-_vl_image_set_start_frame: Callable[[int], None] = CFUNCTYPE(None, c_uint)(("vlImageSetStartFrame", _vtflib))
+_vl_image_get_start_frame: Callable[[], int] = _function("vlImageGetStartFrame", c_uint)
+_vl_image_set_start_frame: Callable[[int], None] = _function("vlImageSetStartFrame", None, c_uint)
 
-_vl_image_get_flags: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetFlags", _vtflib))
-_vl_image_set_flags: Callable[[int], None] = CFUNCTYPE(None, c_uint)(("vlImageSetFlags", _vtflib))
+_vl_image_get_flags: Callable[[], int] = _function("vlImageGetFlags", c_uint)
+_vl_image_set_flags: Callable[[int], None] = _function("vlImageSetFlags", None, c_uint)
 
-_vl_image_get_flag: Callable[[VTFImageFlag], bool] = CFUNCTYPE(c_bool, c_int)(("vlImageGetFlag", _vtflib))
-_vl_image_set_flag: Callable[[VTFImageFlag, bool], None] = CFUNCTYPE(None, c_int, c_bool)(("vlImageSetFlag", _vtflib))
+_vl_image_get_flag: Callable[[VTFImageFlag], bool] = _function("vlImageGetFlag", c_bool, c_int)
+_vl_image_set_flag: Callable[[VTFImageFlag, bool], None] = _function("vlImageSetFlag", None, c_int, c_bool)
 
-_vl_image_get_bumpmap_scale: Callable[[], float] = CFUNCTYPE(c_float)(("vlImageGetBumpmapScale", _vtflib))
-_vl_image_set_bumpmap_scale: Callable[[float], None] = CFUNCTYPE(None, c_float)(("vlImageSetBumpmapScale", _vtflib))
+_vl_image_get_bumpmap_scale: Callable[[], float] = _function("vlImageGetBumpmapScale", c_float)
+_vl_image_set_bumpmap_scale: Callable[[float], None] = _function("vlImageSetBumpmapScale", None, c_float)
 
 _vl_image_get_reflectivity: Callable[[Any, Any, Any], None] = \
-    CFUNCTYPE(None, POINTER(c_float), POINTER(c_float), POINTER(c_float))(("vlImageGetReflectivity", _vtflib))
-_vl_image_set_reflectivity: Callable[[float, float, float], None] = CFUNCTYPE(None, c_float, c_float, c_float)(
-    ("vlImageSetReflectivity", _vtflib))
+    _function("vlImageGetReflectivity", None, POINTER(c_float), POINTER(c_float), POINTER(c_float))
+_vl_image_set_reflectivity: Callable[[float, float, float], None] = \
+    _function("vlImageSetReflectivity", None, c_float, c_float, c_float)
 
-_vl_image_get_format: Callable[[], int] = CFUNCTYPE(c_int)(("vlImageGetFormat", _vtflib))
+_vl_image_get_format: Callable[[], int] = _function("vlImageGetFormat", c_int)
 
-_vl_image_get_data: Callable[[int, int, int, int], Any] = CFUNCTYPE(POINTER(c_ubyte), c_uint, c_uint, c_uint, c_uint)(
-    ("vlImageGetData", _vtflib))
+_vl_image_get_data: Callable[[int, int, int, int], Any] = \
+    _function("vlImageGetData", POINTER(c_ubyte), c_uint, c_uint, c_uint, c_uint)
 _vl_image_set_data: Callable[[int, int, int, int, Any], None] = \
-    CFUNCTYPE(None, c_uint, c_uint, c_uint, c_uint, c_char_p)(("vlImageSetData", _vtflib))
+    _function("vlImageSetData", None, c_uint, c_uint, c_uint, c_uint, c_void_p)
 
-_vl_image_get_has_thumbnail: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageGetHasThumbnail", _vtflib))
-_vl_image_get_thumbnail_width: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetThumbnailWidth", _vtflib))
-_vl_image_get_thumbnail_height: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetThumbnailHeight", _vtflib))
+_vl_image_get_has_thumbnail: Callable[[], bool] = _function("vlImageGetHasThumbnail", c_bool)
+_vl_image_get_thumbnail_width: Callable[[], int] = _function("vlImageGetThumbnailWidth", c_uint)
+_vl_image_get_thumbnail_height: Callable[[], int] = _function("vlImageGetThumbnailHeight", c_uint)
 
-_vl_image_get_thumbnail_format: Callable[[], int] = CFUNCTYPE(c_int)(("vlImageGetThumbnailFormat", _vtflib))
+_vl_image_get_thumbnail_format: Callable[[], int] = _function("vlImageGetThumbnailFormat", c_int)
 
-_vl_image_get_thumbnail_data: Callable[[], Any] = CFUNCTYPE(POINTER(c_ubyte))(("vlImageGetThumbnailData", _vtflib))
-_vl_image_set_thumbnail_data: Callable[[Any], None] = CFUNCTYPE(None, c_char_p)(
-    ("vlImageSetThumbnailData", _vtflib))
+_vl_image_get_thumbnail_data: Callable[[], Any] = _function("vlImageGetThumbnailData", POINTER(c_ubyte))
+_vl_image_set_thumbnail_data: Callable[[Any], None] = _function("vlImageSetThumbnailData", None, c_void_p)
 
-_vl_image_get_supports_resources: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageGetSupportsResources", _vtflib))
+_vl_image_get_supports_resources: Callable[[], bool] = _function("vlImageGetSupportsResources", c_bool)
 
-_vl_image_get_resource_count: Callable[[], int] = CFUNCTYPE(c_uint)(("vlImageGetResourceCount", _vtflib))
-_vl_image_get_resource_type: Callable[[int], int] = CFUNCTYPE(c_uint, c_uint)(("vlImageGetResourceType", _vtflib))
-_vl_image_get_has_resource: Callable[[int], bool] = CFUNCTYPE(c_bool, c_uint)(("vlImageGetHasResource", _vtflib))
+_vl_image_get_resource_count: Callable[[], int] = _function("vlImageGetResourceCount", c_uint)
+_vl_image_get_resource_type: Callable[[int], int] = _function("vlImageGetResourceType", c_uint, c_uint)
+_vl_image_get_has_resource: Callable[[int], bool] = _function("vlImageGetHasResource", c_bool, c_uint)
 
-_vl_image_get_resource_data: Callable[[int, Any], int] = CFUNCTYPE(c_void_p, c_uint, POINTER(c_uint))(
-    ("vlImageGetResourceData", _vtflib))
-_vl_image_set_resource_data: Callable[[int, int, int], int] = CFUNCTYPE(c_void_p, c_uint, c_uint, c_void_p)(
-    ("vlImageSetResourceData", _vtflib))
+_vl_image_get_resource_data: Callable[[int, Any], int] = \
+    _function("vlImageGetResourceData", c_void_p, c_uint, POINTER(c_uint))
+_vl_image_set_resource_data: Callable[[int, int, Any], int] = \
+    _function("vlImageSetResourceData", c_void_p, c_uint, c_uint, c_void_p)
 
 _vl_image_generate_mipmaps: Callable[[int, int, VTFMipMapFilter, VTFSharpenFilter], bool] = \
-    CFUNCTYPE(c_bool, c_uint, c_uint, c_int, c_int)(("vlImageGenerateMipmaps", _vtflib))
+    _function("vlImageGenerateMipmaps", c_bool, c_uint, c_uint, c_int, c_int)
 _vl_image_generate_all_mipmaps: Callable[[VTFMipMapFilter, VTFSharpenFilter], bool] = \
-    CFUNCTYPE(c_bool, c_int, c_int)(("vlImageGenerateAllMipmaps", _vtflib))
+    _function("vlImageGenerateAllMipmaps", c_bool, c_int, c_int)
 
-_vl_image_generate_thumbnail: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageGenerateThumbnail", _vtflib))
+_vl_image_generate_thumbnail: Callable[[], bool] = _function("vlImageGenerateThumbnail", c_bool)
 
 _vl_image_generate_normal_map: Callable[[int, VTFKernelFilter, VTFHeightConversionMethod, VTFNormalAlphaResult], bool] \
-    = CFUNCTYPE(c_bool, c_uint, c_int, c_int, c_int)(("vlImageGenerateNormalMap", _vtflib))
+    = _function("vlImageGenerateNormalMap", c_bool, c_uint, c_int, c_int, c_int)
 _vl_image_generate_all_normal_maps: Callable[[VTFKernelFilter, VTFHeightConversionMethod, VTFNormalAlphaResult], bool] \
-    = CFUNCTYPE(c_bool, c_int, c_int, c_int)(("vlImageGenerateAllNormalMaps", _vtflib))
+    = _function("vlImageGenerateAllNormalMaps", c_bool, c_int, c_int, c_int)
 
-_vl_image_generate_sphere_map: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageGenerateSphereMap", _vtflib))
+_vl_image_generate_sphere_map: Callable[[], bool] = _function("vlImageGenerateSphereMap", c_bool)
 
-_vl_image_compute_reflectivity: Callable[[], bool] = CFUNCTYPE(c_bool)(("vlImageComputeReflectivity", _vtflib))
+_vl_image_compute_reflectivity: Callable[[], bool] = _function("vlImageComputeReflectivity", c_bool)
 
-_vl_image_get_image_format_info: Callable[[VTFImageFormat], Any] = CFUNCTYPE(POINTER(SVTFImageFormatInfo), c_int)(
-    ("vlImageGetImageFormatInfo", _vtflib))
+_vl_image_get_image_format_info: Callable[[VTFImageFormat], Any] = \
+    _function("vlImageGetImageFormatInfo", POINTER(SVTFImageFormatInfo), c_int)
 _vl_image_get_image_format_info_ex: Callable[[VTFImageFormat, Any], bool] = \
-    CFUNCTYPE(c_bool, c_int, POINTER(SVTFImageFormatInfo))(("vlImageGetImageFormatInfoEx", _vtflib))
+    _function("vlImageGetImageFormatInfoEx", c_bool, c_int, POINTER(SVTFImageFormatInfo))
 
 _vl_image_compute_image_size: Callable[[int, int, int, int, VTFImageFormat], int] = \
-    CFUNCTYPE(c_uint, c_uint, c_uint, c_uint, c_uint, c_int)(("vlImageComputeImageSize", _vtflib))
+    _function("vlImageComputeImageSize", c_uint, c_uint, c_uint, c_uint, c_uint, c_int)
 
 _vl_image_compute_mipmap_count: Callable[[int, int, int], int] = \
-    CFUNCTYPE(c_uint, c_uint, c_uint, c_uint)(("vlImageComputeMipmapCount", _vtflib))
+    _function("vlImageComputeMipmapCount", c_uint, c_uint, c_uint, c_uint)
 _vl_image_compute_mipmap_dimensions: Callable[[int, int, int, int, Any, Any, Any], None] = \
-    CFUNCTYPE(None, c_uint, c_uint, c_uint, c_uint, POINTER(c_uint), POINTER(c_uint), POINTER(c_uint))(
-        ("vlImageComputeMipmapDimensions", _vtflib))
+    _function("vlImageComputeMipmapDimensions", None, c_uint, c_uint, c_uint, c_uint, POINTER(c_uint),
+              POINTER(c_uint), POINTER(c_uint))
 _vl_image_compute_mipmap_size: Callable[[int, int, int, int, VTFImageFormat], int] = \
-    CFUNCTYPE(c_uint, c_uint, c_uint, c_uint, c_uint, c_int)(("vlImageComputeMipmapSize", _vtflib))
+    _function("vlImageComputeMipmapSize", c_uint, c_uint, c_uint, c_uint, c_uint, c_int)
 
 _vl_image_convert_to_rgba8888: Callable[[Any, Any, int, int, VTFImageFormat], bool] = \
-    CFUNCTYPE(c_bool, c_char_p, c_char_p, c_uint, c_uint, c_int)(("vlImageConvertToRGBA8888", _vtflib))
+    _function("vlImageConvertToRGBA8888", c_bool, c_void_p, c_void_p, c_uint, c_uint, c_int)
 _vl_image_convert_from_rgba8888: Callable[[Any, Any, int, int, VTFImageFormat], bool] = \
-    CFUNCTYPE(c_bool, c_char_p, c_char_p, c_uint, c_uint, c_int)(
-        ("vlImageConvertFromRGBA8888", _vtflib))
+    _function("vlImageConvertFromRGBA8888", c_bool, c_void_p, c_void_p, c_uint, c_uint, c_int)
 
 _vl_image_convert: Callable[[Any, Any, int, int, VTFImageFormat, VTFImageFormat], bool] = \
-    CFUNCTYPE(c_bool, c_char_p, c_char_p, c_uint, c_uint, c_int, c_int)(("vlImageConvert", _vtflib))
+    _function("vlImageConvert", c_bool, c_void_p, c_void_p, c_uint, c_uint, c_int, c_int)
 
 _vl_image_convert_to_normal_map: Callable[[Any, Any, int, int, VTFKernelFilter, VTFHeightConversionMethod,
                                           VTFNormalAlphaResult, int, float, bool, bool, bool], bool] = \
-    CFUNCTYPE(c_bool, c_char_p, c_char_p, c_uint, c_uint, c_int, c_int, c_int,
-              c_ubyte, c_float, c_bool, c_bool, c_bool)(("vlImageConvertToNormalMap", _vtflib))
+    _function("vlImageConvertToNormalMap", c_bool, c_void_p, c_void_p, c_uint, c_uint, c_int, c_int, c_int,
+              c_ubyte, c_float, c_bool, c_bool, c_bool)
 
 _vl_image_resize: Callable[[Any, Any, int, int, int, int, VTFMipMapFilter, VTFSharpenFilter], bool] = \
-    CFUNCTYPE(c_bool, c_char_p, c_char_p, c_uint, c_uint, c_uint, c_uint, c_int, c_int)(
-        ("vlImageResize", _vtflib))
+    _function("vlImageResize", c_bool, c_void_p, c_void_p, c_uint, c_uint, c_uint, c_uint, c_int, c_int)
 
 _vl_image_correct_image_gamma: Callable[[Any, int, int, float], None] = \
-    CFUNCTYPE(None, c_char_p, c_uint, c_uint, c_float)(("vlImageCorrectImageGamma", _vtflib))
+    _function("vlImageCorrectImageGamma", None, c_void_p, c_uint, c_uint, c_float)
 _vl_image_compute_image_reflectivity: Callable[[Any, int, int, Any, Any, Any], None] = \
-    CFUNCTYPE(None, c_char_p, c_uint, c_uint, POINTER(c_float), POINTER(c_float), POINTER(c_float))(
-        ("vlImageComputeImageReflectivity", _vtflib))
+    _function("vlImageComputeImageReflectivity", None, c_void_p, c_uint, c_uint, POINTER(c_float), POINTER(c_float),
+              POINTER(c_float))
 
 _vl_image_flip_image: Callable[[Any, int, int], None] = \
-    CFUNCTYPE(None, c_char_p, c_uint, c_uint)(("vlImageFlipImage", _vtflib))
+    _function("vlImageFlipImage", None, c_void_p, c_uint, c_uint)
 _vl_image_mirror_image: Callable[[Any, int, int], None] = \
-    CFUNCTYPE(None, c_char_p, c_uint, c_uint)(("vlImageMirrorImage", _vtflib))
+    _function("vlImageMirrorImage", None, c_void_p, c_uint, c_uint)
+
+_vl_material_is_bound: Callable[[], bool] = _function("vlMaterialIsBound", c_bool)
+_vl_bind_material: Callable[[c_uint], bool] = _function("vlBindMaterial", c_bool, c_uint)
+
+_vl_create_material: Callable[[Any], bool] = _function("vlCreateMaterial", c_bool, POINTER(c_uint))
+_vl_delete_material: Callable[[c_uint], None] = _function("vlDeleteMaterial", None, c_uint)
+
+_vl_material_create: Callable[[bytes], bool] = _function("vlMaterialCreate", c_bool, c_char_p)
+_vl_material_destroy: Callable[[], None] = _function("vlMaterialDestroy", None)
+
+_vl_material_is_loaded: Callable[[], bool] = _function("vlMaterialIsLoaded", c_bool)
+
+_vl_material_load: Callable[[bytes], bool] = _function("vlMaterialLoad", c_bool, c_char_p)
+_vl_material_load_lump: Callable[[Any, int], bool] = _function("vlMaterialLoadLump", c_bool, c_void_p, c_uint)
+_vl_material_load_proc: Callable[[int], bool] = _function("vlMaterialLoadProc", c_bool, c_void_p)
+
+_vl_material_save: Callable[[bytes], bool] = _function("vlMaterialSave", c_bool, c_char_p)
+_vl_material_save_proc: Callable[[int], bool] = _function("vlMaterialSaveProc", c_bool, c_void_p)
+
+_vl_material_get_first_node: Callable[[], bool] = _function("vlMaterialGetFirstNode", c_bool)
+_vl_material_get_last_node: Callable[[], bool] = _function("vlMaterialGetLastNode", c_bool)
+_vl_material_get_next_node: Callable[[], bool] = _function("vlMaterialGetNextNode", c_bool)
+_vl_material_get_previous_node: Callable[[], bool] = _function("vlMaterialGetPreviousNode", c_bool)
+
+_vl_material_get_parent_node: Callable[[], bool] = _function("vlMaterialGetParentNode", c_bool)
+_vl_material_get_child_node: Callable[[bytes], bool] = _function("vlMaterialGetChildNode", c_bool, c_char_p)
 
-# TODO implement VMT functions
+_vl_material_get_node_name: Callable[[], Optional[bytes]] = _function("vlMaterialGetNodeName", c_char_p)
+_vl_material_set_node_name: Callable[[bytes], None] = _function("vlMaterialSetNodeName", None, c_char_p)
+
+_vl_material_get_node_type: Callable[[], int] = _function("vlMaterialGetNodeType", c_int)
+
+_vl_material_get_node_string: Callable[[], Optional[bytes]] = _function("vlMaterialGetNodeString", c_char_p)
+_vl_material_set_node_string: Callable[[bytes], None] = _function("vlMaterialSetNodeString", None, c_char_p)
+
+_vl_material_get_node_integer: Callable[[], int] = _function("vlMaterialGetNodeInteger", c_int)
+_vl_material_set_node_integer: Callable[[int], None] = _function("vlMaterialSetNodeInteger", None, c_int)
+
+_vl_material_get_node_single: Callable[[], float] = _function("vlMaterialGetNodeSingle", c_float)
+_vl_material_set_node_single: Callable[[float], None] = _function("vlMaterialSetNodeSingle", None, c_float)
+
+_vl_material_add_node_group: Callable[[bytes], bool] = _function("vlMaterialAddNodeGroup", c_bool, c_char_p)
+_vl_material_add_node_string: Callable[[bytes, bytes], bool] = \
+    _function("vlMaterialAddNodeString", c_bool, c_char_p, c_char_p)
+_vl_material_add_node_integer: Callable[[bytes, int], bool] = \
+    _function("vlMaterialAddNodeInteger", c_bool, c_char_p, c_int)
+_vl_material_add_node_single: Callable[[bytes, float], bool] = \
+    _function("vlMaterialAddNodeSingle", c_bool, c_char_p, c_float)
+
+_functions: Dict[str, _LazyFunction] = {name: value for name, value in globals().items()
+                                        if isinstance(value, _LazyFunction)}
+for _name, _lazy_function in _functions.items():
+    _lazy_function.global_name = _name
+
+
+def _set_native_hook(hook: Optional[Callable[[str, Callable[..., Any]], Callable[..., Any]]]) -> None:
+    # wraps the native functions with hook(name, function), or unwraps them if hook is None,
+    # the functions that aren't bound yet are wrapped when they are
+    global _native_hook
+    _native_hook = hook
+    for lazy_function in _functions.values():
+        if lazy_function.function is not None:
+            globals()[lazy_function.global_name] = _hooked(lazy_function.name, lazy_function.function)
 
 
 class VTFException(Exception):
@@ -562,18 +701,811 @@ class VTFException(Exception):
         super().__init__(error)
 
 
+def _explain_missing_nvdxt(error: VTFException) -> VTFException:
+    # the bundled Linux library is built without NVDXT, which VTFLib uses to compress DXT and to resize images
+    message = str(error)
+    if "DXTn compression" in message:
+        error.args = ("{}\nthis VTFLib build can't compress to DXT formats, use an uncompressed format"
+                      .format(message),)
+    elif "NVDXT" in message:
+        error.args = ("{}\nthis VTFLib build can't resize images, create the image without mipmaps, thumbnail, "
+                      "resizing and normal map".format(message),)
+    return error
+
+
+# any C-contiguous object supporting the buffer protocol (bytes, bytearray, memoryview, mmap, numpy arrays...)
+_Buffer = Any
+
+
+class _PyBuffer(Structure):
+    _fields_ = [("buf", c_void_p),
+                ("obj", c_void_p),
+                ("len", c_ssize_t),
+                ("itemsize", c_ssize_t),
+                ("readonly", c_int),
+                ("ndim", c_int),
+                ("format", c_char_p),
+                ("shape", c_void_p),
+                ("strides", c_void_p),
+                ("suboffsets", c_void_p),
+                ("internal", c_void_p)]
+
+
+_PYBUF_SIMPLE = 0
+_PYBUF_WRITABLE = 1
+
+_py_object_get_buffer = pythonapi.PyObject_GetBuffer
+_py_object_get_buffer.argtypes = [py_object, POINTER(_PyBuffer), c_int]
+_py_object_get_buffer.restype = c_int
+_py_buffer_release = pythonapi.PyBuffer_Release
+_py_buffer_release.argtypes = [POINTER(_PyBuffer)]
+_py_buffer_release.restype = None
+
+
+@contextmanager
+def _buffer_pointer(data: _Buffer, writable: bool = False) -> Iterator[Tuple[Any, int]]:
+    # yields a pointer to the memory of data and its size in bytes without copying,
+    # the pointer is only valid inside the with block
+    if isinstance(data, bytes) and not writable:
+        yield data, len(data)
+        return
+    view = _PyBuffer()
+    _py_object_get_buffer(data, byref(view), _PYBUF_WRITABLE if writable else _PYBUF_SIMPLE)
+    try:
+        yield view.buf, view.len
+    finally:
+        _py_buffer_release(byref(view))
+
+
+def _is_released(view: memoryview) -> bool:
+    try:
+        view.obj
+    except ValueError:
+        return True
+    return False
+
+
+def _check_buffer_size(size: int, required: int, name: str = "source") -> None:
+    if size < required:
+        raise ValueError("{} buffer too small: got {} bytes, need {}".format(name, size, required))
+
+
+@contextmanager
+def _in_place_rgba8888(source: _Buffer, dest: _Buffer, width: int, height: int) -> Iterator[Any]:
+    # for VTFLib functions that modify their input, copies source to dest unless they are the same object
+    size = width * height * 4
+    with _buffer_pointer(dest, writable=True) as (dest_pointer, dest_size):
+        _check_buffer_size(dest_size, size, "destination")
+        if source is not dest:
+            with _buffer_pointer(source) as (source_pointer, source_size):
+                _check_buffer_size(source_size, size)
+                memmove(dest_pointer, source_pointer, size)
+        yield dest_pointer
+
+
+def _mirror_rows(pointer: Any, width: int, height: int) -> None:
+    # reverses the pixels of every RGBA8888 row in place
+    row_size = width * 4
+    with memoryview((c_ubyte * (row_size * height)).from_address(_address(pointer))) as view, \
+            view.cast("B") as data:
+        for start in range(0, row_size * height, row_size):
+            with data[start:start + row_size] as row, row.cast("I") as pixels:
+                data[start:start + row_size] = pixels[::-1].tobytes()
+
+
+def _numpy() -> Any:
+    # numpy is optional and only imported when the array methods are first used
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("the array methods of pyvtflib require numpy") from None
+    return numpy
+
+
+_vectorized_backend: Any = None
+_numpy_backend_enabled = True
+
+
+def set_numpy_backend(enabled: bool) -> None:
+    # the NumPy implementations of flip, mirror and of conversions that only reorder 8 bit channels
+    # are used automatically when numpy is installed, this allows forcing the fallbacks: VTFLib for flip,
+    # pure Python for the others, with the same results. DXT conversions to RGBA8888 fall back to NumPy
+    # only if VTFLib can't be loaded.
+    global _numpy_backend_enabled
+    _numpy_backend_enabled = enabled
+
+
+def _numpy_backend() -> Any:
+    global _vectorized_backend
+    if not _numpy_backend_enabled:
+        return None
+    if _vectorized_backend is None:
+        try:
+            from . import _vectorized
+            _vectorized_backend = _vectorized
+        except ImportError:
+            _vectorized_backend = False
+    return _vectorized_backend or None
+
+
+# channel order of the formats that only differ in the order of their 8 bit channels, the channel stored in
+# each byte, 0-3 are R, G, B, A. Conversions between these never go to VTFLib, the bundled Linux build mixes up
+# the channels of ABGR8888, BGRA8888 and BGR888, so their results are the plain reordering and differ from those
+# of raw VTFLib. ARGB8888 keeps VTFLib's byte order, which is G, B, A, R, so existing files stay compatible,
+# the bundled build only converts it correctly for bytes below 128.
+# Conversions between one of these and another format go through RGBA8888, which VTFLib converts correctly.
+_CHANNEL_ORDERS: Dict[int, Tuple[int, ...]] = {
+    VTFImageFormat.IMAGE_FORMAT_RGBA8888: (0, 1, 2, 3),
+    VTFImageFormat.IMAGE_FORMAT_ABGR8888: (3, 2, 1, 0),
+    VTFImageFormat.IMAGE_FORMAT_ARGB8888: (1, 2, 3, 0),
+    VTFImageFormat.IMAGE_FORMAT_BGRA8888: (2, 1, 0, 3),
+    VTFImageFormat.IMAGE_FORMAT_RGB888: (0, 1, 2),
+    VTFImageFormat.IMAGE_FORMAT_BGR888: (2, 1, 0),
+}
+
+
+def _reorder_channels(source: _Buffer, dest: _Buffer, pixels: int,
+                      source_format: VTFImageFormat, dest_format: VTFImageFormat) -> None:
+    # converts between formats of _CHANNEL_ORDERS, alpha is 255 if the source has none
+    backend = _numpy_backend()
+    if backend is not None:
+        backend.swizzle(source, dest, pixels, 1, source_format, dest_format)
+        return
+    source_order = _CHANNEL_ORDERS[source_format]
+    dest_order = _CHANNEL_ORDERS[dest_format]
+    source_size = pixels * len(source_order)
+    dest_size = pixels * len(dest_order)
+    with memoryview(source) as source_view, source_view.cast("B") as source_data, \
+            memoryview(dest) as dest_view, dest_view.cast("B") as dest_data:
+        _check_buffer_size(len(source_data), source_size)
+        _check_buffer_size(len(dest_data), dest_size, "destination")
+        for dest_channel, channel in enumerate(dest_order):
+            if channel in source_order:
+                dest_data[dest_channel:dest_size:len(dest_order)] = \
+                    source_data[source_order.index(channel):source_size:len(source_order)]
+            else:
+                dest_data[dest_channel:dest_size:len(dest_order)] = b"\xff" * pixels
+
+
+def _dxt_backend(source_format: VTFImageFormat, dest_format: VTFImageFormat) -> Any:
+    # the NumPy DXT decoder is slower than VTFLib's, so conversions only use it if VTFLib can't be loaded
+    if dest_format != VTFImageFormat.IMAGE_FORMAT_RGBA8888:
+        return None
+    backend = _numpy_backend()
+    if backend is None or source_format not in backend.DXT_BLOCK_SIZES or _is_library_available():
+        return None
+    return backend
+
+
+_format_infos: Dict[int, SVTFImageFormatInfo] = {}
+
+
+def _format_info(img_format: VTFImageFormat) -> SVTFImageFormatInfo:
+    # the format table of VTFLib is static, so each format is only looked up once
+    info = _format_infos.get(img_format)
+    if info is None:
+        info = _format_infos[img_format] = _vl_image_get_image_format_info(img_format).contents
+    return info
+
+
+_array_layouts: Dict[int, Optional[Tuple[str, int]]] = {}
+
+
+def _array_layout(img_format: VTFImageFormat) -> Optional[Tuple[str, int]]:
+    # (dtype, channel count) of formats whose channels all have the same 8, 16 or 32 bit width, None for others
+    if img_format not in _array_layouts:
+        info = _format_info(img_format)
+        channel_bits = {bits for bits in (info.uiRedBitsPerPixel, info.uiGreenBitsPerPixel,
+                                          info.uiBlueBitsPerPixel, info.uiAlphaBitsPerPixel) if bits}
+        if img_format == VTFImageFormat.IMAGE_FORMAT_I8:
+            channel_bits = {8}
+        layout = None
+        if len(channel_bits) == 1 and info.bIsSupported and not info.bIsCompressed:
+            bits = channel_bits.pop()
+            if bits == 8:
+                layout = ("u1", info.uiBitsPerPixel // bits)
+            elif bits == 16:
+                layout = ("<f2" if info.lpName.endswith(b"F") else "<u2", info.uiBitsPerPixel // bits)
+            elif bits == 32:
+                layout = ("<f4", info.uiBitsPerPixel // bits)
+        _array_layouts[img_format] = layout
+    return _array_layouts[img_format]
+
+
+def _array_format(img_format: VTFImageFormat, array_format: Optional[VTFImageFormat]) -> VTFImageFormat:
+    # by default arrays use the format of the image, or RGBA8888 if it can't be represented as an array
+    if array_format is None:
+        return img_format if _array_layout(img_format) is not None else VTFImageFormat.IMAGE_FORMAT_RGBA8888
+    if _array_layout(array_format) is None:
+        raise ValueError("{} can't be represented as an array".format(VTFImageFormat(array_format).name))
+    return array_format
+
+
+def _is_compressed(img_format: VTFImageFormat) -> bool:
+    return _format_info(img_format).bIsCompressed
+
+
+# VTFLib tonemaps these with the average luminance of all pixels converted in the same call
+_TONEMAPPED_FORMATS = (VTFImageFormat.IMAGE_FORMAT_RGBA16161616F,)
+
+
+def _is_tonemapped(source_format: VTFImageFormat, dest_format: VTFImageFormat) -> bool:
+    return source_format != dest_format and \
+        (source_format in _TONEMAPPED_FORMATS or dest_format in _TONEMAPPED_FORMATS)
+
+
+def _image_size(width: int, height: int, img_format: VTFImageFormat) -> int:
+    # the size of RGBA8888 images is known without loading VTFLib, for the fallback to the NumPy DXT decoder
+    if img_format == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
+        return width * height * 4
+    return _vl_image_compute_image_size(width, height, 1, 1, img_format)
+
+
+def _address(pointer: Any) -> int:
+    # of ctypes pointers and the values yielded by _buffer_pointer, which yields bytes objects as is
+    return pointer if isinstance(pointer, int) else cast(pointer, c_void_p).value or 0
+
+
+def _convert_image(source_pointer: int, dest_pointer: int, width: int, height: int,
+                   source_format: VTFImageFormat, dest_format: VTFImageFormat) -> None:
+    # every conversion of image data goes through here, see _CHANNEL_ORDERS
+    rgba8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+    if source_format in _CHANNEL_ORDERS and dest_format in _CHANNEL_ORDERS:
+        pixels = width * height
+        _reorder_channels((c_ubyte * (pixels * len(_CHANNEL_ORDERS[source_format]))).from_address(source_pointer),
+                          (c_ubyte * (pixels * len(_CHANNEL_ORDERS[dest_format]))).from_address(dest_pointer),
+                          pixels, source_format, dest_format)
+        return
+    if source_format in _CHANNEL_ORDERS and source_format != rgba8888:
+        source_rgba8888 = create_string_buffer(width * height * 4)
+        _convert_image(source_pointer, _address(source_rgba8888), width, height, source_format, rgba8888)
+        source_pointer, source_format = _address(source_rgba8888), rgba8888
+    if dest_format in _CHANNEL_ORDERS and dest_format != rgba8888:
+        dest_rgba8888 = create_string_buffer(width * height * 4)
+        _convert_image(source_pointer, _address(dest_rgba8888), width, height, source_format, rgba8888)
+        _convert_image(_address(dest_rgba8888), dest_pointer, width, height, rgba8888, dest_format)
+    elif not _vl_image_convert(source_pointer, dest_pointer, width, height, source_format, dest_format):
+        raise VTFException
+
+
+def _convert_slices(source_pointer: int, dest_pointer: int, width: int, height: int, slices: int,
+                    source_format: VTFImageFormat, dest_format: VTFImageFormat) -> None:
+    # the slices of a mipmap are stored contiguously, so unless the rows of compressed blocks would
+    # straddle two slices or the conversion is tonemapped, they are converted as a single image
+    if not _is_tonemapped(source_format, dest_format) and \
+            (height % 4 == 0 or not (_is_compressed(source_format) or _is_compressed(dest_format))):
+        height, slices = height * slices, 1
+    source_size = _vl_image_compute_image_size(width, height, 1, 1, source_format)
+    dest_size = _vl_image_compute_image_size(width, height, 1, 1, dest_format)
+    for i in range(slices):
+        if source_format == dest_format:
+            memmove(dest_pointer + i * dest_size, source_pointer + i * source_size, source_size)
+        else:
+            _convert_image(source_pointer + i * source_size, dest_pointer + i * dest_size,
+                           width, height, source_format, dest_format)
+
+
+def _rgba8888_chunks(strips: Iterable[_Buffer], width: int, height: int,
+                     block_rows: int) -> Iterator[Tuple[_Buffer, int]]:
+    # regroups strips of RGBA8888 rows into chunks of a multiple of block_rows rows, except for the last one,
+    # yielding each with its row count. Aligned strips are passed on as is, other rows are carried over to
+    # the next chunk, a chunk is only valid until the next one is requested.
+    row_size = width * 4
+    pending = bytearray()
+    rows_done = 0
+    for strip in strips:
+        with memoryview(strip) as view, view.cast("B") as data:
+            if len(data) % row_size:
+                raise ValueError("strip size must be a multiple of the row size of {} bytes".format(row_size))
+            rows = len(data) // row_size
+            if rows_done + len(pending) // row_size + rows > height:
+                raise ValueError("strips have more than {} rows".format(height))
+            if not pending and rows % block_rows == 0:
+                if rows:
+                    yield data, rows
+                rows_done += rows
+                continue
+            pending += data
+        rows = len(pending) // row_size // block_rows * block_rows
+        if rows:
+            with memoryview(pending) as view, view[:rows * row_size] as chunk:
+                yield chunk, rows
+            del pending[:rows * row_size]
+            rows_done += rows
+    rows = len(pending) // row_size
+    if rows_done + rows != height:
+        raise ValueError("strips have {} rows, expected {}".format(rows_done + rows, height))
+    if rows:
+        yield pending, rows
+
+
+def _convert_mipmaps(source_pointer: int, dest_pointer: int, mipmaps: List[Tuple[int, int, int]],
+                     source_format: VTFImageFormat, dest_format: VTFImageFormat) -> None:
+    # converts consecutive (width, height, slices) mipmaps, uncompressed pixels are independent of each other
+    # unless the conversion is tonemapped, so all of them are converted as a single row
+    if not (_is_compressed(source_format) or _is_compressed(dest_format) or
+            _is_tonemapped(source_format, dest_format)):
+        mipmaps = [(sum(width * height * slices for width, height, slices in mipmaps), 1, 1)]
+    for width, height, slices in mipmaps:
+        _convert_slices(source_pointer, dest_pointer, width, height, slices, source_format, dest_format)
+        source_pointer += _vl_image_compute_image_size(width, height, slices, 1, source_format)
+        dest_pointer += _vl_image_compute_image_size(width, height, slices, 1, dest_format)
+
+
+# VTFLib operates on a single globally bound image, every bind-and-call sequence must hold this lock
+_lock = RLock()
+_initialize_count = 0
+
+
+def _initialize() -> None:
+    global _initialize_count
+    with _lock:
+        if _initialize_count == 0 and not _vl_initialize():
+            raise VTFException
+        _initialize_count += 1
+
+
+def _shutdown() -> None:
+    global _initialize_count
+    with _lock:
+        _initialize_count -= 1
+        if _initialize_count == 0:
+            _vl_shutdown()
+
+
+def _delete_image(handle: c_uint) -> None:
+    with _lock:
+        _vl_delete_image(handle)
+        _shutdown()
+
+
+class VTFImage():
+    def __init__(self) -> None:
+        self._handle = c_uint()
+        _initialize()
+        with _lock:
+            if not _vl_create_image(byref(self._handle)):
+                error = VTFException()
+                _shutdown()
+                raise error
+        self._deleted = False
+        # frees the image when it's deleted, or when this object is garbage collected after a deferred delete
+        self._finalizer = weakref.finalize(self, _delete_image, self._handle)
+        self._finalizer.atexit = False
+
+    @property
+    def handle(self) -> int:
+        return self._handle.value
+
+    def delete(self, deferred: bool = False) -> None:
+        # deferred only marks the image as deleted, it's freed once nothing references this object anymore,
+        # e.g. the memory views of VTFLib into its data
+        with _lock:
+            self._deleted = True
+            if not deferred:
+                self._finalizer()
+
+    @contextmanager
+    def bound(self) -> Iterator['VTFImage']:
+        with _lock:
+            if self._deleted or not _vl_bind_image(self._handle):
+                raise VTFException
+            yield self
+
+
+_F = TypeVar('_F', bound=Callable[..., Any])
+
+
+def _bound(method: _F) -> _F:
+    @wraps(method)
+    def wrapper(self: 'VTFLib', *args: Any, **kwargs: Any) -> Any:
+        with self._image.bound():
+            return method(self, *args, **kwargs)
+    return wrapper  # type: ignore
+
+
+class VMTMaterial():
+    def __init__(self) -> None:
+        self._handle = c_uint()
+        _initialize()
+        with _lock:
+            if not _vl_create_material(byref(self._handle)):
+                error = VTFException()
+                _shutdown()
+                raise error
+        self._deleted = False
+
+    @property
+    def handle(self) -> int:
+        return self._handle.value
+
+    def delete(self) -> None:
+        with _lock:
+            if self._deleted:
+                return
+            _vl_delete_material(self._handle)
+            self._deleted = True
+            _shutdown()
+
+    @contextmanager
+    def bound(self) -> Iterator['VMTMaterial']:
+        with _lock:
+            if self._deleted or not _vl_bind_material(self._handle):
+                raise VTFException
+            yield self
+
+
+def _material_bound(method: _F) -> _F:
+    @wraps(method)
+    def wrapper(self: 'VMTLib', *args: Any, **kwargs: Any) -> Any:
+        with self._material.bound():
+            return method(self, *args, **kwargs)
+    return wrapper  # type: ignore
+
+
+_STREAM_REWIND_SIZE = 4096
+
+
+class _Stream():
+    # adapts a Python file object to the VTFLib read/write procs, positions are relative to where the
+    # file object was when the stream was created. VTFLib rewinds to the start after sniffing the header,
+    # so the first few KB read from a non-seekable file are kept, other seeks on it can only go forwards.
+    def __init__(self, file: BinaryIO, size: Optional[int]) -> None:
+        self.file = file
+        self.seekable = file.seekable()
+        self.start = file.tell() if self.seekable else 0
+        self.position = 0
+        self.consumed = 0
+        self.rewind = bytearray()
+        self.size = size
+        self.error: Optional[BaseException] = None
+
+    def _read_file(self, view: memoryview) -> int:
+        readinto = getattr(self.file, "readinto", None)
+        total = 0
+        while total < len(view):
+            if readinto is not None:
+                count = readinto(view[total:])
+            else:
+                chunk = self.file.read(len(view) - total)
+                count = len(chunk)
+                view[total:total + count] = chunk
+            if not count:
+                break
+            total += count
+        if not self.seekable:
+            if len(self.rewind) == self.consumed < _STREAM_REWIND_SIZE:
+                self.rewind += view[:min(total, _STREAM_REWIND_SIZE - self.consumed)]
+            self.consumed += total
+        return total
+
+    def read(self, address: int, size: int) -> int:
+        view = memoryview((c_ubyte * size).from_address(address)).cast('B')
+        total = 0
+        if self.position < self.consumed:
+            total = min(size, self.consumed - self.position)
+            view[:total] = self.rewind[self.position:self.position + total]
+        total += self._read_file(view[total:])
+        self.position += total
+        return total
+
+    def write(self, address: int, size: int) -> int:
+        view = memoryview((c_ubyte * size).from_address(address)).cast('B')
+        total = 0
+        while total < size:
+            count = self.file.write(view[total:])
+            if count is None:
+                raise BlockingIOError("non-blocking write would block")
+            total += count
+        self.position += total
+        self.size = max(self.size or 0, self.position)
+        return total
+
+    def seek(self, offset: int, mode: int) -> int:
+        if mode == VLSeekMode.SEEK_MODE_CURRENT:
+            offset += self.position
+        elif mode == VLSeekMode.SEEK_MODE_END:
+            offset += self.get_size()
+        if self.seekable:
+            self.file.seek(self.start + offset)
+        elif offset != self.position:
+            if offset < self.consumed and self.consumed > len(self.rewind):
+                raise OSError("can't seek backwards in a non-seekable stream")
+            if offset > self.consumed:
+                skip = bytearray(min(offset - self.consumed, 65536))
+                while self.consumed < offset:
+                    if not self._read_file(memoryview(skip)[:offset - self.consumed]):
+                        break
+        self.position = offset
+        return offset
+
+    def get_size(self) -> int:
+        if self.size is None:
+            if not self.seekable:
+                raise ValueError("size must be given for non-seekable streams")
+            end = self.file.seek(0, os.SEEK_END)
+            self.file.seek(self.start + self.position)
+            self.size = end - self.start
+        return self.size
+
+
+_streams: Dict[int, _Stream] = {}
+
+
+def _stream_proc(default: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    # exceptions can't propagate through VTFLib, they are stored and reraised once it returns
+    def decorator(proc: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(proc)
+        def wrapper(*args: Any) -> Any:
+            stream = _streams[args[-1]]
+            if stream.error is not None:
+                return default
+            try:
+                return proc(stream, *args[:-1])
+            except BaseException as e:
+                stream.error = e
+                return default
+        return wrapper
+    return decorator
+
+
+@_stream_proc(None)
+def _stream_close(stream: _Stream) -> None:
+    pass
+
+
+@_stream_proc(False)
+def _stream_open(stream: _Stream) -> bool:
+    return True
+
+
+@_stream_proc(0)
+def _stream_read(stream: _Stream, address: int, size: int) -> int:
+    return stream.read(address, size)
+
+
+@_stream_proc(0)
+def _stream_write(stream: _Stream, address: int, size: int) -> int:
+    return stream.write(address, size)
+
+
+@_stream_proc(0)
+def _stream_seek(stream: _Stream, offset: int, mode: int) -> int:
+    return stream.seek(offset, mode)
+
+
+@_stream_proc(0)
+def _stream_size(stream: _Stream) -> int:
+    return stream.get_size()
+
+
+@_stream_proc(0)
+def _stream_tell(stream: _Stream) -> int:
+    return stream.position
+
+
+_stream_procs: Dict[VLProc, Any] = {}
+
+
+def _set_stream_procs() -> None:
+    # the procs are global to VTFLib, they are set once and dispatch on the user data pointer
+    if _stream_procs:
+        return
+    close_proc = CFUNCTYPE(None, c_void_p)(_stream_close)
+    open_proc = CFUNCTYPE(c_bool, c_void_p)(_stream_open)
+    size_proc = CFUNCTYPE(c_uint, c_void_p)(_stream_size)
+    tell_proc = CFUNCTYPE(c_uint, c_void_p)(_stream_tell)
+    seek_proc = CFUNCTYPE(c_uint, c_long, c_int, c_void_p)(_stream_seek)
+    _stream_procs.update({
+        VLProc.PROC_READ_CLOSE: close_proc,
+        VLProc.PROC_READ_OPEN: open_proc,
+        VLProc.PROC_READ_READ: CFUNCTYPE(c_uint, c_void_p, c_uint, c_void_p)(_stream_read),
+        VLProc.PROC_READ_SEEK: seek_proc,
+        VLProc.PROC_READ_TELL: tell_proc,
+        VLProc.PROC_READ_SIZE: size_proc,
+        VLProc.PROC_WRITE_CLOSE: close_proc,
+        VLProc.PROC_WRITE_OPEN: open_proc,
+        VLProc.PROC_WRITE_WRITE: CFUNCTYPE(c_uint, c_void_p, c_uint, c_void_p)(_stream_write),
+        VLProc.PROC_WRITE_SEEK: seek_proc,
+        VLProc.PROC_WRITE_SIZE: size_proc,
+        VLProc.PROC_WRITE_TELL: tell_proc,
+    })
+    for proc, function in _stream_procs.items():
+        _vl_set_proc(proc, cast(function, c_void_p).value or 0)
+
+
+@contextmanager
+def _stream(file: BinaryIO, size: Optional[int] = None) -> Iterator[_Stream]:
+    # must be used while holding the lock
+    _set_stream_procs()
+    stream = _Stream(file, size)
+    _streams[id(stream)] = stream
+    try:
+        yield stream
+    finally:
+        del _streams[id(stream)]
+
+
+_E = TypeVar('_E', bound=_CEnum)
+
+
+def _check_enum(enum: Type[_E], value: int, name: str) -> _E:
+    try:
+        member = enum(value)
+    except ValueError:
+        member = None
+    if member is None or member.name.endswith("_COUNT"):
+        raise ValueError("invalid {}: {}".format(name, value))
+    return member
+
+
+class CreateOptions(NamedTuple):
+    # options of create_from_rgba8888, the defaults are those of vlImageCreateDefaultCreateStructure except for
+    # resize_clamp, use _replace() to derive variations, the options are validated when used. Mipmaps, thumbnails,
+    # resizing, normal maps and DXT formats need a VTFLib build with NVDXT, the bundled Linux library has none,
+    # so with it mipmaps and thumbnail must be turned off and the format must be uncompressed.
+    img_format: VTFImageFormat = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+    version: Tuple[int, int] = (7, 3)
+    flags: int = 0
+    start_frame: int = 0
+    bumpmap_scale: float = 1.
+    # None computes the reflectivity from the image
+    reflectivity: Optional[Tuple[float, float, float]] = None
+    mipmaps: bool = True
+    mipmap_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_BOX
+    mipmap_sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE
+    thumbnail: bool = True
+    # None keeps the size, resize_width and resize_height are only used with RESIZE_SET
+    resize_method: Optional[VTFResizeMethod] = None
+    resize_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_TRIANGLE
+    resize_sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE
+    resize_width: int = 0
+    resize_height: int = 0
+    # the maximum size, None doesn't clamp. VTFLib clamps to 4096x4096 by default, but resizing needs NVDXT
+    resize_clamp: Optional[Tuple[int, int]] = None
+    gamma_correction: Optional[float] = None
+    normal_map: bool = False
+    kernel_filter: VTFKernelFilter = VTFKernelFilter.KERNEL_FILTER_3X3
+    height_conv: VTFHeightConversionMethod = VTFHeightConversionMethod.HEIGHT_CONVERSION_METHOD_AVERAGE_RGB
+    alpha_result: VTFNormalAlphaResult = VTFNormalAlphaResult.NORMAL_ALPHA_RESULT_WHITE
+    normal_min_z: bool = False
+    normal_scale: float = 2.
+    normal_wrap: bool = False
+    normal_invert_x: bool = False
+    normal_invert_y: bool = False
+    normal_invert_z: bool = False
+    sphere_map: bool = True
+
+    def validate(self) -> None:
+        # raises ValueError if VTFLib would reject the options or misinterpret a value
+        img_format = _check_enum(VTFImageFormat, self.img_format, "image format")
+        if img_format == VTFImageFormat.IMAGE_FORMAT_NONE or \
+                not _format_info(img_format).bIsSupported:
+            raise ValueError("unsupported image format: {}".format(img_format.name))
+        if len(self.version) != 2 or self.version[0] != 7 or not 0 <= self.version[1] <= 5:
+            raise ValueError("unsupported version: {}".format(self.version))
+        if not 0 <= self.flags <= 0xffffffff:
+            raise ValueError("invalid flags: {}".format(self.flags))
+        if not 0 <= self.start_frame <= 0xffffffff:
+            raise ValueError("invalid start frame: {}".format(self.start_frame))
+        if self.reflectivity is not None and len(self.reflectivity) != 3:
+            raise ValueError("reflectivity must have 3 components")
+        _check_enum(VTFMipMapFilter, self.mipmap_filter, "mipmap filter")
+        _check_enum(VTFSharpenFilter, self.mipmap_sharpen_filter, "mipmap sharpen filter")
+        if self.resize_method is not None:
+            resize_method = _check_enum(VTFResizeMethod, self.resize_method, "resize method")
+            if resize_method == VTFResizeMethod.RESIZE_SET and (self.resize_width <= 0 or self.resize_height <= 0):
+                raise ValueError("RESIZE_SET requires a positive resize_width and resize_height")
+        _check_enum(VTFMipMapFilter, self.resize_filter, "resize filter")
+        _check_enum(VTFSharpenFilter, self.resize_sharpen_filter, "resize sharpen filter")
+        if self.resize_clamp is not None and (len(self.resize_clamp) != 2 or min(self.resize_clamp) <= 0):
+            raise ValueError("invalid resize clamp: {}".format(self.resize_clamp))
+        if self.gamma_correction is not None and not self.gamma_correction > 0:
+            raise ValueError("gamma correction must be positive")
+        _check_enum(VTFKernelFilter, self.kernel_filter, "kernel filter")
+        _check_enum(VTFHeightConversionMethod, self.height_conv, "height conversion method")
+        _check_enum(VTFNormalAlphaResult, self.alpha_result, "normal alpha result")
+
+    def _structure(self) -> SVTFCreateOptions:
+        self.validate()
+        options = SVTFCreateOptions()
+        _vl_image_create_default_create_structure(byref(options))
+        options.uiVersion[:] = self.version
+        options.ImageFormat = self.img_format
+        options.uiFlags = self.flags
+        options.uiStartFrame = self.start_frame
+        options.sBumpScale = self.bumpmap_scale
+        options.bReflectivity = self.reflectivity is None
+        if self.reflectivity is not None:
+            options.sReflectivity[:] = self.reflectivity
+        options.bMipmaps = self.mipmaps
+        options.MipmapFilter = self.mipmap_filter
+        options.MipmapSharpenFilter = self.mipmap_sharpen_filter
+        options.bThumbnail = self.thumbnail
+        options.bResize = self.resize_method is not None
+        if self.resize_method is not None:
+            options.ResizeMethod = self.resize_method
+        options.ResizeFilter = self.resize_filter
+        options.ResizeSharpenFilter = self.resize_sharpen_filter
+        options.uiResizeWidth = self.resize_width
+        options.uiResizeHeight = self.resize_height
+        options.bResizeClamp = self.resize_clamp is not None
+        if self.resize_clamp is not None:
+            options.uiResizeClampWidth, options.uiResizeClampHeight = self.resize_clamp
+        options.bGammaCorrection = self.gamma_correction is not None
+        if self.gamma_correction is not None:
+            options.sGammaCorrection = self.gamma_correction
+        options.bNormalMap = self.normal_map
+        options.KernelFilter = self.kernel_filter
+        options.HeightConversionMethod = self.height_conv
+        options.NormalAlphaResult = self.alpha_result
+        options.bNormalMinimumZ = self.normal_min_z
+        options.sNormalScale = self.normal_scale
+        options.bNormalWrap = self.normal_wrap
+        options.bNormalInvertX = self.normal_invert_x
+        options.bNormalInvertY = self.normal_invert_y
+        options.bNormalInvertZ = self.normal_invert_z
+        options.bSphereMap = self.sphere_map
+        return options
+
+
+class MipmapInfo(NamedTuple):
+    width: int
+    height: int
+    depth: int
+    # the size of a single slice of one frame and face, as returned by image_get_data
+    slice_size: int
+
+
+def _mipmap_info(width: int, height: int, depth: int, mipmap_level: int, img_format: VTFImageFormat) -> MipmapInfo:
+    width, height, depth = VTFLib.compute_mipmap_dimensions(width, height, depth, mipmap_level)
+    return MipmapInfo(width, height, depth, _vl_image_compute_image_size(width, height, 1, 1, img_format))
+
+
+class ImageInfo(NamedTuple):
+    width: int
+    height: int
+    depth: int
+    format: VTFImageFormat
+    flags: int
+    frame_count: int
+    face_count: int
+    mipmap_count: int
+    start_frame: int
+    has_thumbnail: bool
+    thumbnail_width: int
+    thumbnail_height: int
+    thumbnail_format: VTFImageFormat
+    thumbnail_size: int
+    # None if there's no image
+    format_info: Optional[SVTFImageFormatInfo]
+    # by mipmap level, from the largest to the smallest
+    mipmaps: Tuple[MipmapInfo, ...]
+
+    def mipmap(self, level: int) -> MipmapInfo:
+        # levels past the smallest are computed like VTFLib does, which then fails to find their data
+        if 0 <= level < len(self.mipmaps):
+            return self.mipmaps[level]
+        return _mipmap_info(self.width, self.height, self.depth, level, self.format)
+
+
 class VTFLib():
     def __init__(self) -> None:
-        self._image_handle = c_uint()
-        _vl_initialize()
-        if not _vl_create_image(byref(self._image_handle)):
-            raise VTFException
-        if not _vl_bind_image(self._image_handle):
-            raise VTFException
+        self._image = VTFImage()
+        # the views handed out and weak references to the ctypes arrays they were created from
+        self._views: List[memoryview] = []
+        self._arrays: List[Any] = []
+        # read from VTFLib when first needed after the image was created, loaded or its properties changed
+        self._info: Optional[ImageInfo] = None
+
+    @property
+    def image(self) -> VTFImage:
+        return self._image
 
     def close(self) -> None:
-        _vl_delete_image(self._image_handle)
-        _vl_shutdown()
+        # if the image data is still used, the image is freed once the last object using it is gone
+        self._info = None
+        self._image.delete(deferred=self._release_views())
 
     def __enter__(self) -> 'VTFLib':
         return self
@@ -581,6 +1513,54 @@ class VTFLib():
     def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
         self.close()
 
+    # views returned by image_get_data_view point into memory owned by VTFLib, they are released whenever
+    # that memory may be freed or reallocated. Objects created from them before, e.g. numpy arrays or slices,
+    # don't keep a view exported, but they share the buffer of its ctypes array, which references the image.
+    # If any of these is still alive, the image is left to them and replaced instead of being freed.
+
+    def _view(self, data_pointer: Any, size: int, writable: bool) -> memoryview:
+        if not data_pointer:
+            raise VTFException
+        data = cast(data_pointer, POINTER(c_ubyte * size)).contents
+        data._image = self._image  # type: ignore
+        view = memoryview(data).cast('B')
+        if not writable:
+            view = view.toreadonly()
+        # forget the views released by their users and the arrays that are gone, so repeatedly using
+        # temporary views in with blocks doesn't grow these lists
+        self._views = [other for other in self._views if not _is_released(other)]
+        self._arrays = [array for array in self._arrays if array() is not None]
+        self._views.append(view)
+        self._arrays.append(weakref.ref(data))
+        return view
+
+    def _release_views(self) -> bool:
+        # True if the memory of the views is still used
+        for view in self._views:
+            try:
+                view.release()
+            except BufferError:
+                pass
+        self._views = []
+        self._arrays = [array for array in self._arrays if array() is not None]
+        return bool(self._arrays)
+
+    def _replace_image_memory(self) -> None:
+        # before VTFLib frees all memory of the bound image, e.g. to create or load another one
+        self._info = None
+        if self._release_views():
+            self._image.delete(deferred=True)
+            self._image = VTFImage()
+            self._arrays = []
+            if not _vl_bind_image(self._image._handle):
+                raise VTFException
+
+    def _check_views_released(self) -> None:
+        # before VTFLib reallocates a part of the image memory
+        if self._release_views():
+            raise BufferError("image data is still used by objects created from its views, "
+                              "delete them before the image is changed")
+
     @staticmethod
     def get_version() -> int:
         return _vl_get_version()
@@ -589,31 +1569,142 @@ class VTFLib():
     def get_version_str() -> str:
         return fsdecode(_vl_get_version_string())
 
+    @_bound
     def create_image(self, width: int, height: int, frames: int = 1, faces: int = 1, slices: int = 1,
                      img_format: VTFImageFormat = VTFImageFormat.IMAGE_FORMAT_RGBA8888, thumbnail: bool = True,
                      mipmaps: bool = True, null_data: bool = False) -> None:
+        self._replace_image_memory()
         if not _vl_image_create(width, height, frames, faces, slices, img_format, thumbnail, mipmaps, null_data):
             raise VTFException
 
+    @_bound
+    def create_from_rgba8888(self, width: int, height: int, images: Sequence[_Buffer],
+                             options: Optional[CreateOptions] = None, cubemap: bool = False,
+                             volume: bool = False) -> None:
+        # creates the image from one or more RGBA8888 buffers in a single VTFLib call, which also does the
+        # resizing, normal map and gamma conversion, mipmap and thumbnail generation and compression
+        # requested by the options. The images are the frames, or the faces of a cubemap or the slices
+        # of a volume texture, VTFLib doesn't support combining these.
+        if cubemap and volume:
+            raise ValueError("an image can't be both a cubemap and a volume texture")
+        if not images:
+            raise ValueError("no images given")
+        options = options or CreateOptions()
+        structure = options._structure()
+        # VTFLib would reorder the channels of the formats of _CHANNEL_ORDERS itself, the image is created in
+        # RGBA8888 or RGB888 and reordered afterwards
+        channel_order = _CHANNEL_ORDERS.get(options.img_format)
+        if channel_order is not None:
+            structure.ImageFormat = VTFImageFormat.IMAGE_FORMAT_RGBA8888 if len(channel_order) == 4 \
+                else VTFImageFormat.IMAGE_FORMAT_RGB888
+        count = len(images)
+        self._replace_image_memory()
+        # VTFLib applies gamma correction and normal map conversion in place to the source images
+        copy_images = options.gamma_correction is not None or options.normal_map
+        copies: List[Any] = []
+        with ExitStack() as stack:
+            pointers = (c_void_p * count)()
+            for i, image in enumerate(images):
+                pointer, size = stack.enter_context(_buffer_pointer(image))
+                _check_buffer_size(size, width * height * 4)
+                if copy_images:
+                    copies.append(create_string_buffer(width * height * 4))
+                    memmove(copies[-1], pointer, width * height * 4)
+                    pointer = copies[-1]
+                pointers[i] = _address(pointer)
+            if count == 1 and not cubemap:
+                result = _vl_image_create_single(width, height, pointers[0], byref(structure))
+            else:
+                result = _vl_image_create_multiple(width, height, 1 if cubemap or volume else count,
+                                                   count if cubemap else 1, count if volume else 1,
+                                                   pointers, byref(structure))
+        if not result:
+            raise _explain_missing_nvdxt(VTFException())
+        if structure.ImageFormat != options.img_format:
+            self._reorder_image_channels(options.img_format)
+
+    def _reorder_image_channels(self, img_format: VTFImageFormat) -> None:
+        # changes the format of the bound image to another one of _CHANNEL_ORDERS with as many channels,
+        # VTFLib can't change the format of an image, so it is saved, patched and loaded again
+        from .header import pack_header, parse_header
+        data = bytearray(self.save_image_bytes())
+        header = parse_header(data)
+        offset = header.image_offset or 0
+        source_format = header.format
+        with memoryview(data) as view, view[offset:offset + header.image_size] as image:
+            _reorder_channels(bytes(image), image, len(image) // len(_CHANNEL_ORDERS[source_format]),
+                              source_format, img_format)
+        data[:header.header_size] = pack_header(header._replace(format=img_format))
+        self.load_image_bytes(data)
+
+    @_bound
     def destroy_image(self) -> None:
+        self._replace_image_memory()
         _vl_image_destroy()
 
+    @_bound
     def is_image_loaded(self) -> bool:
         return _vl_image_is_loaded()
 
+    def image_info(self) -> ImageInfo:
+        # The properties and mipmap layout of the image, read from VTFLib once and kept until the image is created,
+        # loaded or destroyed, or its properties are changed through this instance. Changes made by calling
+        # the native functions directly on the bound image aren't noticed.
+        info = self._info
+        if info is None:
+            with self._image.bound():
+                info = self._read_info()
+                if _vl_image_is_loaded():
+                    self._info = info
+        return info
+
+    def _read_info(self) -> ImageInfo:
+        width, height, depth = _vl_image_get_width(), _vl_image_get_height(), _vl_image_get_depth()
+        img_format = VTFImageFormat(_vl_image_get_format())
+        has_thumbnail = bool(_vl_image_get_has_thumbnail())
+        thumbnail_width, thumbnail_height = _vl_image_get_thumbnail_width(), _vl_image_get_thumbnail_height()
+        thumbnail_format = VTFImageFormat(_vl_image_get_thumbnail_format())
+        return ImageInfo(
+            width, height, depth, img_format, _vl_image_get_flags(), _vl_image_get_frame_count(),
+            _vl_image_get_face_count(), _vl_image_get_mipmap_count(), _vl_image_get_start_frame(), has_thumbnail,
+            thumbnail_width, thumbnail_height, thumbnail_format,
+            _vl_image_compute_image_size(thumbnail_width, thumbnail_height, 1, 1, thumbnail_format)
+            if has_thumbnail else 0,
+            _format_info(img_format) if img_format != VTFImageFormat.IMAGE_FORMAT_NONE else None,
+            tuple(_mipmap_info(width, height, depth, level, img_format)
+                  for level in range(_vl_image_get_mipmap_count())),
+        )
+
+    @_bound
     def load_image_file(self, path: str, header_only: bool = False) -> None:
+        self._replace_image_memory()
         if not _vl_image_load(fsencode(path), header_only):
             raise VTFException
 
-    def load_image_bytes(self, data: bytes, header_only: bool = False) -> None:
-        buffer = create_string_buffer(data)
-        if not _vl_image_load_lump(cast(buffer, c_void_p), len(buffer), header_only):
+    @_bound
+    def load_image_bytes(self, data: _Buffer, header_only: bool = False) -> None:
+        self._replace_image_memory()
+        with _buffer_pointer(data) as (data_pointer, size):
+            if not _vl_image_load_lump(data_pointer, size, header_only):
+                raise VTFException
+
+    @_bound
+    def load_image_stream(self, file: BinaryIO, header_only: bool = False, size: Optional[int] = None) -> None:
+        # reads directly from a file object into the image, size is required if the file isn't seekable
+        self._replace_image_memory()
+        with _stream(file, size) as stream:
+            result = _vl_image_load_proc(id(stream), header_only)
+        if stream.error is not None:
+            raise stream.error
+        if not result:
             raise VTFException
 
+    @_bound
     def save_image_file(self, path: str) -> None:
         if not _vl_image_save(fsencode(path)):
             raise VTFException
 
+    @_bound
     def save_image_bytes(self) -> bytes:
         size = _vl_image_get_size()
         buffer = create_string_buffer(size)
@@ -621,60 +1712,82 @@ class VTFLib():
             raise VTFException
         return buffer.raw
 
+    @_bound
+    def save_image_stream(self, file: BinaryIO) -> None:
+        with _stream(file) as stream:
+            result = _vl_image_save_proc(id(stream))
+        if stream.error is not None:
+            raise stream.error
+        if not result:
+            raise VTFException
+
+    @_bound
     def image_has_image(self) -> bool:
         return bool(_vl_image_get_has_image())
 
+    @_bound
     def image_major_version(self) -> int:
         return _vl_image_get_major_version()
 
+    @_bound
     def image_minor_version(self) -> int:
         return _vl_image_get_minor_version()
 
+    @_bound
     def image_size(self) -> int:
         return _vl_image_get_size()
 
     def image_width(self) -> int:
-        return _vl_image_get_width()
+        return self.image_info().width
 
     def image_height(self) -> int:
-        return _vl_image_get_height()
+        return self.image_info().height
 
     def image_depth(self) -> int:
-        return _vl_image_get_depth()
+        return self.image_info().depth
 
     def image_frame_count(self) -> int:
-        return _vl_image_get_frame_count()
+        return self.image_info().frame_count
 
     def image_face_count(self) -> int:
-        return _vl_image_get_face_count()
+        return self.image_info().face_count
 
     def image_mipmap_count(self) -> int:
-        return _vl_image_get_mipmap_count()
+        return self.image_info().mipmap_count
 
     def image_start_frame(self) -> int:
-        return _vl_image_get_start_frame()
+        return self.image_info().start_frame
 
+    @_bound
     def image_set_start_frame(self, frame: int) -> None:
+        self._info = None
         _vl_image_set_start_frame(frame)
 
     def image_flags(self) -> int:
-        return _vl_image_get_flags()
+        return self.image_info().flags
 
+    @_bound
     def image_set_flags(self, flags: int) -> None:
+        self._info = None
         _vl_image_set_flags(flags)
 
     def image_get_flag(self, flag: VTFImageFlag) -> bool:
-        return _vl_image_get_flag(flag)
+        return bool(self.image_info().flags & flag)
 
+    @_bound
     def image_set_flag(self, flag: VTFImageFlag, value: bool) -> None:
+        self._info = None
         _vl_image_set_flag(flag, value)
 
+    @_bound
     def image_bumpmap_scale(self) -> float:
         return _vl_image_get_bumpmap_scale()
 
+    @_bound
     def image_set_bumpmap_scale(self, scale: float) -> None:
         _vl_image_set_bumpmap_scale(scale)
 
+    @_bound
     def image_reflectivity(self) -> Tuple[float, float, float]:
         x = c_float()
         y = c_float()
@@ -682,99 +1795,210 @@ class VTFLib():
         _vl_image_get_reflectivity(byref(x), byref(y), byref(z))
         return (x.value, y.value, z.value)
 
+    @_bound
     def image_set_reflectivity(self, x: float, y: float, z: float) -> None:
         _vl_image_set_reflectivity(x, y, z)
 
     def image_format(self) -> VTFImageFormat:
-        return VTFImageFormat(_vl_image_get_format())
+        return self.image_info().format
 
+    @_bound
     def image_get_data(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> bytes:
         data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
-        return string_at(data_pointer, self.compute_mipmap_size(self.image_width(), self.image_height(),
-                                                                1, mipmap_lvl, self.image_format()))
+        return string_at(data_pointer, self.image_info().mipmap(mipmap_lvl).slice_size)
+
+    @_bound
+    def image_get_data_view(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0,
+                            writable: bool = False) -> memoryview:
+        data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
+        return self._view(data_pointer, self.image_info().mipmap(mipmap_lvl).slice_size, writable)
 
-    def image_set_data(self, data: bytes, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> None:
-        data_buffer = create_string_buffer(data, len(data))
-        _vl_image_set_data(frame, face, z_slice, mipmap_lvl, data_buffer)
+    @_bound
+    def image_set_data(self, data: _Buffer, frame: int = 0, face: int = 0, z_slice: int = 0,
+                       mipmap_lvl: int = 0) -> None:
+        with _buffer_pointer(data) as (data_pointer, size):
+            _check_buffer_size(size, self.image_info().mipmap(mipmap_lvl).slice_size)
+            _vl_image_set_data(frame, face, z_slice, mipmap_lvl, data_pointer)
 
     def image_has_thumbnail(self) -> bool:
-        return _vl_image_get_has_thumbnail()
+        return self.image_info().has_thumbnail
 
     def image_thumbnail_width(self) -> int:
-        return _vl_image_get_thumbnail_width()
+        return self.image_info().thumbnail_width
 
     def image_thumbnail_height(self) -> int:
-        return _vl_image_get_thumbnail_height()
+        return self.image_info().thumbnail_height
 
     def image_thumbnail_format(self) -> VTFImageFormat:
-        return VTFImageFormat(_vl_image_get_thumbnail_format())
+        return self.image_info().thumbnail_format
 
+    @_bound
     def image_thumbnail_data(self) -> bytes:
         data_pointer = _vl_image_get_thumbnail_data()
-        return string_at(data_pointer, self.compute_image_size(self.image_thumbnail_width(),
-                                                               self.image_thumbnail_height(),
-                                                               1, 1, self.image_thumbnail_format()))
+        return string_at(data_pointer, self.image_info().thumbnail_size)
+
+    @_bound
+    def image_thumbnail_data_view(self, writable: bool = False) -> memoryview:
+        data_pointer = _vl_image_get_thumbnail_data()
+        return self._view(data_pointer, self.image_info().thumbnail_size, writable)
 
-    def image_thumbnail_set_data(self, data: bytes) -> None:
-        data_buffer = create_string_buffer(data, len(data))
-        _vl_image_set_thumbnail_data(data_buffer)
+    @_bound
+    def image_thumbnail_set_data(self, data: _Buffer) -> None:
+        with _buffer_pointer(data) as (data_pointer, size):
+            _check_buffer_size(size, self.image_info().thumbnail_size)
+            _vl_image_set_thumbnail_data(data_pointer)
 
+    @_bound
     def image_supports_resources(self) -> bool:
         return _vl_image_get_supports_resources()
 
+    @_bound
     def image_resource_count(self) -> int:
         return _vl_image_get_resource_count()
 
+    @_bound
     def image_get_resouce_type(self, index: int) -> int:
         return _vl_image_get_resource_type(index)
 
+    @_bound
     def image_get_has_resouce(self, resource_type: int) -> bool:
         return _vl_image_get_has_resource(resource_type)
 
+    @_bound
+    def image_get_resource_data(self, resource_type: int, writable: bool = False) -> Optional[memoryview]:
+        # a view of the resource data owned by VTFLib, resources without a data chunk (CRC, LOD control)
+        # are the 4 bytes stored in the resource directory, which VTFLib also reads when loading headers only
+        size = c_uint()
+        data_pointer = _vl_image_get_resource_data(resource_type, byref(size))
+        if not data_pointer or not size.value:
+            return None
+        return self._view(data_pointer, size.value, writable)
+
+    @_bound
+    def image_resources(self) -> Dict[int, Any]:
+        # all resources of the image by type, the CRC as an int, LOD control as a SVTFTextureLODControlResource
+        # and everything else as a read-only view of the raw data
+        resources: Dict[int, Any] = {}
+        for index in range(_vl_image_get_resource_count()):
+            resource_type = _vl_image_get_resource_type(index)
+            view = self.image_get_resource_data(resource_type)
+            if view is None:
+                continue
+            if resource_type == VTFResourceEntryType.VTF_RSRC_CRC:
+                resources[resource_type] = int.from_bytes(view, "little")
+            elif resource_type == VTFResourceEntryType.VTF_RSRC_TEXTURE_LOD_SETTINGS:
+                resources[resource_type] = SVTFTextureLODControlResource.from_buffer_copy(view)
+            else:
+                resources[resource_type] = view
+        return resources
+
+    @_bound
+    def image_set_resource(self, resource_type: int, data: Optional[_Buffer]) -> None:
+        # adds or replaces a resource (VTF 7.3+), None removes it. Resources without a data chunk
+        # take exactly 4 bytes, e.g. a SVTFTextureLODControlResource or a CRC packed as a little-endian uint32.
+        # VTFLib may reallocate its buffers, so views returned earlier are released.
+        self._check_views_released()
+        if data is None:
+            _vl_image_set_resource_data(resource_type, 0, None)
+            return
+        with _buffer_pointer(data) as (data_pointer, size):
+            if not _vl_image_set_resource_data(resource_type, size, data_pointer):
+                raise VTFException
+
+    @_bound
     def image_generate_mipmaps(self, face: int, frame: int,
                                mipmap_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_BOX,
                                sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE) -> None:
         if not _vl_image_generate_mipmaps(face, frame, mipmap_filter, sharpen_filter):
             raise VTFException
 
+    @_bound
     def image_generate_all_mipmaps(self, mipmap_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_BOX,
                                    sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE) -> None:
         if not _vl_image_generate_all_mipmaps(mipmap_filter, sharpen_filter):
             raise VTFException
 
+    @_bound
+    def image_generate_all_mipmaps_parallel(self,
+                                            mipmap_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_BOX,
+                                            sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE,
+                                            max_workers: Optional[int] = None) -> None:
+        # Generates the mipmaps of every frame and face on a thread pool. Each level is resized from the top level
+        # in RGBA8888 and converted into the image data in place. The workers don't use the bound image, ctypes
+        # releases the GIL while they run, but they write into its memory, so the global lock is held until all
+        # of them are done. Every frame and face is independent, so the result is the same for any number
+        # of workers. It's the same as that of image_generate_all_mipmaps, except for the 8 bit formats
+        # of _CHANNEL_ORDERS but RGBA8888, whose channels are reordered by pyvtflib and not by VTFLib.
+        from concurrent.futures import ThreadPoolExecutor
+        info = self.image_info()
+        img_format, width, height = info.format, info.width, info.height
+        if info.depth > 1:
+            raise ValueError("mipmap generation of volume textures isn't supported")
+        self._release_views()
+        jobs = [[_address(_vl_image_get_data(frame, face, 0, level)) for level in range(info.mipmap_count)]
+                for frame in range(info.frame_count) for face in range(info.face_count)]
+
+        def generate(addresses: List[int]) -> None:
+            if img_format == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
+                source: Any = (c_ubyte * (width * height * 4)).from_address(addresses[0])
+            else:
+                source = create_string_buffer(width * height * 4)
+                VTFLib.convert_to_rgba8888_into((c_ubyte * info.mipmaps[0].slice_size).from_address(addresses[0]),
+                                                source, width, height, img_format)
+            mipmap = create_string_buffer(width * height * 4)
+            for address, level in zip(addresses[1:], info.mipmaps[1:]):
+                VTFLib.resize_into(source, mipmap, width, height, level.width, level.height, mipmap_filter,
+                                   sharpen_filter)
+                VTFLib.convert_from_rgba8888_into(mipmap, (c_ubyte * level.slice_size).from_address(address),
+                                                  level.width, level.height, img_format)
+
+        if info.mipmap_count < 2:
+            return
+        with ThreadPoolExecutor(max_workers) as executor:
+            for _ in executor.map(generate, jobs):
+                pass
+
+    @_bound
     def image_generate_thumbnail(self) -> None:
+        self._info = None
         if not _vl_image_generate_thumbnail():
             raise VTFException
 
+    @_bound
     def image_generate_normal_map(self, frame: int, kernel_filter: VTFKernelFilter = VTFKernelFilter.KERNEL_FILTER_3X3,
                                   height_conv: VTFHeightConversionMethod =
                                   VTFHeightConversionMethod.HEIGHT_CONVERSION_METHOD_AVERAGE_RGB,
                                   alpha_result: VTFNormalAlphaResult = VTFNormalAlphaResult.NORMAL_ALPHA_RESULT_WHITE
                                   ) -> None:
+        self._info = None
         if not _vl_image_generate_normal_map(frame, kernel_filter, height_conv, alpha_result):
             raise VTFException
 
+    @_bound
     def image_generate_all_normal_maps(self, kernel_filter: VTFKernelFilter = VTFKernelFilter.KERNEL_FILTER_3X3,
                                        height_conv: VTFHeightConversionMethod =
                                        VTFHeightConversionMethod.HEIGHT_CONVERSION_METHOD_AVERAGE_RGB,
                                        alpha_result: VTFNormalAlphaResult =
                                        VTFNormalAlphaResult.NORMAL_ALPHA_RESULT_WHITE
                                        ) -> None:
+        self._info = None
         if not _vl_image_generate_all_normal_maps(kernel_filter, height_conv, alpha_result):
             raise VTFException
 
+    @_bound
     def image_generate_sphere_map(self) -> None:
+        self._info = None
         if not _vl_image_generate_sphere_map():
             raise VTFException
 
+    @_bound
     def image_compute_reflectivity(self) -> None:
         if not _vl_image_compute_reflectivity():
             raise VTFException
 
     @staticmethod
     def get_image_format_info(img_format: VTFImageFormat) -> SVTFImageFormatInfo:
-        info_pointer = _vl_image_get_image_format_info(img_format)
-        return info_pointer.contents
+        return _format_info(img_format)
 
     @staticmethod
     def compute_image_size(width: int, height: int, depth: int, mipmaps: int, img_format: VTFImageFormat) -> int:
@@ -799,136 +2023,596 @@ class VTFLib():
         return _vl_image_compute_mipmap_size(width, height, depth, mipmap_level, img_format)
 
     @staticmethod
-    def convert_to_rgba8888(source: bytes, width: int, height: int, source_format: VTFImageFormat) -> bytes:
-        source_buffer = create_string_buffer(source, len(source))
-        dest_buffer = create_string_buffer(
-            _vl_image_compute_image_size(width, height, 1, 1, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
-        )
-        if not _vl_image_convert_to_rgba8888(source_buffer, dest_buffer, width, height, source_format):
-            raise VTFException
+    def convert_to_rgba8888(source: _Buffer, width: int, height: int, source_format: VTFImageFormat) -> bytes:
+        dest_buffer = create_string_buffer(width * height * 4)
+        VTFLib.convert_to_rgba8888_into(source, dest_buffer, width, height, source_format)
         return dest_buffer.raw
 
     @staticmethod
-    def convert_from_rgba8888(source: bytes, width: int, height: int, dest_format: VTFImageFormat) -> bytes:
-        source_buffer = create_string_buffer(source, len(source))
+    def convert_to_rgba8888_into(source: _Buffer, dest: _Buffer, width: int, height: int,
+                                 source_format: VTFImageFormat) -> int:
+        dest_size = width * height * 4
+        dxt_backend = _dxt_backend(source_format, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
+        if dxt_backend is not None:
+            dxt_backend.decode_dxt(source, dest, width, height, source_format)
+            return dest_size
+        with _buffer_pointer(source) as (source_pointer, source_size), \
+                _buffer_pointer(dest, writable=True) as (dest_pointer, dest_buffer_size):
+            _check_buffer_size(source_size, _vl_image_compute_image_size(width, height, 1, 1, source_format))
+            _check_buffer_size(dest_buffer_size, dest_size, "destination")
+            _convert_image(_address(source_pointer), _address(dest_pointer), width, height,
+                           source_format, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
+        return dest_size
+
+    @staticmethod
+    def convert_from_rgba8888(source: _Buffer, width: int, height: int, dest_format: VTFImageFormat) -> bytes:
         dest_buffer = create_string_buffer(_vl_image_compute_image_size(width, height, 1, 1, dest_format))
-        if not _vl_image_convert_from_rgba8888(source_buffer, dest_buffer, width, height, dest_format):
-            raise VTFException
+        VTFLib.convert_from_rgba8888_into(source, dest_buffer, width, height, dest_format)
         return dest_buffer.raw
 
     @staticmethod
-    def convert(source: bytes, width: int, height: int,
+    def convert_from_rgba8888_into(source: _Buffer, dest: _Buffer, width: int, height: int,
+                                   dest_format: VTFImageFormat) -> int:
+        dest_size = _vl_image_compute_image_size(width, height, 1, 1, dest_format)
+        with _buffer_pointer(source) as (source_pointer, source_size), \
+                _buffer_pointer(dest, writable=True) as (dest_pointer, dest_buffer_size):
+            _check_buffer_size(source_size, width * height * 4)
+            _check_buffer_size(dest_buffer_size, dest_size, "destination")
+            _convert_image(_address(source_pointer), _address(dest_pointer), width, height,
+                           VTFImageFormat.IMAGE_FORMAT_RGBA8888, dest_format)
+        return dest_size
+
+    @staticmethod
+    def convert(source: _Buffer, width: int, height: int,
                 source_format: VTFImageFormat, dest_format: VTFImageFormat) -> bytes:
-        source_buffer = create_string_buffer(source, len(source))
-        dest_buffer = create_string_buffer(_vl_image_compute_image_size(width, height, 1, 1, dest_format))
-        if not _vl_image_convert(source_buffer, dest_buffer, width, height, source_format, dest_format):
-            raise VTFException
+        dest_buffer = create_string_buffer(_image_size(width, height, dest_format))
+        VTFLib.convert_into(source, dest_buffer, width, height, source_format, dest_format)
+        return dest_buffer.raw
+
+    @staticmethod
+    def convert_into(source: _Buffer, dest: _Buffer, width: int, height: int,
+                     source_format: VTFImageFormat, dest_format: VTFImageFormat) -> int:
+        dxt_backend = _dxt_backend(source_format, dest_format)
+        if dxt_backend is not None:
+            dxt_backend.decode_dxt(source, dest, width, height, source_format)
+            return width * height * 4
+        dest_size = _vl_image_compute_image_size(width, height, 1, 1, dest_format)
+        with _buffer_pointer(source) as (source_pointer, source_size), \
+                _buffer_pointer(dest, writable=True) as (dest_pointer, dest_buffer_size):
+            _check_buffer_size(source_size, _vl_image_compute_image_size(width, height, 1, 1, source_format))
+            _check_buffer_size(dest_buffer_size, dest_size, "destination")
+            _convert_image(_address(source_pointer), _address(dest_pointer), width, height,
+                           source_format, dest_format)
+        return dest_size
+
+    @staticmethod
+    def decode_dxt(source: _Buffer, width: int, height: int, source_format: VTFImageFormat,
+                   max_workers: Optional[int] = None) -> bytes:
+        dest_buffer = create_string_buffer(width * height * 4)
+        VTFLib.decode_dxt_into(source, dest_buffer, width, height, source_format, max_workers)
         return dest_buffer.raw
 
     @staticmethod
-    def convert_to_normal_map(source_rgba8888: bytes, width: int, height: int,
+    def decode_dxt_into(source: _Buffer, dest_rgba8888: _Buffer, width: int, height: int,
+                        source_format: VTFImageFormat, max_workers: Optional[int] = None) -> int:
+        # Decodes DXT1, DXT3 or DXT5 to RGBA8888 with NumPy instead of VTFLib, with identical results. It doesn't
+        # load the native library, so it also works where VTFLib can't be loaded, which conversions to RGBA8888
+        # then fall back to. Large images are decoded on up to max_workers threads.
+        _numpy()
+        from . import _vectorized
+        if source_format not in _vectorized.DXT_BLOCK_SIZES:
+            raise ValueError("{} is not a DXT format".format(VTFImageFormat(source_format).name))
+        _vectorized.decode_dxt(source, dest_rgba8888, width, height, source_format, max_workers)
+        return width * height * 4
+
+    @staticmethod
+    def convert_to_normal_map(source_rgba8888: _Buffer, width: int, height: int,
                               kernel_filter: VTFKernelFilter = VTFKernelFilter.KERNEL_FILTER_3X3,
                               height_conv: VTFHeightConversionMethod =
                               VTFHeightConversionMethod.HEIGHT_CONVERSION_METHOD_AVERAGE_RGB,
                               alpha_result: VTFNormalAlphaResult = VTFNormalAlphaResult.NORMAL_ALPHA_RESULT_WHITE,
                               min_z: int = 0, scale: float = 2., wrap: bool = False,
                               invert_x: bool = False, invert_y: bool = False) -> bytes:
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
         dest_buffer = create_string_buffer(
             _vl_image_compute_image_size(width, height, 1, 1, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
         )
-        if not _vl_image_convert_to_normal_map(source_buffer, dest_buffer, width, height, kernel_filter, height_conv,
-                                               alpha_result, min_z, scale, wrap, invert_x, invert_y):
-            raise VTFException
+        VTFLib.convert_to_normal_map_into(source_rgba8888, dest_buffer, width, height, kernel_filter, height_conv,
+                                          alpha_result, min_z, scale, wrap, invert_x, invert_y)
         return dest_buffer.raw
 
     @staticmethod
-    def resize(source_rgba8888: bytes, source_width: int, source_height: int, dest_width: int, dest_height: int,
+    def convert_to_normal_map_into(source_rgba8888: _Buffer, dest_rgba8888: _Buffer, width: int, height: int,
+                                   kernel_filter: VTFKernelFilter = VTFKernelFilter.KERNEL_FILTER_3X3,
+                                   height_conv: VTFHeightConversionMethod =
+                                   VTFHeightConversionMethod.HEIGHT_CONVERSION_METHOD_AVERAGE_RGB,
+                                   alpha_result: VTFNormalAlphaResult =
+                                   VTFNormalAlphaResult.NORMAL_ALPHA_RESULT_WHITE,
+                                   min_z: int = 0, scale: float = 2., wrap: bool = False,
+                                   invert_x: bool = False, invert_y: bool = False) -> int:
+        size = width * height * 4
+        with _buffer_pointer(source_rgba8888) as (source_pointer, source_size), \
+                _buffer_pointer(dest_rgba8888, writable=True) as (dest_pointer, dest_size):
+            _check_buffer_size(source_size, size)
+            _check_buffer_size(dest_size, size, "destination")
+            if not _vl_image_convert_to_normal_map(source_pointer, dest_pointer, width, height, kernel_filter,
+                                                   height_conv, alpha_result, min_z, scale, wrap, invert_x, invert_y):
+                raise VTFException
+        return size
+
+    @staticmethod
+    def resize(source_rgba8888: _Buffer, source_width: int, source_height: int, dest_width: int, dest_height: int,
                resize_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_TRIANGLE,
                sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE) -> bytes:
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
         dest_buffer = create_string_buffer(
             _vl_image_compute_image_size(dest_width, dest_height, 1, 1, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
         )
-        if not _vl_image_resize(source_buffer, dest_buffer, source_width, source_height, dest_width, dest_height,
-                                resize_filter, sharpen_filter):
-            raise VTFException
+        VTFLib.resize_into(source_rgba8888, dest_buffer, source_width, source_height, dest_width, dest_height,
+                           resize_filter, sharpen_filter)
         return dest_buffer.raw
 
     @staticmethod
-    def correct_image_gamma(source_rgba8888: bytes, width: int, height: int, gamma_correction: float) -> bytes:
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
-        _vl_image_correct_image_gamma(source_buffer, width, height, gamma_correction)
-        return source_buffer.raw
+    def resize_into(source_rgba8888: _Buffer, dest_rgba8888: _Buffer, source_width: int, source_height: int,
+                    dest_width: int, dest_height: int,
+                    resize_filter: VTFMipMapFilter = VTFMipMapFilter.MIPMAP_FILTER_TRIANGLE,
+                    sharpen_filter: VTFSharpenFilter = VTFSharpenFilter.SHARPEN_FILTER_NONE) -> int:
+        size = dest_width * dest_height * 4
+        with _buffer_pointer(source_rgba8888) as (source_pointer, source_size), \
+                _buffer_pointer(dest_rgba8888, writable=True) as (dest_pointer, dest_size):
+            _check_buffer_size(source_size, source_width * source_height * 4)
+            _check_buffer_size(dest_size, size, "destination")
+            if not _vl_image_resize(source_pointer, dest_pointer, source_width, source_height,
+                                    dest_width, dest_height, resize_filter, sharpen_filter):
+                raise VTFException
+        return size
 
     @staticmethod
-    def compute_image_reflectivity(source_rgba8888: bytes, width: int, height: int) -> Tuple[float, float, float]:
+    def correct_image_gamma(source_rgba8888: _Buffer, width: int, height: int, gamma_correction: float) -> bytes:
+        buffer = create_string_buffer(width * height * 4)
+        VTFLib.correct_image_gamma_into(source_rgba8888, buffer, width, height, gamma_correction)
+        return buffer.raw
+
+    @staticmethod
+    def correct_image_gamma_into(source_rgba8888: _Buffer, dest_rgba8888: _Buffer, width: int, height: int,
+                                 gamma_correction: float) -> int:
+        # pass the same buffer as source and destination to correct in place
+        with _in_place_rgba8888(source_rgba8888, dest_rgba8888, width, height) as dest_pointer:
+            _vl_image_correct_image_gamma(dest_pointer, width, height, gamma_correction)
+        return width * height * 4
+
+    @staticmethod
+    def compute_image_reflectivity(source_rgba8888: _Buffer, width: int, height: int) -> Tuple[float, float, float]:
         x = c_float()
         y = c_float()
         z = c_float()
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
-        _vl_image_compute_image_reflectivity(source_buffer, width, height, byref(x), byref(y), byref(z))
+        with _buffer_pointer(source_rgba8888) as (source_pointer, source_size):
+            _check_buffer_size(source_size, width * height * 4)
+            _vl_image_compute_image_reflectivity(source_pointer, width, height, byref(x), byref(y), byref(z))
         return (x.value, y.value, z.value)
 
     @staticmethod
-    def flip_image(source_rgba8888: bytes, width: int, height: int) -> bytes:
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
-        _vl_image_flip_image(source_buffer, width, height)
-        return source_buffer.raw
+    def flip_image(source_rgba8888: _Buffer, width: int, height: int) -> bytes:
+        buffer = create_string_buffer(width * height * 4)
+        VTFLib.flip_image_into(source_rgba8888, buffer, width, height)
+        return buffer.raw
 
     @staticmethod
-    def mirror_image(source_rgba8888: bytes, width: int, height: int) -> bytes:
-        source_buffer = create_string_buffer(source_rgba8888, len(source_rgba8888))
-        _vl_image_mirror_image(source_buffer, width, height)
-        return source_buffer.raw
+    def flip_image_into(source_rgba8888: _Buffer, dest_rgba8888: _Buffer, width: int, height: int) -> int:
+        # pass the same buffer as source and destination to flip in place
+        backend = _numpy_backend()
+        if backend is not None:
+            backend.flip_image(source_rgba8888, dest_rgba8888, width, height)
+            return width * height * 4
+        with _in_place_rgba8888(source_rgba8888, dest_rgba8888, width, height) as dest_pointer:
+            _vl_image_flip_image(dest_pointer, width, height)
+        return width * height * 4
+
+    @staticmethod
+    def mirror_image(source_rgba8888: _Buffer, width: int, height: int) -> bytes:
+        buffer = create_string_buffer(width * height * 4)
+        VTFLib.mirror_image_into(source_rgba8888, buffer, width, height)
+        return buffer.raw
+
+    @staticmethod
+    def mirror_image_into(source_rgba8888: _Buffer, dest_rgba8888: _Buffer, width: int, height: int) -> int:
+        # pass the same buffer as source and destination to mirror in place. This mirrors horizontally,
+        # vlImageMirrorImage flips vertically like vlImageFlipImage, so it isn't used.
+        backend = _numpy_backend()
+        if backend is not None:
+            backend.mirror_image(source_rgba8888, dest_rgba8888, width, height)
+            return width * height * 4
+        with _in_place_rgba8888(source_rgba8888, dest_rgba8888, width, height) as dest_pointer:
+            _mirror_rows(dest_pointer, width, height)
+        return width * height * 4
 
     # convenience additions
 
+    # the conversions below run outside the lock, they only touch the memory of this image,
+    # which stays valid as long as this instance is not used from another thread at the same time
+
     def image_as_rgba8888(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> bytes:
-        if self.image_format() == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
-            return self.image_get_data(frame, face, z_slice, mipmap_lvl)
-        data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
-        width, height, _ = self.compute_mipmap_dimensions(self.image_width(), self.image_height(), 1, mipmap_lvl)
-        dest_buffer = create_string_buffer(
-            _vl_image_compute_image_size(width, height, 1, 1, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
-        )
-        if not _vl_image_convert_to_rgba8888(cast(data_pointer, c_char_p), dest_buffer,
-                                             width, height, self.image_format()):
-            raise VTFException
+        with self._image.bound():
+            info = self.image_info()
+            img_format = info.format
+            if img_format == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
+                return self.image_get_data(frame, face, z_slice, mipmap_lvl)
+            data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
+        mipmap = info.mipmap(mipmap_lvl)
+        width, height = mipmap.width, mipmap.height
+        dest_buffer = create_string_buffer(width * height * 4)
+        _convert_image(_address(data_pointer), _address(dest_buffer), width, height,
+                       img_format, VTFImageFormat.IMAGE_FORMAT_RGBA8888)
         return dest_buffer.raw
 
-    def image_from_rgba8888(self, data: bytes, frame: int = 0, face: int = 0,
+    def image_from_rgba8888(self, data: _Buffer, frame: int = 0, face: int = 0,
                             z_slice: int = 0, mipmap_lvl: int = 0) -> None:
-        if self.image_format() == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
-            return self.image_set_data(data, frame, face, z_slice, mipmap_lvl)
-        source_buffer = create_string_buffer(data, len(data))
-        width, height, _ = self.compute_mipmap_dimensions(self.image_width(), self.image_height(), 1, mipmap_lvl)
-        dest_buffer = create_string_buffer(_vl_image_compute_image_size(width, height, 1, 1, self.image_format()))
-        if not _vl_image_convert_from_rgba8888(source_buffer, dest_buffer, width, height, self.image_format()):
+        with self._image.bound():
+            info = self.image_info()
+            img_format = info.format
+            if img_format == VTFImageFormat.IMAGE_FORMAT_RGBA8888:
+                return self.image_set_data(data, frame, face, z_slice, mipmap_lvl)
+        mipmap = info.mipmap(mipmap_lvl)
+        width, height = mipmap.width, mipmap.height
+        dest_buffer = create_string_buffer(mipmap.slice_size)
+        with _buffer_pointer(data) as (source_pointer, source_size):
+            _check_buffer_size(source_size, width * height * 4)
+            _convert_image(_address(source_pointer), _address(dest_buffer), width, height,
+                           VTFImageFormat.IMAGE_FORMAT_RGBA8888, img_format)
+        with self._image.bound():
+            _vl_image_set_data(frame, face, z_slice, mipmap_lvl, dest_buffer)
+
+    def image_from_rgba8888_strips(self, strips: Iterable[_Buffer], frame: int = 0, face: int = 0,
+                                   z_slice: int = 0, mipmap_lvl: int = 0) -> None:
+        # encodes strips of RGBA8888 rows (e.g. read from a large source image by a generator) straight into the
+        # image data, so only a few strips have to be in memory. Compressed formats are encoded in whole rows
+        # of 4x4 blocks, strips of any number of rows are regrouped accordingly.
+        with self._image.bound():
+            info = self.image_info()
+            data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
+        if not data_pointer:
             raise VTFException
-        _vl_image_set_data(frame, face, z_slice, mipmap_lvl, dest_buffer)
+        img_format = info.format
+        mipmap = info.mipmap(mipmap_lvl)
+        width, height = mipmap.width, mipmap.height
+        address = _address(data_pointer)
+        for chunk, rows in _rgba8888_chunks(strips, width, height, 4 if _is_compressed(img_format) else 1):
+            size = _vl_image_compute_image_size(width, rows, 1, 1, img_format)
+            VTFLib.convert_from_rgba8888_into(chunk, (c_ubyte * size).from_address(address), width, rows, img_format)
+            address += size
 
     def image_as(self, dest_format: VTFImageFormat, frame: int = 0, face: int = 0, z_slice: int = 0,
                  mipmap_lvl: int = 0) -> bytes:
-        if self.image_format() == dest_format:
-            return self.image_get_data(frame, face, z_slice, mipmap_lvl)
-        data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
-        width, height, _ = self.compute_mipmap_dimensions(self.image_width(), self.image_height(), 1, mipmap_lvl)
+        with self._image.bound():
+            info = self.image_info()
+            img_format = info.format
+            if img_format == dest_format:
+                return self.image_get_data(frame, face, z_slice, mipmap_lvl)
+            data_pointer = _vl_image_get_data(frame, face, z_slice, mipmap_lvl)
+        mipmap = info.mipmap(mipmap_lvl)
+        width, height = mipmap.width, mipmap.height
         dest_buffer = create_string_buffer(
             _vl_image_compute_image_size(width, height, 1, 1, dest_format)
         )
-        if not _vl_image_convert(cast(data_pointer, c_char_p), dest_buffer,
-                                 width, height, self.image_format(), dest_format):
-            raise VTFException
+        _convert_image(_address(data_pointer), _address(dest_buffer), width, height, img_format, dest_format)
         return dest_buffer.raw
 
-    def image_from(self, source_format: VTFImageFormat, data: bytes, frame: int = 0, face: int = 0,
+    def image_from(self, source_format: VTFImageFormat, data: _Buffer, frame: int = 0, face: int = 0,
                    z_slice: int = 0, mipmap_lvl: int = 0) -> None:
-        if self.image_format() == source_format:
-            return self.image_set_data(data, frame, face, z_slice, mipmap_lvl)
-        source_buffer = create_string_buffer(data, len(data))
-        width, height, _ = self.compute_mipmap_dimensions(self.image_width(), self.image_height(), 1, mipmap_lvl)
-        dest_buffer = create_string_buffer(_vl_image_compute_image_size(width, height, 1, 1, self.image_format()))
-        if not _vl_image_convert(source_buffer, dest_buffer, width, height, source_format, self.image_format()):
+        with self._image.bound():
+            info = self.image_info()
+            img_format = info.format
+            if img_format == source_format:
+                return self.image_set_data(data, frame, face, z_slice, mipmap_lvl)
+        mipmap = info.mipmap(mipmap_lvl)
+        width, height = mipmap.width, mipmap.height
+        dest_buffer = create_string_buffer(mipmap.slice_size)
+        with _buffer_pointer(data) as (source_pointer, source_size):
+            _check_buffer_size(source_size, _vl_image_compute_image_size(width, height, 1, 1, source_format))
+            _convert_image(_address(source_pointer), _address(dest_buffer), width, height, source_format, img_format)
+        with self._image.bound():
+            _vl_image_set_data(frame, face, z_slice, mipmap_lvl, dest_buffer)
+
+    # the *_all methods handle every frame/face/slice/mipmap in the order VTF files store them: from the smallest
+    # mipmap to the largest, then by frame, face and slice. VTFLib keeps the image data of a texture in one block
+    # in the same order, so this is a single copy, or a single conversion for uncompressed formats.
+
+    def _all_mipmaps(self) -> List[Tuple[int, int, int]]:
+        info = self.image_info()
+        count = info.frame_count * info.face_count
+        return [mipmap[:3] for mipmap in reversed(info.mipmaps) for _ in range(count)]
+
+    def image_all_layout(self, img_format: Optional[VTFImageFormat] = None) -> Tuple[int, List['SubresourceLayout']]:
+        # total size and the layout of every slice in img_format, offsets are relative to the start of the data
+        from .header import SubresourceLayout
+        info = self.image_info()
+        if img_format is None:
+            img_format = info.format
+        layout = []
+        offset = 0
+        for level in range(info.mipmap_count - 1, -1, -1):
+            width, height, depth, slice_size = info.mipmaps[level]
+            if img_format != info.format:
+                slice_size = _vl_image_compute_image_size(width, height, 1, 1, img_format)
+            for frame in range(info.frame_count):
+                for face in range(info.face_count):
+                    for z_slice in range(depth):
+                        layout.append(SubresourceLayout(frame, face, z_slice, level, width, height, offset,
+                                                        slice_size))
+                        offset += slice_size
+        return offset, layout
+
+    def image_as_all(self, dest_format: Optional[VTFImageFormat] = None,
+                     dest: Optional[_Buffer] = None) -> Tuple[_Buffer, List['SubresourceLayout']]:
+        # a new bytearray is returned unless a large enough buffer (e.g. a numpy array) is given as dest
+        with self._image.bound():
+            img_format = self.image_format()
+            if dest_format is None:
+                dest_format = img_format
+            size, layout = self.image_all_layout(dest_format)
+            mipmaps = self._all_mipmaps()
+            data_pointer = _vl_image_get_data(0, 0, 0, self.image_info().mipmap_count - 1)
+        if dest is None:
+            dest = bytearray(size)
+        with _buffer_pointer(dest, writable=True) as (dest_pointer, dest_size):
+            _check_buffer_size(dest_size, size, "destination")
+            _convert_mipmaps(_address(data_pointer), dest_pointer, mipmaps, img_format, dest_format)
+        return dest, layout
+
+    def image_from_all(self, data: _Buffer, source_format: Optional[VTFImageFormat] = None) -> None:
+        with self._image.bound():
+            img_format = self.image_format()
+            if source_format is None:
+                source_format = img_format
+            size, _ = self.image_all_layout(source_format)
+            mipmaps = self._all_mipmaps()
+            data_pointer = _vl_image_get_data(0, 0, 0, self.image_info().mipmap_count - 1)
+        with _buffer_pointer(data) as (source_pointer, source_size):
+            _check_buffer_size(source_size, size)
+            _convert_mipmaps(_address(source_pointer), _address(data_pointer), mipmaps,
+                             source_format, img_format)
+
+    # the array methods return and accept (height, width, channels) arrays, or (depth, height, width, channels)
+    # arrays of all slices of a volume texture when z_slice is None. The dtype and channel order follow
+    # the array format, which defaults to the image format, or RGBA8888 if it has no array representation.
+
+    def image_as_array(self, frame: int = 0, face: int = 0, z_slice: Optional[int] = None, mipmap_lvl: int = 0,
+                       dest_format: Optional[VTFImageFormat] = None) -> 'numpy.ndarray':
+        numpy = _numpy()
+        with self._image.bound():
+            info = self.image_info()
+            data_pointer = _vl_image_get_data(frame, face, z_slice or 0, mipmap_lvl)
+        img_format = info.format
+        volume = z_slice is None and info.depth > 1
+        width, height, depth, _ = info.mipmap(mipmap_lvl)
+        dest_format = _array_format(img_format, dest_format)
+        dtype, channels = _array_layout(dest_format)  # type: ignore
+        slices = depth if volume else 1
+        array = numpy.empty((slices, height, width, channels), dtype)
+        with _buffer_pointer(array, writable=True) as (dest_pointer, _):
+            _convert_slices(cast(data_pointer, c_void_p).value or 0, dest_pointer, width, height, slices,
+                            img_format, dest_format)
+        return array if volume else array[0]
+
+    def image_from_array(self, array: 'numpy.ndarray', frame: int = 0, face: int = 0, z_slice: Optional[int] = None,
+                         mipmap_lvl: int = 0, source_format: Optional[VTFImageFormat] = None) -> None:
+        numpy = _numpy()
+        with self._image.bound():
+            info = self.image_info()
+            data_pointer = _vl_image_get_data(frame, face, z_slice or 0, mipmap_lvl)
+        img_format = info.format
+        volume = z_slice is None and info.depth > 1
+        width, height, depth, _ = info.mipmap(mipmap_lvl)
+        source_format = _array_format(img_format, source_format)
+        dtype, channels = _array_layout(source_format)  # type: ignore
+        slices = depth if volume else 1
+        shape = (slices, height, width, channels) if volume else (height, width, channels)
+        if array.shape != shape:
+            raise ValueError("expected an array of shape {}, got {}".format(shape, array.shape))
+        array = numpy.ascontiguousarray(array.astype(dtype, casting="same_kind", copy=False))
+        with _buffer_pointer(array) as (source_pointer, _):
+            _convert_slices(source_pointer, cast(data_pointer, c_void_p).value or 0, width, height, slices,
+                            source_format, img_format)
+
+
+# VMT text is decoded losslessly, paths use the file system encoding like the image functions
+def _vmt_encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _vmt_decode(data: Optional[bytes]) -> str:
+    return (data or b"").decode("utf-8", "surrogateescape")
+
+
+class VMTLib():
+    # Bindings of the VTFLib material functions. VTFLib navigates materials with a cursor: the first node is
+    # the root group, the next node of a group is its first child and every group is followed by a group
+    # end node. Values are added to the group under the cursor.
+    # The VTFLib parser aborts the process on malformed files and on some valid ones (e.g. an unquoted value
+    # that isn't followed by a line break, or a platform condition like [$X360]), parse untrusted materials
+    # with pyvtflib.vmt and load them with material_from_tree.
+
+    def __init__(self) -> None:
+        self._material = VMTMaterial()
+
+    @property
+    def material(self) -> VMTMaterial:
+        return self._material
+
+    def close(self) -> None:
+        self._material.delete()
+
+    def __enter__(self) -> 'VMTLib':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    @_material_bound
+    def create_material(self, root: str) -> None:
+        if not _vl_material_create(_vmt_encode(root)):
+            raise VTFException
+
+    @_material_bound
+    def destroy_material(self) -> None:
+        _vl_material_destroy()
+
+    @_material_bound
+    def is_material_loaded(self) -> bool:
+        return _vl_material_is_loaded()
+
+    @_material_bound
+    def load_material_file(self, path: str) -> None:
+        if not _vl_material_load(fsencode(path)):
+            raise VTFException
+
+    @_material_bound
+    def load_material_bytes(self, data: _Buffer) -> None:
+        with _buffer_pointer(data) as (data_pointer, size):
+            if not _vl_material_load_lump(data_pointer, size):
+                raise VTFException
+
+    @_material_bound
+    def load_material_stream(self, file: BinaryIO, size: Optional[int] = None) -> None:
+        with _stream(file, size) as stream:
+            result = _vl_material_load_proc(id(stream))
+        if stream.error is not None:
+            raise stream.error
+        if not result:
+            raise VTFException
+
+    @_material_bound
+    def save_material_file(self, path: str) -> None:
+        if not _vl_material_save(fsencode(path)):
+            raise VTFException
+
+    def save_material_bytes(self) -> bytes:
+        # VTFLib can't report the saved size of a material, so save through a stream
+        file = BytesIO()
+        self.save_material_stream(file)
+        return file.getvalue()
+
+    @_material_bound
+    def save_material_stream(self, file: BinaryIO) -> None:
+        with _stream(file) as stream:
+            result = _vl_material_save_proc(id(stream))
+        if stream.error is not None:
+            raise stream.error
+        if not result:
+            raise VTFException
+
+    @_material_bound
+    def material_first_node(self) -> bool:
+        return _vl_material_get_first_node()
+
+    @_material_bound
+    def material_last_node(self) -> bool:
+        return _vl_material_get_last_node()
+
+    @_material_bound
+    def material_next_node(self) -> bool:
+        return _vl_material_get_next_node()
+
+    @_material_bound
+    def material_previous_node(self) -> bool:
+        return _vl_material_get_previous_node()
+
+    @_material_bound
+    def material_parent_node(self) -> bool:
+        return _vl_material_get_parent_node()
+
+    @_material_bound
+    def material_child_node(self, name: str) -> bool:
+        return _vl_material_get_child_node(_vmt_encode(name))
+
+    @_material_bound
+    def material_node_name(self) -> str:
+        return _vmt_decode(_vl_material_get_node_name())
+
+    @_material_bound
+    def material_set_node_name(self, name: str) -> None:
+        _vl_material_set_node_name(_vmt_encode(name))
+
+    @_material_bound
+    def material_node_type(self) -> VMTNodeType:
+        return VMTNodeType(_vl_material_get_node_type())
+
+    @_material_bound
+    def material_node_string(self) -> str:
+        return _vmt_decode(_vl_material_get_node_string())
+
+    @_material_bound
+    def material_set_node_string(self, value: str) -> None:
+        _vl_material_set_node_string(_vmt_encode(value))
+
+    @_material_bound
+    def material_node_integer(self) -> int:
+        return _vl_material_get_node_integer()
+
+    @_material_bound
+    def material_set_node_integer(self, value: int) -> None:
+        _vl_material_set_node_integer(value)
+
+    @_material_bound
+    def material_node_single(self) -> float:
+        return _vl_material_get_node_single()
+
+    @_material_bound
+    def material_set_node_single(self, value: float) -> None:
+        _vl_material_set_node_single(value)
+
+    @_material_bound
+    def material_add_node_group(self, name: str) -> None:
+        if not _vl_material_add_node_group(_vmt_encode(name)):
+            raise VTFException
+
+    @_material_bound
+    def material_add_node_string(self, name: str, value: str) -> None:
+        if not _vl_material_add_node_string(_vmt_encode(name), _vmt_encode(value)):
+            raise VTFException
+
+    @_material_bound
+    def material_add_node_integer(self, name: str, value: int) -> None:
+        if not _vl_material_add_node_integer(_vmt_encode(name), value):
+            raise VTFException
+
+    @_material_bound
+    def material_add_node_single(self, name: str, value: float) -> None:
+        if not _vl_material_add_node_single(_vmt_encode(name), value):
+            raise VTFException
+
+    @_material_bound
+    def material_as_tree(self) -> 'VMTNode':
+        # walks the whole material, the cursor is left on the group end of the root
+        from .vmt import VMTNode
+        if not _vl_material_get_first_node():
             raise VTFException
-        _vl_image_set_data(frame, face, z_slice, mipmap_lvl, dest_buffer)
+        root = VMTNode(_vmt_decode(_vl_material_get_node_name()), [])
+        groups = [root]
+        returning = False
+        while _vl_material_get_next_node():
+            node_type = _vl_material_get_node_type()
+            if returning:
+                # after a group end VTFLib moves back to the group itself before its next sibling
+                returning = False
+                if node_type == VMTNodeType.NODE_TYPE_GROUP:
+                    continue
+            name = _vmt_decode(_vl_material_get_node_name())
+            if node_type == VMTNodeType.NODE_TYPE_GROUP:
+                group = VMTNode(name, [])
+                groups[-1].value.append(group)  # type: ignore
+                groups.append(group)
+            elif node_type == VMTNodeType.NODE_TYPE_GROUP_END:
+                groups.pop()
+                returning = True
+            elif node_type == VMTNodeType.NODE_TYPE_STRING:
+                groups[-1].value.append(VMTNode(name, _vmt_decode(_vl_material_get_node_string())))  # type: ignore
+            elif node_type == VMTNodeType.NODE_TYPE_INTEGER:
+                groups[-1].value.append(VMTNode(name, _vl_material_get_node_integer()))  # type: ignore
+            elif node_type == VMTNodeType.NODE_TYPE_SINGLE:
+                groups[-1].value.append(VMTNode(name, _vl_material_get_node_single()))  # type: ignore
+        return root
+
+    def material_from_tree(self, root: 'VMTNode') -> None:
+        # VTFLib can only add values to the group under the cursor, which it can't move into a new group
+        # reliably, so the tree is loaded from its text form
+        from .vmt import format_vmt
+        self.load_material_bytes(_vmt_encode(format_vmt(root)))
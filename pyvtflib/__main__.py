@@ -0,0 +1,56 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from . import VTFImageFormat
+from .batch import BatchStats, convert_directory
+
+
+def _parse_format(name: str) -> Optional[VTFImageFormat]:
+    if name.lower() == "png":
+        return None
+    try:
+        return VTFImageFormat[name.upper() if name.upper().startswith("IMAGE_FORMAT_")
+                              else "IMAGE_FORMAT_" + name.upper()]
+    except KeyError:
+        raise argparse.ArgumentTypeError("unknown format: {}".format(name))
+
+
+def _convert(args: argparse.Namespace) -> int:
+    stats = BatchStats()
+    for result in convert_directory(args.source_dir, args.dest_dir, args.format, args.frame, args.face,
+                                    args.slice, args.mipmap, args.workers, args.chunk_size, stats=stats):
+        if result.error is not None:
+            print("{}: {}".format(result.source, result.error), file=sys.stderr)
+        elif args.verbose:
+            print(result.dest)
+    print("{} files ({} failed) in {:.2f} s, {:.1f} files/s, {:.1f} MB/s".format(
+        stats.files, stats.failed, stats.elapsed, stats.files_per_second, stats.mb_per_second), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pyvtflib")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    convert_parser = subparsers.add_parser("convert", help="convert a directory of VTF files")
+    convert_parser.add_argument("source_dir")
+    convert_parser.add_argument("dest_dir")
+    convert_parser.add_argument("--format", type=_parse_format, default=None,
+                                help="png (default) or a VTFImageFormat name to write raw image data")
+    convert_parser.add_argument("--frame", type=int, default=0)
+    convert_parser.add_argument("--face", type=int, default=0)
+    convert_parser.add_argument("--slice", type=int, default=0)
+    convert_parser.add_argument("--mipmap", type=int, default=0)
+    convert_parser.add_argument("--workers", type=int, default=None)
+    convert_parser.add_argument("--chunk-size", type=int, default=16)
+    convert_parser.add_argument("-v", "--verbose", action="store_true")
+    convert_parser.set_defaults(func=_convert)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
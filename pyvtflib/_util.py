@@ -0,0 +1,34 @@
+# helpers shared by the modules that spread work over processes
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+import os
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+_T = TypeVar('_T')
+
+
+def imap_chunks(function: Callable[..., List[_T]], items: Iterable[Any], args: Tuple = (),
+                max_workers: Optional[int] = None, chunk_size: int = 16, max_in_flight: Optional[int] = None,
+                initializer: Optional[Callable[[], None]] = None) -> Iterator[_T]:
+    # calls function(chunk, *args) in worker processes for chunks of items and yields the items of the
+    # returned lists in completion order, only max_in_flight chunks are queued at a time
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2 * max_workers
+    item_iter = iter(items)
+    with ProcessPoolExecutor(max_workers, initializer=initializer) as executor:
+        in_flight: Set[Future] = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                chunk = list(islice(item_iter, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                in_flight.add(executor.submit(function, chunk, *args))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
@@ -0,0 +1,164 @@
+# NumPy implementations of the VTFLib helpers that only move pixels around, used automatically when numpy
+# is installed. VTFLib flips column by column and converts every pixel through RGBA8888, these are copies
+# through strided views. Gamma correction and reflectivity stay in VTFLib, its per byte loops are already
+# faster than a NumPy lookup table or histogram.
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Any, Dict, Optional
+
+import numpy
+
+from . import VTFImageFormat, _CHANNEL_ORDERS, _check_buffer_size
+
+
+def _pixels(buffer: Any, width: int, height: int, channels: int, name: str = "source",
+            writable: bool = False) -> numpy.ndarray:
+    view = memoryview(buffer)
+    if writable and view.readonly:
+        raise BufferError("{} buffer is not writable".format(name))
+    size = width * height * channels
+    _check_buffer_size(view.nbytes, size, name)
+    return numpy.frombuffer(view, numpy.uint8, size).reshape(height, width, channels)
+
+
+def flip_image(source: Any, dest: Any, width: int, height: int) -> None:
+    # numpy buffers the copy if source and dest overlap, so this also works in place
+    dest_pixels = _pixels(dest, width, height, 4, "destination", True)
+    dest_pixels[...] = _pixels(source, width, height, 4)[::-1]
+
+
+def mirror_image(source: Any, dest: Any, width: int, height: int) -> None:
+    dest_pixels = _pixels(dest, width, height, 4, "destination", True)
+    dest_pixels[...] = _pixels(source, width, height, 4)[:, ::-1]
+
+
+def swizzle(source: Any, dest: Any, width: int, height: int,
+            source_format: VTFImageFormat, dest_format: VTFImageFormat) -> None:
+    # converts between formats of _CHANNEL_ORDERS, alpha is 255 if the source has none
+    source_order = _CHANNEL_ORDERS[source_format]
+    dest_order = _CHANNEL_ORDERS[dest_format]
+    source_pixels = _pixels(source, width, height, len(source_order))
+    dest_pixels = _pixels(dest, width, height, len(dest_order), "destination", True)
+    if source_format == dest_format:
+        dest_pixels[...] = source_pixels
+        return
+    for dest_channel, channel in enumerate(dest_order):
+        if channel in source_order:
+            dest_pixels[..., dest_channel] = source_pixels[..., source_order.index(channel)]
+        else:
+            dest_pixels[..., dest_channel] = 255
+
+
+# bytes per 4x4 block of the DXT formats decoded here
+DXT_BLOCK_SIZES: Dict[int, int] = {
+    VTFImageFormat.IMAGE_FORMAT_DXT1: 8,
+    VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA: 8,
+    VTFImageFormat.IMAGE_FORMAT_DXT3: 16,
+    VTFImageFormat.IMAGE_FORMAT_DXT5: 16,
+}
+
+# blocks decoded at once, bounds the size of the temporary arrays
+_DXT_CHUNK_BLOCKS = 16384
+
+_INDEX_SHIFTS = numpy.arange(0, 8, 2, dtype=numpy.uint8)
+_NIBBLE_SHIFTS = numpy.array((0, 4), dtype=numpy.uint8)
+_ALPHA_INDEX_SHIFTS = numpy.arange(0, 48, 3, dtype=numpy.uint64)
+# the interpolated DXT5 alphas 2 to 7, blocks with alpha0 <= alpha1 only interpolate 2 to 5 and use 0 and 255
+_EIGHT_ALPHA_STEPS = numpy.arange(1, 7, dtype=numpy.uint16)
+_SIX_ALPHA_STEPS = numpy.array((1, 2, 3, 4, 0, 0), dtype=numpy.uint16)
+
+
+def _rgb565(color: numpy.ndarray) -> numpy.ndarray:
+    # like VTFLib, the low bits are left empty instead of repeating the high bits
+    return numpy.stack(((color >> 11) << 3, ((color >> 5) & 0x3f) << 2, (color & 0x1f) << 3), -1)
+
+
+def _dxt_colors(blocks: numpy.ndarray, one_bit_alpha: bool) -> numpy.ndarray:
+    # the RGBA colors of the 16 pixels of each block from the 8 byte color part
+    color0 = blocks[:, 0] | blocks[:, 1].astype(numpy.uint16) << 8
+    color1 = blocks[:, 2] | blocks[:, 3].astype(numpy.uint16) << 8
+    rgb0 = _rgb565(color0)
+    rgb1 = _rgb565(color1)
+    palette = numpy.empty((len(blocks), 4, 4), numpy.uint8)
+    palette[:, 0, :3] = rgb0
+    palette[:, 1, :3] = rgb1
+    palette[:, 3, :3] = (rgb0 + 2 * rgb1 + 1) // 3
+    palette[..., 3] = 255
+    if one_bit_alpha:
+        # DXT1 blocks with color0 <= color1 have 3 colors and transparent black, which VTFLib doesn't make black
+        four_colors = color0 > color1
+        palette[:, 2, :3] = numpy.where(four_colors[:, None], (2 * rgb0 + rgb1 + 1) // 3, (rgb0 + rgb1) // 2)
+        palette[:, 3, 3] = numpy.where(four_colors, 255, 0)
+    else:
+        palette[:, 2, :3] = (2 * rgb0 + rgb1 + 1) // 3
+    indices = ((blocks[:, 4:8, None] >> _INDEX_SHIFTS) & 3).reshape(-1, 16)
+    indices = indices + numpy.arange(0, len(blocks) * 4, 4, dtype=numpy.intp)[:, None]
+    # gathering whole pixels as 32 bit values is a lot faster than gathering rows of 4 bytes
+    return palette.view(numpy.uint32).reshape(-1).take(indices).view(numpy.uint8).reshape(-1, 16, 4)
+
+
+def _dxt3_alpha(blocks: numpy.ndarray) -> numpy.ndarray:
+    alpha = (blocks[:, :8, None] >> _NIBBLE_SHIFTS) & 0xf
+    return alpha.reshape(-1, 16) * 17
+
+
+def _dxt5_alpha(blocks: numpy.ndarray) -> numpy.ndarray:
+    alpha0 = blocks[:, :1].astype(numpy.uint16)
+    alpha1 = blocks[:, 1:2].astype(numpy.uint16)
+    palette = numpy.empty((len(blocks), 8), numpy.uint8)
+    palette[:, :2] = blocks[:, :2]
+    eight_alphas = ((7 - _EIGHT_ALPHA_STEPS) * alpha0 + _EIGHT_ALPHA_STEPS * alpha1 + 3) // 7
+    six_alphas = ((5 - _SIX_ALPHA_STEPS) * alpha0 + _SIX_ALPHA_STEPS * alpha1 + 2) // 5
+    six_alphas[:, 4] = 0
+    six_alphas[:, 5] = 255
+    palette[:, 2:] = numpy.where(alpha0 > alpha1, eight_alphas, six_alphas)
+    bits = numpy.ascontiguousarray(blocks[:, :8]).view("<u8") >> numpy.uint64(16)
+    indices = ((bits >> _ALPHA_INDEX_SHIFTS) & numpy.uint64(7)).astype(numpy.intp)
+    indices += numpy.arange(0, len(blocks) * 8, 8, dtype=numpy.intp)[:, None]
+    return palette.reshape(-1).take(indices)
+
+
+def _decode_dxt_rows(source: numpy.ndarray, dest: numpy.ndarray, first_row: int, last_row: int,
+                     source_format: VTFImageFormat) -> None:
+    # decodes the block rows first_row to last_row into the corresponding pixel rows of dest
+    blocks_x = source.shape[1]
+    blocks = source[first_row:last_row].reshape(-1, source.shape[2])
+    if source_format == VTFImageFormat.IMAGE_FORMAT_DXT3:
+        pixels = _dxt_colors(blocks[:, 8:], False)
+        pixels[..., 3] = _dxt3_alpha(blocks)
+    elif source_format == VTFImageFormat.IMAGE_FORMAT_DXT5:
+        pixels = _dxt_colors(blocks[:, 8:], False)
+        pixels[..., 3] = _dxt5_alpha(blocks)
+    else:
+        pixels = _dxt_colors(blocks, True)
+    pixels = pixels.reshape(last_row - first_row, blocks_x, 4, 4, 4).transpose(0, 2, 1, 3, 4)
+    pixels = pixels.reshape((last_row - first_row) * 4, blocks_x * 4, 4)
+    rows = dest[first_row * 4:last_row * 4]
+    rows[...] = pixels[:len(rows), :dest.shape[1]]
+
+
+def decode_dxt(source: Any, dest: Any, width: int, height: int, source_format: VTFImageFormat,
+               max_workers: Optional[int] = None) -> None:
+    # Decodes DXT1, DXT3 or DXT5 to RGBA8888 with the same results as VTFLib, without using it. Large images
+    # are split into rows of blocks decoded on max_workers threads (the number of CPUs by default), numpy
+    # releases the GIL while working on the arrays.
+    block_size = DXT_BLOCK_SIZES[source_format]
+    blocks_x = (width + 3) // 4
+    blocks_y = (height + 3) // 4
+    view = memoryview(source)
+    size = blocks_x * blocks_y * block_size
+    _check_buffer_size(view.nbytes, size)
+    blocks = numpy.frombuffer(view, numpy.uint8, size).reshape(blocks_y, blocks_x, block_size)
+    dest_pixels = _pixels(dest, width, height, 4, "destination", True)
+    chunk_rows = max(_DXT_CHUNK_BLOCKS // blocks_x, 1)
+    chunks = [(row, min(row + chunk_rows, blocks_y)) for row in range(0, blocks_y, chunk_rows)]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(chunks) == 1:
+        for first_row, last_row in chunks:
+            _decode_dxt_rows(blocks, dest_pixels, first_row, last_row, source_format)
+        return
+    with ThreadPoolExecutor(min(max_workers, len(chunks))) as executor:
+        # list() raises the exceptions of the workers
+        list(executor.map(lambda chunk: _decode_dxt_rows(blocks, dest_pixels, chunk[0], chunk[1], source_format),
+                          chunks))
@@ -0,0 +1,157 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Optional, Sequence, TypeVar, Union
+
+from . import CreateOptions, VTFImageFormat, VTFLib
+from .cache import convert_vtf_data
+
+# asyncio front-end running the VTFLib calls in a thread pool so they don't block the event loop. Calls that
+# use the bound image serialize on the global VTFLib lock, format conversions run outside of it in parallel.
+
+_T = TypeVar('_T')
+
+
+class AsyncVTFLib():
+    # At most max_concurrency jobs run at a time, the rest wait in submission order. If max_queued jobs are
+    # already waiting, new jobs raise asyncio.QueueFull instead, so callers can shed load. Cancelling a
+    # waiting job removes it from the queue, a running job finishes in its thread but its result is discarded.
+
+    def __init__(self, max_concurrency: int = 4, max_queued: Optional[int] = None,
+                 executor: Optional[Executor] = None) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_concurrency, thread_name_prefix="pyvtflib")
+        self._running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._closed = False
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def __aenter__(self) -> 'AsyncVTFLib':
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        await self.close()
+
+    def cancel_queued(self) -> int:
+        # cancels the jobs that haven't started yet, they raise asyncio.CancelledError
+        cancelled = 0
+        while self._waiters:
+            if self._waiters.popleft().cancel():
+                cancelled += 1
+        return cancelled
+
+    async def close(self) -> None:
+        # cancels the queued jobs and waits for the running ones
+        self._closed = True
+        self.cancel_queued()
+        if self._own_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def _acquire(self) -> None:
+        if self._running < self.max_concurrency and not self.queued:
+            self._running += 1
+            return
+        if self.max_queued is not None and self.queued >= self.max_queued:
+            raise asyncio.QueueFull
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was already handed over, pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        # hands the slot of a finished job to the next waiting one
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    async def run(self, function: Callable[..., _T], *args: Any,
+                  discard: Optional[Callable[[_T], Any]] = None, **kwargs: Any) -> _T:
+        # runs function(*args, **kwargs) in the executor, discard is called with the result if the caller
+        # was cancelled while it was running, e.g. to free it
+        if self._closed:
+            raise RuntimeError("AsyncVTFLib is closed")
+        await self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            concurrent_future = self._executor.submit(partial(function, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future = asyncio.wrap_future(concurrent_future, loop=loop)
+
+        def done(_: Future) -> None:
+            # runs on the loop once the job really finished, cancelling future doesn't stop a running job
+            self._release()
+            if (discard is not None and future.cancelled() and not concurrent_future.cancelled()
+                    and concurrent_future.exception() is None):
+                discard(concurrent_future.result())
+
+        def done_threadsafe(_: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(done, concurrent_future)
+            except RuntimeError:
+                # the loop is closed
+                pass
+
+        concurrent_future.add_done_callback(done_threadsafe)
+        return await future
+
+    async def load(self, data: Any, header_only: bool = False) -> VTFLib:
+        # the returned VTFLib owns the loaded image and should be closed when no longer needed
+        return await self.run(_load, data, header_only, discard=VTFLib.close)
+
+    async def decode(self, source: Union[VTFLib, Any], mipmap_lvl: int = 0,
+                     dest_format: VTFImageFormat = VTFImageFormat.IMAGE_FORMAT_RGBA8888,
+                     frame: int = 0, face: int = 0, z_slice: int = 0) -> bytes:
+        # source is a VTFLib returned by load or the data of a VTF file, from which only the requested
+        # subresource is read and converted
+        if isinstance(source, VTFLib):
+            return await self.run(source.image_as, dest_format, frame, face, z_slice, mipmap_lvl)
+        return await self.run(convert_vtf_data, source, dest_format, frame, face, z_slice, mipmap_lvl)
+
+    async def encode(self, width: int, height: int, images: Sequence[Any], options: Optional[CreateOptions] = None,
+                     cubemap: bool = False, volume: bool = False) -> bytes:
+        # creates a VTF file from RGBA8888 images, see VTFLib.create_from_rgba8888
+        return await self.run(_encode, width, height, images, options, cubemap, volume)
+
+    async def save(self, vtf: VTFLib) -> bytes:
+        return await self.run(vtf.save_image_bytes)
+
+
+def _load(data: Any, header_only: bool) -> VTFLib:
+    vtf = VTFLib()
+    try:
+        vtf.load_image_bytes(data, header_only)
+    except BaseException:
+        vtf.close()
+        raise
+    return vtf
+
+
+def _encode(width: int, height: int, images: Sequence[Any], options: Optional[CreateOptions], cubemap: bool,
+            volume: bool) -> bytes:
+    with VTFLib() as vtf:
+        vtf.create_from_rgba8888(width, height, images, options, cubemap, volume)
+        return vtf.save_image_bytes()
@@ -0,0 +1,137 @@
+import os
+from os import path
+import struct
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import zlib
+
+from . import VTFImageFormat, VTFLib
+from ._util import imap_chunks
+
+
+class ConvertResult(NamedTuple):
+    source: str
+    dest: str
+    error: Optional[str]
+    bytes_in: int
+    bytes_out: int
+
+
+class BatchStats():
+    def __init__(self) -> None:
+        self.files = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._start = time.perf_counter()
+        self.elapsed = 0.
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes_in / 1e6 / self.elapsed if self.elapsed else 0.
+
+    def _add(self, result: ConvertResult) -> None:
+        self.files += 1
+        if result.error is not None:
+            self.failed += 1
+        self.bytes_in += result.bytes_in
+        self.bytes_out += result.bytes_out
+        self.elapsed = time.perf_counter() - self._start
+
+
+class _Options(NamedTuple):
+    dest_format: Optional[VTFImageFormat]
+    frame: int
+    face: int
+    z_slice: int
+    mipmap_lvl: int
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def write_png(file_path: str, rgba8888: bytes, width: int, height: int, compress_level: int = 6) -> int:
+    stride = width * 4
+    scanlines = b"".join(b"\x00" + rgba8888[y * stride:(y + 1) * stride] for y in range(height))
+    png = b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(scanlines, compress_level)),
+        _png_chunk(b"IEND", b""),
+    ))
+    with open(file_path, "wb") as f:
+        f.write(png)
+    return len(png)
+
+
+_worker_vtflib: Optional[VTFLib] = None
+
+
+def _init_worker() -> None:
+    global _worker_vtflib
+    _worker_vtflib = VTFLib()
+
+
+def _convert_file(vtf: VTFLib, source: str, dest: str, options: _Options) -> ConvertResult:
+    try:
+        bytes_in = path.getsize(source)
+        vtf.load_image_file(source)
+        width, height, _, _ = vtf.image_info().mipmap(options.mipmap_lvl)
+        dest_dir = path.dirname(dest)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        if options.dest_format is None:
+            data = vtf.image_as_rgba8888(options.frame, options.face, options.z_slice, options.mipmap_lvl)
+            bytes_out = write_png(dest, data, width, height)
+        else:
+            data = vtf.image_as(options.dest_format, options.frame, options.face, options.z_slice,
+                                options.mipmap_lvl)
+            with open(dest, "wb") as f:
+                f.write(data)
+            bytes_out = len(data)
+    except Exception as e:
+        return ConvertResult(source, dest, "{}: {}".format(type(e).__name__, " ".join(str(e).split())), 0, 0)
+    return ConvertResult(source, dest, None, bytes_in, bytes_out)
+
+
+def _convert_chunk(chunk: List[Tuple[str, str]], options: _Options) -> List[ConvertResult]:
+    assert _worker_vtflib is not None
+    return [_convert_file(_worker_vtflib, source, dest, options) for source, dest in chunk]
+
+
+def convert_files(jobs: Iterable[Tuple[str, str]], dest_format: Optional[VTFImageFormat] = None,
+                  frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0,
+                  max_workers: Optional[int] = None, chunk_size: int = 16, max_in_flight: Optional[int] = None,
+                  stats: Optional[BatchStats] = None) -> Iterator[ConvertResult]:
+    # jobs are (source vtf path, destination path) pairs, the destination is a PNG file if dest_format is None,
+    # otherwise the raw image data in dest_format. Results are yielded in completion order.
+    if stats is None:
+        stats = BatchStats()
+    options = _Options(dest_format, frame, face, z_slice, mipmap_lvl)
+    for result in imap_chunks(_convert_chunk, jobs, (options,), max_workers, chunk_size, max_in_flight,
+                              _init_worker):
+        stats._add(result)
+        yield result
+
+
+def find_vtf_files(source_dir: str) -> Iterator[str]:
+    for dir_path, _, file_names in os.walk(source_dir):
+        for file_name in file_names:
+            if file_name.lower().endswith(".vtf"):
+                yield path.join(dir_path, file_name)
+
+
+def convert_directory(source_dir: str, dest_dir: str, dest_format: Optional[VTFImageFormat] = None,
+                      frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0,
+                      max_workers: Optional[int] = None, chunk_size: int = 16, max_in_flight: Optional[int] = None,
+                      stats: Optional[BatchStats] = None) -> Iterator[ConvertResult]:
+    extension = ".png" if dest_format is None else ".raw"
+    jobs = ((source, path.join(dest_dir, path.splitext(path.relpath(source, source_dir))[0] + extension))
+            for source in find_vtf_files(source_dir))
+    return convert_files(jobs, dest_format, frame, face, z_slice, mipmap_lvl,
+                         max_workers, chunk_size, max_in_flight, stats)
@@ -0,0 +1,285 @@
+from collections import OrderedDict
+import hashlib
+import os
+from os import path
+import tempfile
+from threading import Lock
+import time
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from . import VTFImageFormat, VTFLib
+from .header import compute_mipmap_dimensions, compute_mipmap_size, parse_header
+from .reader import VTFReader
+
+
+class CacheKey(NamedTuple):
+    source: str
+    frame: int
+    face: int
+    z_slice: int
+    mipmap_lvl: int
+    dest_format: VTFImageFormat
+
+    @property
+    def filename(self) -> str:
+        fields = (self.source, self.frame, self.face, self.z_slice, self.mipmap_lvl, int(self.dest_format))
+        key = "\0".join(str(value) for value in fields)
+        return hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest() + ".bin"
+
+
+def file_source(file_path: str) -> str:
+    # identifies a file by its path, modification time and size, without reading it
+    stat = os.stat(file_path)
+    return "{}:{}:{}".format(path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def content_source(data: Any) -> str:
+    # identifies VTF data by a hash of its content, e.g. for data that didn't come from a file
+    return hashlib.blake2b(memoryview(data).cast("B"), digest_size=16).hexdigest()
+
+
+# temporary files older than this were left by a process that died while writing them
+_STALE_TEMP_SECONDS = 3600
+
+
+class CacheStats():
+    def __init__(self) -> None:
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_converted = 0
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.
+
+
+class ConversionCache():
+    # Caches converted image data in memory and optionally in a directory, both tiers are limited by
+    # their total size in bytes and evict the least recently used entries. Entries are written through
+    # to disk, so the disk tier survives restarts and can be shared by processes using the same directory.
+    # Each process counts the bytes it wrote or found since it last scanned the directory, once that count
+    # exceeds max_disk_bytes it rescans the directory and evicts by the real total size down to 7/8 of it,
+    # so a full cache isn't rescanned on every write. With several processes the directory can grow past
+    # max_disk_bytes by what the others wrote since their last scan.
+
+    def __init__(self, max_memory_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 4 * 1024 * 1024 * 1024) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = CacheStats()
+        self._lock = Lock()
+        self._memory: 'OrderedDict[CacheKey, bytes]' = OrderedDict()
+        self._disk: 'OrderedDict[str, int]' = OrderedDict()
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        assert self.disk_dir is not None
+        stale_before = time.time() - _STALE_TEMP_SECONDS
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".tmp") and entry.is_file():
+                try:
+                    if entry.stat().st_mtime < stale_before:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+        self._scan_disk()
+
+    def _scan_disk(self) -> None:
+        # the modification time of the entries is updated on every hit, so it gives the LRU order
+        assert self.disk_dir is not None
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".bin"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        with self._lock:
+            self._disk.clear()
+            self.stats.disk_bytes = 0
+            for _, filename, size in sorted(entries):
+                self._disk[filename] = size
+                self.stats.disk_bytes += size
+            self._evict_disk(self.max_disk_bytes - self.max_disk_bytes // 8)
+
+    def _evict_memory(self) -> None:
+        while self.stats.memory_bytes > self.max_memory_bytes:
+            _, data = self._memory.popitem(last=False)
+            self.stats.memory_bytes -= len(data)
+            self.stats.memory_evictions += 1
+
+    def _evict_disk(self, max_bytes: int) -> None:
+        assert self.disk_dir is not None
+        while self.stats.disk_bytes > max_bytes:
+            filename, size = self._disk.popitem(last=False)
+            self.stats.disk_bytes -= size
+            self.stats.disk_evictions += 1
+            try:
+                os.remove(path.join(self.disk_dir, filename))
+            except OSError:
+                pass
+
+    def _put_memory(self, key: CacheKey, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self.stats.memory_bytes += len(data)
+            self._evict_memory()
+
+    def _read_disk(self, key: CacheKey) -> Optional[bytes]:
+        if self.disk_dir is None:
+            return None
+        filename = key.filename
+        with self._lock:
+            size = self._disk.get(filename)
+            if size is not None:
+                self._disk.move_to_end(filename)
+        file_path = path.join(self.disk_dir, filename)
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+            os.utime(file_path)
+        except OSError:
+            data = None
+        with self._lock:
+            if size is not None and (data is None or len(data) != size):
+                # removed or replaced by another process
+                if self._disk.pop(filename, None) is not None:
+                    self.stats.disk_bytes -= size
+                return None
+            if size is None and data is not None and filename not in self._disk:
+                # written by another process
+                self._disk[filename] = len(data)
+                self.stats.disk_bytes += len(data)
+            rescan = self.stats.disk_bytes > self.max_disk_bytes
+        if rescan:
+            self._scan_disk()
+        return data
+
+    def _write_disk(self, key: CacheKey, data: bytes) -> None:
+        if self.disk_dir is None or len(data) > self.max_disk_bytes:
+            return
+        filename = key.filename
+        with self._lock:
+            if filename in self._disk:
+                return
+        fd, temp_path = tempfile.mkstemp(".tmp", dir=self.disk_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path.join(self.disk_dir, filename))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if filename not in self._disk:
+                self._disk[filename] = len(data)
+                self.stats.disk_bytes += len(data)
+            rescan = self.stats.disk_bytes > self.max_disk_bytes
+        if rescan:
+            self._scan_disk()
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                self.stats.bytes_served += len(data)
+                return data
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self.stats.bytes_served += len(data)
+        self._put_memory(key, data)
+        return data
+
+    def put(self, key: CacheKey, data: bytes) -> None:
+        data = bytes(data)
+        self._put_memory(key, data)
+        self._write_disk(key, data)
+
+    def get_or_convert(self, key: CacheKey, convert: Callable[[], bytes]) -> bytes:
+        # concurrent misses of the same key may both convert, the result is the same
+        data = self.get(key)
+        if data is None:
+            data = convert()
+            with self._lock:
+                self.stats.bytes_converted += len(data)
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.stats.memory_bytes = 0
+            if self.disk_dir is not None:
+                for filename in self._disk:
+                    try:
+                        os.remove(path.join(self.disk_dir, filename))
+                    except OSError:
+                        pass
+            self._disk.clear()
+            self.stats.disk_bytes = 0
+
+    def image_as(self, source: Union[str, Any], dest_format: VTFImageFormat, frame: int = 0, face: int = 0,
+                 z_slice: int = 0, mipmap_lvl: int = 0) -> bytes:
+        # source is the path of a VTF file, keyed by its path and modification time, or a buffer holding
+        # a VTF file, keyed by its content. Misses only read and convert the requested subresource.
+        if isinstance(source, str):
+            key = CacheKey(file_source(source), frame, face, z_slice, mipmap_lvl, dest_format)
+            return self.get_or_convert(key, lambda: _convert_file(source, dest_format, frame, face, z_slice,
+                                                                  mipmap_lvl))
+        key = CacheKey(content_source(source), frame, face, z_slice, mipmap_lvl, dest_format)
+        return self.get_or_convert(key, lambda: convert_vtf_data(source, dest_format, frame, face, z_slice,
+                                                                 mipmap_lvl))
+
+    def image_as_rgba8888(self, source: Union[str, Any], frame: int = 0, face: int = 0, z_slice: int = 0,
+                          mipmap_lvl: int = 0) -> bytes:
+        return self.image_as(source, VTFImageFormat.IMAGE_FORMAT_RGBA8888, frame, face, z_slice, mipmap_lvl)
+
+
+def _convert_file(file_path: str, dest_format: VTFImageFormat, frame: int, face: int, z_slice: int,
+                  mipmap_lvl: int) -> bytes:
+    with VTFReader(file_path) as reader:
+        return reader.as_format(dest_format, frame, face, z_slice, mipmap_lvl)
+
+
+def convert_vtf_data(data: Any, dest_format: VTFImageFormat, frame: int = 0, face: int = 0, z_slice: int = 0,
+                     mipmap_lvl: int = 0) -> bytes:
+    # reads one subresource out of a buffer holding a VTF file and converts it, without loading the whole image
+    header = parse_header(data)
+    offset = header.data_offset(frame, face, z_slice, mipmap_lvl)
+    size = compute_mipmap_size(header.width, header.height, 1, mipmap_lvl, header.format)
+    with memoryview(data).cast("B") as view:
+        if offset + size > len(view):
+            raise ValueError("file is truncated, image data is missing")
+        with view[offset:offset + size] as image_data:
+            if header.format == dest_format:
+                return bytes(image_data)
+            width, height, _ = compute_mipmap_dimensions(header.width, header.height, header.depth, mipmap_lvl)
+            return VTFLib.convert(image_data, width, height, header.format, dest_format)
@@ -0,0 +1,282 @@
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Tuple, Union
+
+from . import VTFImageFormat, VTFLib
+from .header import compute_mipmap_count
+
+# Copies the image data of a VTF between DDS and KTX 1 containers without decoding it, so compressed textures
+# keep their exact blocks. Only formats that have the same memory layout in both containers are supported,
+# every mipmap, face, frame and slice is written in the order the container expects.
+
+_DDS_SIGNATURE = b"DDS "
+_DDS_HEADER = struct.Struct("<4s7I44x2I4s5I4I4x")
+_DDS_HEADER_DX10 = struct.Struct("<5I")
+
+_DDSD_CAPS = 0x1
+_DDSD_HEIGHT = 0x2
+_DDSD_WIDTH = 0x4
+_DDSD_PITCH = 0x8
+_DDSD_PIXELFORMAT = 0x1000
+_DDSD_MIPMAPCOUNT = 0x20000
+_DDSD_LINEARSIZE = 0x80000
+_DDSD_DEPTH = 0x800000
+
+_DDPF_ALPHAPIXELS = 0x1
+_DDPF_FOURCC = 0x4
+_DDPF_RGB = 0x40
+
+_DDSCAPS_COMPLEX = 0x8
+_DDSCAPS_TEXTURE = 0x1000
+_DDSCAPS_MIPMAP = 0x400000
+_DDSCAPS2_CUBEMAP = 0x200
+_DDSCAPS2_CUBEMAP_ALL_FACES = 0xfc00
+_DDSCAPS2_VOLUME = 0x200000
+
+_DX10_TEXTURE2D = 3
+_DX10_TEXTURE3D = 4
+_DX10_TEXTURECUBE = 0x4
+
+_KTX_IDENTIFIER = b"\xabKTX 11\xbb\r\n\x1a\n"
+_KTX_HEADER = struct.Struct("<12s13I")
+_KTX_ENDIANNESS = 0x04030201
+
+
+class _DDSFormat(NamedTuple):
+    # a FourCC for compressed formats, a bit count and RGBA masks for the others
+    fourcc: bytes
+    bit_count: int
+    masks: Tuple[int, int, int, int]
+    dxgi_format: int
+
+
+class _KTXFormat(NamedTuple):
+    gl_type: int
+    gl_format: int
+    gl_internal_format: int
+    gl_base_internal_format: int
+
+
+_DDS_FORMATS: Dict[int, _DDSFormat] = {
+    VTFImageFormat.IMAGE_FORMAT_DXT1: _DDSFormat(b"DXT1", 0, (0, 0, 0, 0), 71),
+    VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA: _DDSFormat(b"DXT1", 0, (0, 0, 0, 0), 71),
+    VTFImageFormat.IMAGE_FORMAT_DXT3: _DDSFormat(b"DXT3", 0, (0, 0, 0, 0), 74),
+    VTFImageFormat.IMAGE_FORMAT_DXT5: _DDSFormat(b"DXT5", 0, (0, 0, 0, 0), 77),
+    VTFImageFormat.IMAGE_FORMAT_RGBA8888: _DDSFormat(b"\0\0\0\0", 32, (0xff, 0xff00, 0xff0000, 0xff000000), 28),
+    VTFImageFormat.IMAGE_FORMAT_BGRA8888: _DDSFormat(b"\0\0\0\0", 32, (0xff0000, 0xff00, 0xff, 0xff000000), 87),
+    VTFImageFormat.IMAGE_FORMAT_BGRX8888: _DDSFormat(b"\0\0\0\0", 32, (0xff0000, 0xff00, 0xff, 0), 88),
+}
+
+_DDS_FOURCCS = {
+    b"DXT1": VTFImageFormat.IMAGE_FORMAT_DXT1,
+    b"DXT3": VTFImageFormat.IMAGE_FORMAT_DXT3,
+    b"DXT5": VTFImageFormat.IMAGE_FORMAT_DXT5,
+}
+
+# including the sRGB variants, VTF doesn't store the color space in the format
+_DXGI_FORMATS = {
+    71: VTFImageFormat.IMAGE_FORMAT_DXT1,
+    72: VTFImageFormat.IMAGE_FORMAT_DXT1,
+    74: VTFImageFormat.IMAGE_FORMAT_DXT3,
+    75: VTFImageFormat.IMAGE_FORMAT_DXT3,
+    77: VTFImageFormat.IMAGE_FORMAT_DXT5,
+    78: VTFImageFormat.IMAGE_FORMAT_DXT5,
+    28: VTFImageFormat.IMAGE_FORMAT_RGBA8888,
+    29: VTFImageFormat.IMAGE_FORMAT_RGBA8888,
+    87: VTFImageFormat.IMAGE_FORMAT_BGRA8888,
+    91: VTFImageFormat.IMAGE_FORMAT_BGRA8888,
+    88: VTFImageFormat.IMAGE_FORMAT_BGRX8888,
+    93: VTFImageFormat.IMAGE_FORMAT_BGRX8888,
+}
+
+_KTX_FORMATS: Dict[int, _KTXFormat] = {
+    VTFImageFormat.IMAGE_FORMAT_DXT1: _KTXFormat(0, 0, 0x83f0, 0x1907),
+    VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA: _KTXFormat(0, 0, 0x83f1, 0x1908),
+    VTFImageFormat.IMAGE_FORMAT_DXT3: _KTXFormat(0, 0, 0x83f2, 0x1908),
+    VTFImageFormat.IMAGE_FORMAT_DXT5: _KTXFormat(0, 0, 0x83f3, 0x1908),
+    VTFImageFormat.IMAGE_FORMAT_RGBA8888: _KTXFormat(0x1401, 0x1908, 0x8058, 0x1908),
+    VTFImageFormat.IMAGE_FORMAT_BGRA8888: _KTXFormat(0x1401, 0x80e1, 0x8058, 0x1908),
+    VTFImageFormat.IMAGE_FORMAT_BGRX8888: _KTXFormat(0x1401, 0x80e1, 0x8051, 0x1907),
+}
+
+
+class _Layout(NamedTuple):
+    width: int
+    height: int
+    depth: int
+    frames: int
+    faces: int
+    mipmaps: int
+    img_format: VTFImageFormat
+
+
+def _vtf_layout(vtf: VTFLib, formats: Dict[int, Any], container: str) -> _Layout:
+    info = vtf.image_info()
+    if info.format not in formats:
+        raise ValueError("{} images can't be stored in {} without conversion".format(info.format.name, container))
+    if info.frame_count > 1 and info.depth > 1:
+        raise ValueError("{} doesn't support arrays of volume textures".format(container))
+    # the spheremap face of older environment maps has no equivalent
+    faces = 6 if info.face_count == 7 else info.face_count
+    return _Layout(info.width, info.height, info.depth, info.frame_count, faces, info.mipmap_count, info.format)
+
+
+def _level_views(vtf: VTFLib, frame: int, face: int, mipmap_lvl: int) -> Iterator[memoryview]:
+    for z_slice in range(vtf.image_info().mipmap(mipmap_lvl).depth):
+        yield vtf.image_get_data_view(frame, face, z_slice, mipmap_lvl)
+
+
+def _write(file: BinaryIO, views: Iterator[memoryview]) -> int:
+    written = 0
+    for view in views:
+        with view:
+            file.write(view)
+            written += view.nbytes
+    return written
+
+
+def export_dds(vtf: VTFLib, file: Union[str, BinaryIO]) -> int:
+    # Writes the image loaded in vtf as a DDS file, frames become a texture array with a DX10 header.
+    # Returns the number of bytes written.
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return export_dds(vtf, f)
+    layout = _vtf_layout(vtf, _DDS_FORMATS, "DDS")
+    dds_format = _DDS_FORMATS[layout.img_format]
+    info = vtf.image_info()
+    flags = _DDSD_CAPS | _DDSD_HEIGHT | _DDSD_WIDTH | _DDSD_PIXELFORMAT | _DDSD_MIPMAPCOUNT
+    flags |= _DDSD_LINEARSIZE if dds_format.bit_count == 0 else _DDSD_PITCH
+    pitch_or_size = info.mipmaps[0].slice_size if dds_format.bit_count == 0 else layout.width * 4
+    caps = _DDSCAPS_TEXTURE
+    caps2 = 0
+    if layout.mipmaps > 1:
+        caps |= _DDSCAPS_COMPLEX | _DDSCAPS_MIPMAP
+    if layout.faces == 6:
+        caps |= _DDSCAPS_COMPLEX
+        caps2 |= _DDSCAPS2_CUBEMAP | _DDSCAPS2_CUBEMAP_ALL_FACES
+    if layout.depth > 1:
+        flags |= _DDSD_DEPTH
+        caps |= _DDSCAPS_COMPLEX
+        caps2 |= _DDSCAPS2_VOLUME
+    dx10 = layout.frames > 1
+    if dx10:
+        pixel_flags, fourcc, bit_count, masks = _DDPF_FOURCC, b"DX10", 0, (0, 0, 0, 0)
+    elif dds_format.bit_count == 0:
+        pixel_flags, fourcc, bit_count, masks = _DDPF_FOURCC, dds_format.fourcc, 0, dds_format.masks
+    else:
+        pixel_flags = _DDPF_RGB | (_DDPF_ALPHAPIXELS if dds_format.masks[3] else 0)
+        fourcc, bit_count, masks = dds_format.fourcc, dds_format.bit_count, dds_format.masks
+    # some writers flag DXT1 blocks that use transparency, import_dds reads it back
+    if layout.img_format == VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA:
+        pixel_flags |= _DDPF_ALPHAPIXELS
+    header = _DDS_HEADER.pack(_DDS_SIGNATURE, 124, flags, layout.height, layout.width, pitch_or_size,
+                              layout.depth if layout.depth > 1 else 0, layout.mipmaps, 32, pixel_flags, fourcc,
+                              bit_count, *masks, caps, caps2, 0, 0)
+    if dx10:
+        header += _DDS_HEADER_DX10.pack(dds_format.dxgi_format,
+                                        _DX10_TEXTURE3D if layout.depth > 1 else _DX10_TEXTURE2D,
+                                        _DX10_TEXTURECUBE if layout.faces == 6 else 0, layout.frames, 0)
+    file.write(header)
+    written = len(header)
+    # DDS stores the whole mipmap chain of each face of each array element in turn
+    for frame in range(layout.frames):
+        for face in range(layout.faces):
+            for level in range(layout.mipmaps):
+                written += _write(file, _level_views(vtf, frame, face, level))
+    return written
+
+
+def export_ktx(vtf: VTFLib, file: Union[str, BinaryIO]) -> int:
+    # Writes the image loaded in vtf as a KTX 1.1 file, frames become a texture array.
+    # Returns the number of bytes written.
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return export_ktx(vtf, f)
+    layout = _vtf_layout(vtf, _KTX_FORMATS, "KTX")
+    ktx_format = _KTX_FORMATS[layout.img_format]
+    header = _KTX_HEADER.pack(_KTX_IDENTIFIER, _KTX_ENDIANNESS, ktx_format.gl_type, 1, ktx_format.gl_format,
+                              ktx_format.gl_internal_format, ktx_format.gl_base_internal_format, layout.width,
+                              layout.height, layout.depth if layout.depth > 1 else 0,
+                              layout.frames if layout.frames > 1 else 0, layout.faces, layout.mipmaps, 0)
+    file.write(header)
+    written = len(header)
+    info = vtf.image_info()
+    # KTX stores each mipmap level in turn, all supported formats have 4 byte aligned rows and faces,
+    # so there's no padding
+    for level in range(layout.mipmaps):
+        mipmap = info.mipmaps[level]
+        image_size = mipmap.slice_size * mipmap.depth
+        if layout.faces != 6 or layout.frames > 1:
+            image_size *= layout.frames * layout.faces
+        file.write(struct.pack("<I", image_size))
+        written += 4
+        for frame in range(layout.frames):
+            for face in range(layout.faces):
+                written += _write(file, _level_views(vtf, frame, face, level))
+    return written
+
+
+def _dds_layout(file: BinaryIO) -> _Layout:
+    data = file.read(_DDS_HEADER.size)
+    if len(data) < _DDS_HEADER.size:
+        raise ValueError("file is too small for its header")
+    (signature, _, flags, height, width, _, depth, mipmaps, _, pixel_flags, fourcc, bit_count, red_mask,
+     green_mask, blue_mask, alpha_mask, _, caps2, _, _) = _DDS_HEADER.unpack(data)
+    if signature != _DDS_SIGNATURE:
+        raise ValueError("invalid file signature")
+    if not flags & _DDSD_MIPMAPCOUNT or not mipmaps:
+        mipmaps = 1
+    depth = depth if depth > 1 and (flags & _DDSD_DEPTH or caps2 & _DDSCAPS2_VOLUME) else 1
+    faces = 1
+    if caps2 & _DDSCAPS2_CUBEMAP:
+        if caps2 & _DDSCAPS2_CUBEMAP_ALL_FACES != _DDSCAPS2_CUBEMAP_ALL_FACES:
+            raise ValueError("cubemaps without all 6 faces aren't supported")
+        faces = 6
+    frames = 1
+    if pixel_flags & _DDPF_FOURCC and fourcc == b"DX10":
+        data = file.read(_DDS_HEADER_DX10.size)
+        if len(data) < _DDS_HEADER_DX10.size:
+            raise ValueError("file is too small for its header")
+        dxgi_format, _, misc_flags, array_size, _ = _DDS_HEADER_DX10.unpack(data)
+        img_format = _DXGI_FORMATS.get(dxgi_format)
+        if img_format is None:
+            raise ValueError("unsupported DXGI format: {}".format(dxgi_format))
+        if misc_flags & _DX10_TEXTURECUBE:
+            faces = 6
+        frames = max(array_size, 1)
+    elif pixel_flags & _DDPF_FOURCC:
+        img_format = _DDS_FOURCCS.get(fourcc)
+        if img_format is None:
+            raise ValueError("unsupported FourCC: {!r}".format(fourcc))
+    else:
+        masks = (red_mask, green_mask, blue_mask, alpha_mask if pixel_flags & _DDPF_ALPHAPIXELS else 0)
+        img_format = next((VTFImageFormat(vtf_format) for vtf_format, dds_format in _DDS_FORMATS.items()
+                           if dds_format.bit_count and (dds_format.bit_count, dds_format.masks) == (bit_count, masks)),
+                          None)
+        if img_format is None:
+            raise ValueError("unsupported pixel format: {} bits, masks {}".format(bit_count, masks))
+    if img_format == VTFImageFormat.IMAGE_FORMAT_DXT1 and pixel_flags & _DDPF_ALPHAPIXELS:
+        img_format = VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA
+    if mipmaps != 1 and mipmaps != compute_mipmap_count(width, height, depth):
+        raise ValueError("VTF only supports a single mipmap or the whole mipmap chain, got {} of {}".format(
+            mipmaps, compute_mipmap_count(width, height, depth)))
+    return _Layout(width, height, depth, frames, faces, mipmaps, img_format)
+
+
+def import_dds(vtf: VTFLib, file: Union[str, BinaryIO]) -> None:
+    # Creates the image of vtf from a DDS file, texture arrays become frames. The blocks are read straight into
+    # the image data, so VTF can't generate a thumbnail or compute the reflectivity without decoding them,
+    # the image has neither.
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            import_dds(vtf, f)
+        return
+    layout = _dds_layout(file)
+    vtf.create_image(layout.width, layout.height, layout.frames, layout.faces, layout.depth, layout.img_format,
+                     thumbnail=False, mipmaps=layout.mipmaps > 1, null_data=True)
+    for frame in range(layout.frames):
+        for face in range(layout.faces):
+            for level in range(layout.mipmaps):
+                for z_slice in range(vtf.image_info().mipmap(level).depth):
+                    with vtf.image_get_data_view(frame, face, z_slice, level, writable=True) as view:
+                        if file.readinto(view) != view.nbytes:  # type: ignore
+                            raise ValueError("file is truncated, image data is missing")
@@ -0,0 +1,288 @@
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+from . import VTFImageFlag, VTFImageFormat, VTFResourceEntryType, VTFResourceEntryTypeFlag
+
+# Pure-Python parsing of the VTF 7.x header and resource directory, mirroring what VTFLib reports
+# after loading a file, without loading the native library.
+
+_HEADER = struct.Struct("<4s2IIHHIHH4x3f4xfiBiBB")
+_HEADER_7_2 = struct.Struct("<H")  # depth, at the end of the 7.0 header
+_HEADER_7_3 = struct.Struct("<3xI8x")  # resource count
+_RESOURCE_ENTRY = struct.Struct("<II")
+
+_SIGNATURE = b"VTF\0"
+_MAX_RESOURCES = 32
+_MIN_NO_SPHERE_MAP = 5
+
+HEADER_SIZE_MIN = _HEADER.size  # enough to parse every field but the resource directory
+HEADER_SIZE_MAX = _HEADER.size + _HEADER_7_2.size + _HEADER_7_3.size + _MAX_RESOURCES * _RESOURCE_ENTRY.size
+
+# bytes per pixel, or bytes per 4x4 block for compressed formats
+_FORMAT_SIZES: Dict[int, Tuple[int, bool]] = {
+    VTFImageFormat.IMAGE_FORMAT_RGBA8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_ABGR8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_RGB888: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_BGR888: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_RGB565: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_I8: (1, False),
+    VTFImageFormat.IMAGE_FORMAT_IA88: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_P8: (1, False),
+    VTFImageFormat.IMAGE_FORMAT_A8: (1, False),
+    VTFImageFormat.IMAGE_FORMAT_RGB888_BLUESCREEN: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_BGR888_BLUESCREEN: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_ARGB8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_BGRA8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_DXT1: (8, True),
+    VTFImageFormat.IMAGE_FORMAT_DXT3: (16, True),
+    VTFImageFormat.IMAGE_FORMAT_DXT5: (16, True),
+    VTFImageFormat.IMAGE_FORMAT_BGRX8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_BGR565: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_BGRX5551: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_BGRA4444: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA: (8, True),
+    VTFImageFormat.IMAGE_FORMAT_BGRA5551: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_UV88: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_UVWQ8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_RGBA16161616F: (8, False),
+    VTFImageFormat.IMAGE_FORMAT_RGBA16161616: (8, False),
+    VTFImageFormat.IMAGE_FORMAT_UVLX8888: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_R32F: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_RGB323232F: (12, False),
+    VTFImageFormat.IMAGE_FORMAT_RGBA32323232F: (16, False),
+    VTFImageFormat.IMAGE_FORMAT_NV_DST16: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_NV_DST24: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_NV_INTZ: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_NV_RAWZ: (4, False),
+    VTFImageFormat.IMAGE_FORMAT_ATI_DST16: (2, False),
+    VTFImageFormat.IMAGE_FORMAT_ATI_DST24: (3, False),
+    VTFImageFormat.IMAGE_FORMAT_NV_NULL: (4, False),
+    # VTFLib reports a size of 0 for these, use their actual block sizes instead
+    VTFImageFormat.IMAGE_FORMAT_ATI2N: (16, True),
+    VTFImageFormat.IMAGE_FORMAT_ATI1N: (8, True),
+}
+
+
+def compute_image_size(width: int, height: int, depth: int, mipmaps: int, img_format: VTFImageFormat) -> int:
+    return sum(compute_mipmap_size(width, height, depth, level, img_format) for level in range(mipmaps))
+
+
+def compute_mipmap_count(width: int, height: int, depth: int) -> int:
+    return max(width, height, depth, 1).bit_length()
+
+
+def compute_mipmap_dimensions(width: int, height: int, depth: int, mipmap_level: int) -> Tuple[int, int, int]:
+    return (max(width >> mipmap_level, 1), max(height >> mipmap_level, 1), max(depth >> mipmap_level, 1))
+
+
+def compute_mipmap_size(width: int, height: int, depth: int, mipmap_level: int, img_format: VTFImageFormat) -> int:
+    sizes = _FORMAT_SIZES.get(img_format)
+    if sizes is None:
+        return 0
+    size, compressed = sizes
+    width, height, depth = compute_mipmap_dimensions(width, height, depth, mipmap_level)
+    if compressed:
+        return ((width + 3) // 4) * ((height + 3) // 4) * size * depth
+    return width * height * depth * size
+
+
+class ResourceEntry(NamedTuple):
+    type: int
+    data: int
+
+    @property
+    def has_data_chunk(self) -> bool:
+        return not (self.type >> 24) & VTFResourceEntryTypeFlag.RSRCF_HAS_NO_DATA_CHUNK
+
+
+class SubresourceLayout(NamedTuple):
+    frame: int
+    face: int
+    z_slice: int
+    mipmap_lvl: int
+    width: int
+    height: int
+    offset: int
+    size: int
+
+
+class VTFHeader(NamedTuple):
+    major_version: int
+    minor_version: int
+    header_size: int
+    width: int
+    height: int
+    flags: int
+    frame_count: int
+    start_frame: int
+    reflectivity: Tuple[float, float, float]
+    bumpmap_scale: float
+    format: VTFImageFormat
+    mipmap_count: int
+    thumbnail_format: VTFImageFormat
+    thumbnail_width: int
+    thumbnail_height: int
+    depth: int
+    resources: Tuple[ResourceEntry, ...]
+
+    @property
+    def face_count(self) -> int:
+        if not self.flags & VTFImageFlag.TEXTUREFLAGS_ENVMAP:
+            return 1
+        if self.start_frame != 0xffff and self.minor_version < _MIN_NO_SPHERE_MAP:
+            return 7
+        return 6
+
+    @property
+    def has_thumbnail(self) -> bool:
+        return self.thumbnail_format != VTFImageFormat.IMAGE_FORMAT_NONE
+
+    @property
+    def supports_resources(self) -> bool:
+        return self.minor_version >= 3
+
+    @property
+    def thumbnail_size(self) -> int:
+        if not self.has_thumbnail:
+            return 0
+        return compute_image_size(self.thumbnail_width, self.thumbnail_height, 1, 1, self.thumbnail_format)
+
+    @property
+    def thumbnail_offset(self) -> Optional[int]:
+        if not self.has_thumbnail:
+            return None
+        if not self.supports_resources:
+            return self.header_size
+        return self.get_resource_data(VTFResourceEntryType.VTF_LEGACY_RSRC_LOW_RES_IMAGE)
+
+    @property
+    def image_offset(self) -> Optional[int]:
+        if not self.supports_resources:
+            return self.header_size + self.thumbnail_size
+        return self.get_resource_data(VTFResourceEntryType.VTF_LEGACY_RSRC_IMAGE)
+
+    @property
+    def lod_clamp(self) -> Optional[Tuple[int, int]]:
+        # the U and V resolution clamps of the LOD control resource, stored in the resource directory
+        data = self.get_resource_data(VTFResourceEntryType.VTF_RSRC_TEXTURE_LOD_SETTINGS)
+        if data is None:
+            return None
+        return data & 0xff, (data >> 8) & 0xff
+
+    @property
+    def crc(self) -> Optional[int]:
+        return self.get_resource_data(VTFResourceEntryType.VTF_RSRC_CRC)
+
+    @property
+    def image_size(self) -> int:
+        return compute_image_size(self.width, self.height, self.depth, self.mipmap_count,
+                                  self.format) * self.frame_count * self.face_count
+
+    def get_resource_data(self, resource_type: int) -> Optional[int]:
+        for resource in self.resources:
+            if resource.type == resource_type:
+                return resource.data
+        return None
+
+    def data_offset(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> int:
+        # file offset of a single slice, image data is stored from the smallest mipmap to the largest,
+        # then by frame, face and slice
+        if not (0 <= frame < self.frame_count and 0 <= face < self.face_count and 0 <= mipmap_lvl < self.mipmap_count
+                and 0 <= z_slice < compute_mipmap_dimensions(self.width, self.height, self.depth, mipmap_lvl)[2]):
+            raise IndexError("subresource out of range")
+        image_offset = self.image_offset
+        if image_offset is None:
+            raise ValueError("image has no image data")
+        offset = image_offset
+        for level in range(self.mipmap_count - 1, mipmap_lvl, -1):
+            offset += compute_mipmap_size(self.width, self.height, self.depth, level,
+                                          self.format) * self.frame_count * self.face_count
+        mipmap_size = compute_mipmap_size(self.width, self.height, self.depth, mipmap_lvl, self.format)
+        offset += mipmap_size * (frame * self.face_count + face)
+        offset += compute_mipmap_size(self.width, self.height, 1, mipmap_lvl, self.format) * z_slice
+        return offset
+
+    def layout(self) -> Iterator[SubresourceLayout]:
+        # every frame/face/slice/mipmap in file order
+        offset = self.image_offset
+        if offset is None:
+            return
+        for level in range(self.mipmap_count - 1, -1, -1):
+            width, height, depth = compute_mipmap_dimensions(self.width, self.height, self.depth, level)
+            slice_size = compute_mipmap_size(self.width, self.height, 1, level, self.format)
+            for frame in range(self.frame_count):
+                for face in range(self.face_count):
+                    for z_slice in range(depth):
+                        yield SubresourceLayout(frame, face, z_slice, level, width, height, offset, slice_size)
+                        offset += slice_size
+
+
+def parse_header(data: Any) -> VTFHeader:
+    # data is any buffer holding at least the start of the file, e.g. bytes, memoryview or mmap
+    # the view is released before returning or raising, so e.g. an mmap can be closed right after
+    with memoryview(data).cast("B") as view:
+        if len(view) < _HEADER.size:
+            raise ValueError("file is too small for its header")
+        (signature, major_version, minor_version, header_size, width, height, flags, frame_count, start_frame,
+         reflectivity_x, reflectivity_y, reflectivity_z, bumpmap_scale, img_format, mipmap_count,
+         thumbnail_format, thumbnail_width, thumbnail_height) = _HEADER.unpack_from(view)
+        if signature != _SIGNATURE:
+            raise ValueError("invalid file signature")
+        if major_version != 7 or minor_version > 5:
+            raise ValueError("unsupported file version {}.{}".format(major_version, minor_version))
+        depth = 1
+        resources: Tuple[ResourceEntry, ...] = ()
+        if minor_version >= 2:
+            if len(view) < _HEADER.size + _HEADER_7_2.size:
+                raise ValueError("file is too small for its header")
+            depth, = _HEADER_7_2.unpack_from(view, _HEADER.size)
+        if minor_version >= 3:
+            offset = _HEADER.size + _HEADER_7_2.size
+            if len(view) < offset + _HEADER_7_3.size:
+                raise ValueError("file is too small for its header")
+            resource_count, = _HEADER_7_3.unpack_from(view, offset)
+            if resource_count > _MAX_RESOURCES:
+                raise ValueError("file may be corrupt, too many resources")
+            offset += _HEADER_7_3.size
+            if len(view) < offset + resource_count * _RESOURCE_ENTRY.size:
+                raise ValueError("file is too small for its resource directory")
+            resources = tuple(ResourceEntry(*_RESOURCE_ENTRY.unpack_from(view, offset + i * _RESOURCE_ENTRY.size))
+                              for i in range(resource_count))
+        return VTFHeader(major_version, minor_version, header_size, width, height, flags, frame_count, start_frame,
+                         (reflectivity_x, reflectivity_y, reflectivity_z), bumpmap_scale, VTFImageFormat(img_format),
+                         mipmap_count, VTFImageFormat(thumbnail_format), thumbnail_width, thumbnail_height, depth,
+                         resources)
+
+
+def compute_header_size(minor_version: int, resource_count: int = 0) -> int:
+    # the size VTFLib writes, the fixed part is padded to 16 bytes
+    if minor_version < 2:
+        return 64
+    return 80 + (resource_count * _RESOURCE_ENTRY.size if minor_version >= 3 else 0)
+
+
+def pack_header(header: VTFHeader) -> bytes:
+    # the inverse of parse_header, padded to header.header_size
+    data = bytearray(header.header_size)
+    _HEADER.pack_into(data, 0, _SIGNATURE, header.major_version, header.minor_version, header.header_size,
+                      header.width, header.height, header.flags, header.frame_count, header.start_frame,
+                      *header.reflectivity, header.bumpmap_scale, header.format, header.mipmap_count,
+                      header.thumbnail_format, header.thumbnail_width, header.thumbnail_height)
+    if header.minor_version >= 2:
+        _HEADER_7_2.pack_into(data, _HEADER.size, header.depth)
+    if header.minor_version >= 3:
+        offset = _HEADER.size + _HEADER_7_2.size
+        _HEADER_7_3.pack_into(data, offset, len(header.resources))
+        offset += _HEADER_7_3.size
+        for resource in header.resources:
+            _RESOURCE_ENTRY.pack_into(data, offset, resource.type, resource.data)
+            offset += _RESOURCE_ENTRY.size
+    return bytes(data)
+
+
+def read_header(file: Union[str, BinaryIO]) -> VTFHeader:
+    # reads only the header and resource directory
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return read_header(f)
+    return parse_header(file.read(HEADER_SIZE_MAX))
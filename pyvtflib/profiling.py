@@ -0,0 +1,270 @@
+from contextlib import contextmanager
+from functools import wraps
+import inspect
+import logging
+from threading import Lock, local
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import VTFLib, _set_native_hook
+from .header import compute_image_size
+
+# Opt-in instrumentation of the native VTFLib functions and the public methods of VTFLib. While disabled nothing
+# is wrapped, so it costs nothing. While enabled, every call records its count, wall time and the bytes passed in
+# and out, under the name of the native function (e.g. "vlImageConvert") or "VTFLib.<method>". The time of a
+# method includes the native functions and methods it calls, native_time is the part spent in native functions
+# called from the same thread, the rest is Python overhead like creating and copying buffers.
+
+# called with (name, seconds, bytes_in, bytes_out, failed) after every call, e.g. to send them to a statsd
+# or Prometheus client, from the thread that made the call. Exceptions raised by hooks are logged and ignored.
+Hook = Callable[[str, float, int, int, bool], None]
+
+_logger = logging.getLogger(__name__)
+
+
+class CallStats():
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failures = 0
+        self.total_time = 0.
+        self.max_time = 0.
+        self.native_time = 0.
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.
+
+    @property
+    def python_time(self) -> float:
+        return max(self.total_time - self.native_time, 0.)
+
+    def copy(self) -> 'CallStats':
+        stats = CallStats()
+        stats.__dict__.update(self.__dict__)
+        return stats
+
+    def _add(self, elapsed: float, native_time: float, bytes_in: int, bytes_out: int, failed: bool) -> None:
+        self.calls += 1
+        self.failures += failed
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.native_time += native_time
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+
+class Profile():
+    # the calls made from any thread while a profile() block is active
+    def __init__(self) -> None:
+        self.stats: Dict[str, CallStats] = {}
+
+
+_lock = Lock()
+_enable_count = 0
+_stats: Dict[str, CallStats] = {}
+_profiles: List[Profile] = []
+_hooks: Tuple[Hook, ...] = ()
+# the original class attributes of the wrapped VTFLib methods
+_methods: Dict[str, Any] = {}
+_thread = local()
+
+
+def _record(name: str, elapsed: float, native_time: float, bytes_in: int, bytes_out: int, failed: bool) -> None:
+    with _lock:
+        for stats in [_stats] + [profile.stats for profile in _profiles]:
+            call_stats = stats.get(name)
+            if call_stats is None:
+                call_stats = stats[name] = CallStats()
+            call_stats._add(elapsed, native_time, bytes_in, bytes_out, failed)
+    for hook in _hooks:
+        # _record runs in a finally clause, a failing hook mustn't replace the result or exception of the call
+        try:
+            hook(name, elapsed, bytes_in, bytes_out, failed)
+        except Exception:
+            _logger.exception("profiling hook {!r} failed on {}".format(hook, name))
+
+
+def _rgba8888_size(width: int, height: int) -> int:
+    return width * height * 4
+
+
+# the bytes read and written by the native functions that process image data, from their arguments
+_NATIVE_SIZES: Dict[str, Callable[..., Tuple[int, int]]] = {
+    "vlImageLoadLump": lambda data, size, header_only: (size, 0),
+    "vlImageSaveLump": lambda data, size, written: (0, written.contents.value),
+    "vlImageCreateSingle": lambda width, height, data, options: (_rgba8888_size(width, height), 0),
+    "vlImageConvertToRGBA8888": lambda source, dest, width, height, source_format: (
+        compute_image_size(width, height, 1, 1, source_format), _rgba8888_size(width, height)),
+    "vlImageConvertFromRGBA8888": lambda source, dest, width, height, dest_format: (
+        _rgba8888_size(width, height), compute_image_size(width, height, 1, 1, dest_format)),
+    "vlImageConvert": lambda source, dest, width, height, source_format, dest_format: (
+        compute_image_size(width, height, 1, 1, source_format), compute_image_size(width, height, 1, 1, dest_format)),
+    "vlImageConvertToNormalMap": lambda source, dest, width, height, *args: (
+        _rgba8888_size(width, height), _rgba8888_size(width, height)),
+    "vlImageResize": lambda source, dest, source_width, source_height, dest_width, dest_height, *args: (
+        _rgba8888_size(source_width, source_height), _rgba8888_size(dest_width, dest_height)),
+    "vlImageCorrectImageGamma": lambda data, width, height, gamma: (
+        _rgba8888_size(width, height), _rgba8888_size(width, height)),
+    "vlImageComputeImageReflectivity": lambda data, width, height, x, y, z: (_rgba8888_size(width, height), 0),
+    "vlImageFlipImage": lambda data, width, height: (_rgba8888_size(width, height), _rgba8888_size(width, height)),
+    "vlImageMirrorImage": lambda data, width, height: (_rgba8888_size(width, height), _rgba8888_size(width, height)),
+}
+
+
+def _thread_native_time() -> float:
+    return getattr(_thread, "native_time", 0.)
+
+
+def _wrap_native(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+    sizes = _NATIVE_SIZES.get(name)
+
+    def native(*args: Any) -> Any:
+        failed = True
+        start = perf_counter()
+        try:
+            result = function(*args)
+            failed = False
+            return result
+        finally:
+            elapsed = perf_counter() - start
+            _thread.native_time = _thread_native_time() + elapsed
+            bytes_in, bytes_out = sizes(*args) if sizes is not None and not failed else (0, 0)
+            _record(name, elapsed, elapsed, bytes_in, bytes_out, failed)
+    return native
+
+
+def _nbytes(value: Any) -> Optional[int]:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        with memoryview(value) as view:
+            return view.nbytes
+    except TypeError:
+        return None
+
+
+def _method_sizes(args: Tuple[Any, ...], kwargs: Dict[str, Any], result: Any, into: bool) -> Tuple[int, int]:
+    # the sizes of the buffers passed in and of the returned one. The first buffer of *_into methods is the
+    # source and the next the destination, they return the number of bytes written to it.
+    sizes = [size for size in map(_nbytes, list(args) + list(kwargs.values())) if size is not None]
+    if into:
+        return (sizes[0] if sizes else 0, result if isinstance(result, int) else 0)
+    return (sum(sizes), _nbytes(result) or 0)
+
+
+def _wrap_method(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+    into = name.endswith("_into")
+
+    @wraps(function)
+    def method(*args: Any, **kwargs: Any) -> Any:
+        result = None
+        failed = True
+        native_start = _thread_native_time()
+        start = perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = perf_counter() - start
+            bytes_in, bytes_out = _method_sizes(args, kwargs, result, into)
+            _record(name, elapsed, _thread_native_time() - native_start, bytes_in, bytes_out, failed)
+    return method
+
+
+def _wrap_methods() -> None:
+    for name, attribute in list(vars(VTFLib).items()):
+        if name.startswith("_"):
+            continue
+        if isinstance(attribute, staticmethod):
+            wrapped: Any = staticmethod(_wrap_method("VTFLib." + name, attribute.__func__))
+        elif isinstance(attribute, classmethod):
+            wrapped = classmethod(_wrap_method("VTFLib." + name, attribute.__func__))
+        elif inspect.isfunction(attribute):
+            wrapped = _wrap_method("VTFLib." + name, attribute)
+        else:
+            continue
+        _methods[name] = attribute
+        setattr(VTFLib, name, wrapped)
+
+
+def _unwrap_methods() -> None:
+    for name, attribute in _methods.items():
+        setattr(VTFLib, name, attribute)
+    _methods.clear()
+
+
+def enable() -> None:
+    # calls nest, instrumentation stays enabled until disable was called as many times as enable
+    global _enable_count
+    with _lock:
+        _enable_count += 1
+        if _enable_count == 1:
+            _set_native_hook(_wrap_native)
+            _wrap_methods()
+
+
+def disable() -> None:
+    global _enable_count
+    with _lock:
+        if _enable_count == 0:
+            return
+        _enable_count -= 1
+        if _enable_count == 0:
+            _unwrap_methods()
+            _set_native_hook(None)
+
+
+def is_enabled() -> bool:
+    return _enable_count > 0
+
+
+def stats() -> Dict[str, CallStats]:
+    # a snapshot of the calls recorded since the last reset
+    with _lock:
+        return {name: call_stats.copy() for name, call_stats in _stats.items()}
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def add_hook(hook: Hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: Hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = tuple(other for other in _hooks if other is not hook)
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    # enables instrumentation for the block, the yielded Profile collects the calls made inside it
+    scope = Profile()
+    enable()
+    with _lock:
+        _profiles.append(scope)
+    try:
+        yield scope
+    finally:
+        with _lock:
+            _profiles.remove(scope)
+        disable()
+
+
+def format_stats(call_stats: Dict[str, CallStats], limit: Optional[int] = None) -> str:
+    # a table of the calls sorted by total time
+    lines = ["{:<40} {:>8} {:>11} {:>11} {:>11} {:>11} {:>11}".format(
+        "call", "calls", "total ms", "native ms", "python ms", "MB in", "MB out")]
+    for name, entry in sorted(call_stats.items(), key=lambda item: item[1].total_time, reverse=True)[:limit]:
+        lines.append("{:<40} {:>8} {:>11.3f} {:>11.3f} {:>11.3f} {:>11.2f} {:>11.2f}".format(
+            name, entry.calls, entry.total_time * 1000, entry.native_time * 1000, entry.python_time * 1000,
+            entry.bytes_in / 2**20, entry.bytes_out / 2**20))
+    return "\n".join(lines)
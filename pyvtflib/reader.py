@@ -0,0 +1,86 @@
+import mmap
+from typing import Any, List, Tuple
+
+from . import VTFImageFormat, VTFLib
+from .header import VTFHeader, compute_mipmap_dimensions, compute_mipmap_size, parse_header
+
+
+class VTFReader():
+    # Random access to single frames/faces/slices/mipmaps of a VTF file through a read-only memory map,
+    # only the pages of the requested subresource are read from disk.
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        try:
+            self.header: VTFHeader = parse_header(self._mmap)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def close(self) -> None:
+        for view in self._views:
+            try:
+                view.release()
+            except BufferError:
+                # still exported (e.g. by a numpy array), nothing more can be done
+                pass
+        self._views.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # the map is closed when the remaining exports are garbage collected
+            pass
+
+    def __enter__(self) -> 'VTFReader':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def _slice(self, offset: int, size: int) -> memoryview:
+        if offset + size > len(self._mmap):
+            raise ValueError("file is truncated, image data is missing")
+        return memoryview(self._mmap)[offset:offset + size]
+
+    def _data(self, frame: int, face: int, z_slice: int, mipmap_lvl: int) -> memoryview:
+        return self._slice(self.header.data_offset(frame, face, z_slice, mipmap_lvl),
+                           compute_mipmap_size(self.header.width, self.header.height, 1, mipmap_lvl,
+                                               self.header.format))
+
+    def _thumbnail_data(self) -> memoryview:
+        offset = self.header.thumbnail_offset
+        if offset is None:
+            raise ValueError("image has no thumbnail")
+        return self._slice(offset, self.header.thumbnail_size)
+
+    def dimensions(self, mipmap_lvl: int = 0) -> Tuple[int, int, int]:
+        return compute_mipmap_dimensions(self.header.width, self.header.height, self.header.depth, mipmap_lvl)
+
+    def get_data(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> memoryview:
+        # the returned view is only valid until the reader is closed
+        view = self._data(frame, face, z_slice, mipmap_lvl)
+        self._views.append(view)
+        return view
+
+    def get_thumbnail_data(self) -> memoryview:
+        view = self._thumbnail_data()
+        self._views.append(view)
+        return view
+
+    def as_rgba8888(self, frame: int = 0, face: int = 0, z_slice: int = 0, mipmap_lvl: int = 0) -> bytes:
+        return self.as_format(VTFImageFormat.IMAGE_FORMAT_RGBA8888, frame, face, z_slice, mipmap_lvl)
+
+    def as_format(self, dest_format: VTFImageFormat, frame: int = 0, face: int = 0, z_slice: int = 0,
+                  mipmap_lvl: int = 0) -> bytes:
+        width, height, _ = self.dimensions(mipmap_lvl)
+        with self._data(frame, face, z_slice, mipmap_lvl) as data:
+            if self.header.format == dest_format:
+                return bytes(data)
+            return VTFLib.convert(data, width, height, self.header.format, dest_format)
+
+    def thumbnail_as_rgba8888(self) -> bytes:
+        with self._thumbnail_data() as data:
+            return VTFLib.convert_to_rgba8888(data, self.header.thumbnail_width, self.header.thumbnail_height,
+                                              self.header.thumbnail_format)
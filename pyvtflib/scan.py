@@ -0,0 +1,138 @@
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import VTFImageFormat
+from .header import read_header
+
+
+class ImageMetadata(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    major_version: int
+    minor_version: int
+    width: int
+    height: int
+    depth: int
+    format: VTFImageFormat
+    flags: int
+    frame_count: int
+    face_count: int
+    mipmap_count: int
+    start_frame: int
+    bumpmap_scale: float
+    reflectivity: Tuple[float, float, float]
+    has_thumbnail: bool
+    resources: Tuple[int, ...]
+
+
+def read_metadata(file_path: str, stat: Optional[os.stat_result] = None) -> ImageMetadata:
+    if stat is None:
+        stat = os.stat(file_path)
+    header = read_header(file_path)
+    return ImageMetadata(file_path, stat.st_mtime_ns, stat.st_size, header.major_version, header.minor_version,
+                         header.width, header.height, header.depth, header.format, header.flags,
+                         header.frame_count, header.face_count, header.mipmap_count, header.start_frame,
+                         header.bumpmap_scale, header.reflectivity, header.has_thumbnail,
+                         tuple(resource.type for resource in header.resources))
+
+
+_COLUMNS = ImageMetadata._fields
+
+
+class MetadataIndex():
+    def __init__(self, index_path: str) -> None:
+        self._connection = sqlite3.connect(index_path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, major_version INTEGER, minor_version INTEGER, "
+            "width INTEGER, height INTEGER, depth INTEGER, format INTEGER, flags INTEGER, frame_count INTEGER, "
+            "face_count INTEGER, mipmap_count INTEGER, start_frame INTEGER, bumpmap_scale REAL, "
+            "reflectivity TEXT, has_thumbnail INTEGER, resources TEXT)"
+        )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'MetadataIndex':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _from_row(row: Tuple) -> ImageMetadata:
+        values = list(row)
+        values[8] = VTFImageFormat(values[8])
+        values[15] = tuple(float(v) for v in values[15].split(","))
+        values[16] = bool(values[16])
+        values[17] = tuple(int(v) for v in values[17].split(",")) if values[17] else ()
+        return ImageMetadata(*values)
+
+    @staticmethod
+    def _to_row(metadata: ImageMetadata) -> Tuple:
+        values: List[Any] = list(metadata)
+        values[8] = int(values[8])
+        values[15] = ",".join(repr(v) for v in metadata.reflectivity)
+        values[16] = int(metadata.has_thumbnail)
+        values[17] = ",".join(str(v) for v in metadata.resources)
+        return tuple(values)
+
+    def get(self, file_path: str) -> Optional[ImageMetadata]:
+        row = self._connection.execute(
+            "SELECT {} FROM metadata WHERE path = ?".format(", ".join(_COLUMNS)), (file_path,)
+        ).fetchone()
+        return None if row is None else self._from_row(row)
+
+    def get_many(self, file_paths: Iterable[str]) -> Dict[str, ImageMetadata]:
+        self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS lookup (path TEXT PRIMARY KEY)")
+        self._connection.execute("DELETE FROM lookup")
+        self._connection.executemany("INSERT OR IGNORE INTO lookup VALUES (?)", ((p,) for p in file_paths))
+        rows = self._connection.execute(
+            "SELECT {} FROM metadata JOIN lookup USING (path)".format(", ".join("metadata." + c for c in _COLUMNS))
+        )
+        return {row[0]: self._from_row(row) for row in rows}
+
+    def put_many(self, records: Iterable[ImageMetadata]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES ({})".format(", ".join("?" * len(_COLUMNS))),
+                (self._to_row(record) for record in records)
+            )
+
+    def prune(self, keep_paths: Iterable[str]) -> int:
+        keep = set(keep_paths)
+        stale = [(path,) for path, in self._connection.execute("SELECT path FROM metadata") if path not in keep]
+        with self._connection:
+            self._connection.executemany("DELETE FROM metadata WHERE path = ?", stale)
+        return len(stale)
+
+    def __iter__(self) -> Iterator[ImageMetadata]:
+        for row in self._connection.execute("SELECT {} FROM metadata".format(", ".join(_COLUMNS))):
+            yield self._from_row(row)
+
+
+def scan_metadata(paths: Iterable[str], index: Optional[MetadataIndex] = None,
+                  errors: Optional[Dict[str, str]] = None) -> List[ImageMetadata]:
+    # files whose path, mtime and size match an index entry are not read again,
+    # files that can't be read are left out of the result and reported in errors if given
+    paths = list(paths)
+    cached = index.get_many(paths) if index is not None else {}
+    results: List[ImageMetadata] = []
+    parsed: List[ImageMetadata] = []
+    for file_path in paths:
+        try:
+            stat = os.stat(file_path)
+            record = cached.get(file_path)
+            if record is None or record.mtime_ns != stat.st_mtime_ns or record.size != stat.st_size:
+                record = read_metadata(file_path, stat)
+                parsed.append(record)
+        except (OSError, ValueError) as e:
+            if errors is not None:
+                errors[file_path] = str(e)
+            continue
+        results.append(record)
+    if index is not None and parsed:
+        index.put_many(parsed)
+    return results
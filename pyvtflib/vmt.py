@@ -0,0 +1,310 @@
+import json
+import os
+from os import path
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from ._util import imap_chunks
+
+# Pure-Python parsing of VMT materials into the same trees VTFLib produces, without its global bound material,
+# so many materials can be parsed in parallel, and an index of the textures used by the materials.
+
+_TOKEN = re.compile(r'"([^"]*)"|([{}])|\[[^\]\n]*\]|//[^\n]*|([^\s"{}\[\]]+)|(\S)')
+_INTEGER = re.compile(r"[-+]?\d+")
+_SINGLE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_SEPARATORS = re.compile(r"[/\\]+")
+
+# material parameters whose values are texture paths
+TEXTURE_PARAMETERS: FrozenSet[str] = frozenset((
+    "$basetexture", "$basetexture2", "$basetexture3", "$basetexture4", "$hdrbasetexture", "$hdrcompressedtexture",
+    "$bumpmap", "$bumpmap2", "$normalmap", "$normalmap2", "$detail", "$detail2", "$envmap", "$envmapmask",
+    "$envmapmask2", "$blendmodulatetexture", "$selfillummask", "$selfillumtexture", "$phongexponenttexture",
+    "$phongwarptexture", "$lightwarptexture", "$ambientoccltexture", "$dudvmap", "$refracttexture",
+    "$refracttinttexture", "$reflecttexture", "$iris", "$corneatexture", "$texture2", "$displacementmap",
+    "$fleshinteriortexture", "$fleshbordertexture1d", "$fleshnormaltexture", "$fleshsubsurfacetexture",
+    "$fleshcubetexture", "%tooltexture",
+))
+
+
+class VMTNode(NamedTuple):
+    name: str
+    # the children of a group, or the value of a string, integer or single node
+    value: Union[List['VMTNode'], str, int, float]
+
+    @property
+    def is_group(self) -> bool:
+        return isinstance(self.value, list)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        # the value of the first child with the name, compared case-insensitively like the engine does
+        if isinstance(self.value, list):
+            name = name.lower()
+            for child in self.value:
+                if child.name.lower() == name:
+                    return child.value
+        return default
+
+
+def _unquoted_value(token: str) -> Union[str, int, float]:
+    # like VTFLib, only unquoted values are numbers
+    if _INTEGER.fullmatch(token):
+        return int(token)
+    if _SINGLE.fullmatch(token):
+        return float(token)
+    return token
+
+
+def _error(message: str, text: str, position: int) -> ValueError:
+    return ValueError("{} on line {}".format(message, text.count("\n", 0, position) + 1))
+
+
+def parse_vmt(data: Union[str, bytes]) -> VMTNode:
+    # platform conditions like [$X360] are skipped, the values they apply to are kept
+    text = data if isinstance(data, str) else bytes(data).decode("utf-8", "surrogateescape")
+    root: Optional[VMTNode] = None
+    groups: List[List[VMTNode]] = []
+    key: Optional[str] = None
+    for match in _TOKEN.finditer(text, 1 if text.startswith("\ufeff") else 0):
+        quoted, brace, unquoted, invalid = match.groups()
+        if invalid is not None:
+            raise _error("unexpected {!r}".format(invalid), text, match.start())
+        if brace == "{":
+            if key is None:
+                raise _error("group without a name", text, match.start())
+            group = VMTNode(key, [])
+            if root is None:
+                root = group
+            else:
+                groups[-1].append(group)
+            groups.append(group.value)  # type: ignore
+            key = None
+        elif brace == "}":
+            if key is not None or not groups:
+                raise _error("unexpected }", text, match.start())
+            groups.pop()
+            if not groups:
+                return root  # type: ignore
+        elif quoted is None and unquoted is None:
+            continue  # comment or condition
+        elif key is None:
+            key = unquoted if quoted is None else quoted
+        elif not groups:
+            raise _error("expected {", text, match.start())
+        else:
+            groups[-1].append(VMTNode(key, _unquoted_value(unquoted) if quoted is None else quoted))
+            key = None
+    raise ValueError("unexpected end of material, expected }")
+
+
+def read_vmt(file_path: str) -> VMTNode:
+    with open(file_path, "rb") as f:
+        return parse_vmt(f.read())
+
+
+def _format_value(value: Union[str, int, float]) -> str:
+    if isinstance(value, str):
+        return '"{}"'.format(value)
+    if isinstance(value, int):
+        return str(value)
+    return "{:f}".format(value)
+
+
+def _format_node(node: VMTNode, indent: str, lines: List[str]) -> None:
+    if isinstance(node.value, list):
+        lines.append('{}"{}"'.format(indent, node.name))
+        lines.append(indent + "{")
+        for child in node.value:
+            _format_node(child, indent + "\t", lines)
+        lines.append(indent + "}")
+    else:
+        lines.append('{}"{}" {}'.format(indent, node.name, _format_value(node.value)))
+
+
+def format_vmt(material: VMTNode) -> str:
+    # the same text VTFLib saves materials as, including its CRLF line endings
+    lines: List[str] = []
+    _format_node(material, "", lines)
+    return "\r\n".join(lines) + "\r\n"
+
+
+def texture_name(texture: str) -> str:
+    # the name textures are indexed by: lower case, forward slashes, relative to the materials directory and
+    # without the .vtf extension, e.g. "Materials\\Brick\\BrickWall001a.vtf" -> "brick/brickwall001a"
+    name = _SEPARATORS.sub("/", texture.strip().lower()).strip("/")
+    if name.startswith("materials/"):
+        name = name[len("materials/"):]
+    if name.endswith(".vtf"):
+        name = name[:-len(".vtf")]
+    return name
+
+
+def material_textures(material: VMTNode, parameters: FrozenSet[str] = TEXTURE_PARAMETERS) -> FrozenSet[str]:
+    # the names of the textures referenced by the material, including fallback groups, but not proxies
+    # (their parameters name material variables) or render targets and the env_cubemap placeholder
+    textures: Set[str] = set()
+    groups = [material.value] if isinstance(material.value, list) else []
+    while groups:
+        for node in groups.pop():
+            if isinstance(node.value, list):
+                if node.name.lower() != "proxies":
+                    groups.append(node.value)
+            elif isinstance(node.value, str) and node.name.lower() in parameters:
+                name = texture_name(node.value)
+                if name and name != "env_cubemap" and not name.startswith("_rt_"):
+                    textures.add(name)
+    return frozenset(textures)
+
+
+class ParseResult(NamedTuple):
+    path: str
+    material: Optional[VMTNode]
+    error: Optional[str]
+
+
+def _parse_file(file_path: str) -> ParseResult:
+    try:
+        return ParseResult(file_path, read_vmt(file_path), None)
+    except (OSError, ValueError) as e:
+        return ParseResult(file_path, None, "{}: {}".format(type(e).__name__, e))
+
+
+def _parse_chunk(chunk: List[str]) -> List[ParseResult]:
+    return [_parse_file(file_path) for file_path in chunk]
+
+
+def parse_files(paths: Iterable[str], max_workers: Optional[int] = None, chunk_size: int = 64,
+                max_in_flight: Optional[int] = None) -> Iterator[ParseResult]:
+    # parses the materials in worker processes, results are yielded in completion order
+    return imap_chunks(_parse_chunk, paths, (), max_workers, chunk_size, max_in_flight)
+
+
+def find_vmt_files(material_dir: str) -> Iterator[str]:
+    for dir_path, _, file_names in os.walk(material_dir):
+        for file_name in file_names:
+            if file_name.lower().endswith(".vmt"):
+                yield path.join(dir_path, file_name)
+
+
+class MaterialEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    textures: FrozenSet[str]
+
+
+# material path, texture names and error
+_IndexResult = Tuple[str, Optional[FrozenSet[str]], Optional[str]]
+
+
+def _index_chunk(chunk: List[str], parameters: FrozenSet[str]) -> List[_IndexResult]:
+    # only the texture names are sent back to the parent process, not the whole trees
+    results = []
+    for result in _parse_chunk(chunk):
+        textures = material_textures(result.material, parameters) if result.material is not None else None
+        results.append((result.path, textures, result.error))
+    return results
+
+
+class MaterialIndex():
+    # Maps materials to the textures they use and textures to the materials using them. Updates only parse
+    # the materials whose modification time or size changed since they were last indexed.
+
+    def __init__(self, parameters: FrozenSet[str] = TEXTURE_PARAMETERS) -> None:
+        self.parameters = parameters
+        self._materials: Dict[str, MaterialEntry] = {}
+        self._users: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._materials)
+
+    def __contains__(self, material: str) -> bool:
+        return material in self._materials
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._materials)
+
+    def _set(self, material: str, entry: Optional[MaterialEntry]) -> None:
+        old = self._materials.pop(material, None)
+        if old is not None:
+            for texture in old.textures:
+                users = self._users[texture]
+                users.discard(material)
+                if not users:
+                    del self._users[texture]
+        if entry is not None:
+            self._materials[material] = entry
+            for texture in entry.textures:
+                self._users.setdefault(texture, set()).add(material)
+
+    def update(self, paths: Iterable[str], max_workers: Optional[int] = None, chunk_size: int = 64,
+               errors: Optional[Dict[str, str]] = None) -> List[str]:
+        # paths are all the current materials, indexed materials that aren't in them are removed, as are
+        # materials that can't be read, which are reported in errors if given.
+        # Returns the materials that were added, removed or now use different textures.
+        stats: Dict[str, os.stat_result] = {}
+        parse: List[str] = []
+        changed: List[str] = []
+        for file_path in dict.fromkeys(paths):
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                if errors is not None:
+                    errors[file_path] = "{}: {}".format(type(e).__name__, e)
+                continue
+            stats[file_path] = stat
+            entry = self._materials.get(file_path)
+            if entry is None or entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+                parse.append(file_path)
+        for material in [material for material in self._materials if material not in stats]:
+            self._set(material, None)
+            changed.append(material)
+        if max_workers == 1 or len(parse) <= chunk_size:
+            results: Iterable[_IndexResult] = _index_chunk(parse, self.parameters)
+        else:
+            results = imap_chunks(_index_chunk, parse, (self.parameters,), max_workers, chunk_size)
+        for file_path, textures, error in results:
+            old = self._materials.get(file_path)
+            if textures is None:
+                if errors is not None:
+                    errors[file_path] = error  # type: ignore
+                self._set(file_path, None)
+                if old is not None:
+                    changed.append(file_path)
+                continue
+            stat = stats[file_path]
+            self._set(file_path, MaterialEntry(stat.st_mtime_ns, stat.st_size, textures))
+            if old is None or old.textures != textures:
+                changed.append(file_path)
+        return changed
+
+    def update_directory(self, material_dir: str, max_workers: Optional[int] = None, chunk_size: int = 64,
+                         errors: Optional[Dict[str, str]] = None) -> List[str]:
+        return self.update(find_vmt_files(material_dir), max_workers, chunk_size, errors)
+
+    def textures(self, material: str) -> FrozenSet[str]:
+        entry = self._materials.get(material)
+        return entry.textures if entry is not None else frozenset()
+
+    def materials(self, texture: str) -> FrozenSet[str]:
+        return frozenset(self._users.get(texture_name(texture), ()))
+
+    def unused_textures(self, textures: Iterable[str]) -> List[str]:
+        # the given textures (names or paths relative to the game directory) that no material uses
+        return [texture for texture in textures if texture_name(texture) not in self._users]
+
+    def save(self, file_path: str) -> None:
+        data = {
+            "parameters": sorted(self.parameters),
+            "materials": {material: [entry.mtime_ns, entry.size, sorted(entry.textures)]
+                          for material, entry in self._materials.items()},
+        }
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'MaterialIndex':
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(frozenset(data["parameters"]))
+        for material, (mtime_ns, size, textures) in data["materials"].items():
+            index._set(material, MaterialEntry(mtime_ns, size, frozenset(textures)))
+        return index
@@ -0,0 +1,64 @@
+from ctypes import create_string_buffer
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Tuple
+
+from . import VTFException, VTFImageFormat, VTFLib, VTFResourceEntryType, _explain_missing_nvdxt, _is_compressed
+from . import _rgba8888_chunks
+from .header import ResourceEntry, VTFHeader, compute_header_size, compute_image_size, pack_header
+
+
+def read_rgba8888_strips(file: BinaryIO, width: int, height: int, strip_rows: int = 64) -> Iterator[bytes]:
+    # strips of raw RGBA8888 rows read from a file, top to bottom
+    row_size = width * 4
+    for y in range(0, height, strip_rows):
+        size = min(strip_rows, height - y) * row_size
+        strip = file.read(size)
+        if len(strip) != size:
+            raise ValueError("file is truncated, expected {} rows".format(height))
+        yield strip
+
+
+def write_vtf_strips(file: BinaryIO, width: int, height: int, strips: Iterable[Any],
+                     img_format: VTFImageFormat = VTFImageFormat.IMAGE_FORMAT_RGBA8888, flags: int = 0,
+                     version: Tuple[int, int] = (7, 3), reflectivity: Optional[Tuple[float, float, float]] = None,
+                     bumpmap_scale: float = 1.) -> int:
+    # Writes a VTF file with a single frame and no mipmaps or thumbnail, encoding strips of RGBA8888 rows as
+    # they arrive, so only a few strips are in memory instead of the whole image. If reflectivity is None it's
+    # computed from the strips and the header is written again at the end, which needs a seekable file.
+    # Returns the number of bytes written.
+    if width & (width - 1) or height & (height - 1) or not width or not height:
+        raise ValueError("width and height must be powers of two")
+    if reflectivity is None and not file.seekable():
+        raise ValueError("reflectivity must be given for non-seekable files")
+    major_version, minor_version = version
+    header_size = compute_header_size(minor_version, 1)
+    resources = (ResourceEntry(VTFResourceEntryType.VTF_LEGACY_RSRC_IMAGE, header_size),) if minor_version >= 3 else ()
+    header = VTFHeader(major_version, minor_version, header_size, width, height, flags, 1, 0,
+                       reflectivity or (0., 0., 0.), bumpmap_scale, img_format, 1,
+                       VTFImageFormat.IMAGE_FORMAT_NONE, 0, 0, 1, resources)
+    start = file.tell() if reflectivity is None else 0
+    file.write(pack_header(header))
+    written = header_size
+    block_rows = 4 if _is_compressed(img_format) else 1
+    totals = [0., 0., 0.]
+    dest = None
+    for chunk, rows in _rgba8888_chunks(strips, width, height, block_rows):
+        size = compute_image_size(width, rows, 1, 1, img_format)
+        if dest is None or len(dest) < size:
+            dest = create_string_buffer(size)
+        try:
+            VTFLib.convert_from_rgba8888_into(chunk, dest, width, rows, img_format)
+        except VTFException as error:
+            raise _explain_missing_nvdxt(error)
+        with memoryview(dest) as view, view[:size] as data:
+            file.write(data)
+        written += size
+        if reflectivity is None:
+            for i, value in enumerate(VTFLib.compute_image_reflectivity(chunk, width, rows)):
+                totals[i] += value * rows
+    if reflectivity is None:
+        end = file.tell()
+        file.seek(start)
+        x, y, z = (total / height for total in totals)
+        file.write(pack_header(header._replace(reflectivity=(x, y, z))))
+        file.seek(end)
+    return written
@@ -12,6 +12,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/lasa01/pyvtflib",
     packages=["pyvtflib"],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     package_data={
         "pyvtflib": ["bin/x64/VTFLib.dll", "bin/x86/VTFLib.dll", "bin/libVTFLib13.so"],
     },
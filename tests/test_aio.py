@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import pytest
+
+from pyvtflib import CreateOptions, VTFImageFormat, VTFLib
+from pyvtflib.aio import AsyncVTFLib
+from pyvtflib.cache import convert_vtf_data
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+RGBA8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+
+
+def _vtf_bytes() -> bytes:
+    # two frames of mipmapped BGRA8888 with different data in every subresource
+    with VTFLib() as vtf:
+        vtf.create_image(16, 8, frames=2, img_format=BGRA8888, thumbnail=False)
+        for frame in range(2):
+            for mipmap_lvl in range(vtf.image_mipmap_count()):
+                size = vtf.image_info().mipmap(mipmap_lvl).slice_size
+                vtf.image_set_data(os.urandom(size), frame=frame, mipmap_lvl=mipmap_lvl)
+        return vtf.save_image_bytes()
+
+
+@pytest.mark.parametrize("frame, mipmap_lvl", [(0, 0), (1, 0), (1, 2), (0, 4)])
+def test_convert_vtf_data_matches_image_as(frame, mipmap_lvl):
+    data = _vtf_bytes()
+    with VTFLib() as vtf:
+        vtf.load_image_bytes(data)
+        assert convert_vtf_data(data, RGBA8888, frame, mipmap_lvl=mipmap_lvl) == \
+            vtf.image_as(RGBA8888, frame, mipmap_lvl=mipmap_lvl)
+        assert convert_vtf_data(data, BGRA8888, frame, mipmap_lvl=mipmap_lvl) == \
+            vtf.image_get_data(frame, mipmap_lvl=mipmap_lvl)
+
+
+def test_async_load_decode_encode():
+    data = _vtf_bytes()
+    rgba = bytes(range(256)) * 2
+
+    async def run():
+        async with AsyncVTFLib(max_concurrency=2) as aio:
+            vtf = await aio.load(data)
+            try:
+                decoded = await asyncio.gather(aio.decode(vtf, 1, frame=1), aio.decode(data, 1, frame=1))
+                assert decoded[0] == decoded[1] == vtf.image_as(RGBA8888, 1, mipmap_lvl=1)
+            finally:
+                vtf.close()
+            encoded = await aio.encode(16, 8, [rgba], CreateOptions(mipmaps=False, thumbnail=False))
+            assert await aio.decode(encoded) == rgba
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import os
+import struct
+import zlib
+
+from pyvtflib import VTFImageFormat, VTFLib
+from pyvtflib.__main__ import main
+from pyvtflib.batch import BatchStats, convert_directory, convert_files
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+
+
+def _write_vtf(file_path: str) -> None:
+    # two mipmapped frames of random BGRA8888
+    with VTFLib() as vtf:
+        vtf.create_image(16, 8, frames=2, img_format=BGRA8888, thumbnail=False, null_data=True)
+        for frame in range(2):
+            for mipmap_lvl in range(vtf.image_mipmap_count()):
+                size = vtf.image_info().mipmap(mipmap_lvl).slice_size
+                vtf.image_set_data(os.urandom(size), frame, mipmap_lvl=mipmap_lvl)
+        vtf.save_image_file(file_path)
+
+
+def _read_png(file_path: str):
+    # only what write_png writes: 8 bit RGBA without filtering in a single IDAT chunk
+    with open(file_path, "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = {}
+    offset = 8
+    while offset < len(data):
+        size, chunk_type = struct.unpack_from(">I4s", data, offset)
+        chunk = data[offset + 8:offset + 8 + size]
+        assert struct.unpack_from(">I", data, offset + 8 + size)[0] == zlib.crc32(chunk_type + chunk)
+        chunks[chunk_type] = chunk
+        offset += 12 + size
+    width, height, bit_depth, color_type = struct.unpack_from(">IIBB", chunks[b"IHDR"])
+    assert (bit_depth, color_type) == (8, 6)
+    scanlines = zlib.decompress(chunks[b"IDAT"])
+    stride = width * 4 + 1
+    assert all(scanlines[y * stride] == 0 for y in range(height))
+    return width, height, b"".join(scanlines[y * stride + 1:(y + 1) * stride] for y in range(height))
+
+
+def _source_dir(tmp_path):
+    source_dir = tmp_path / "source"
+    (source_dir / "sub").mkdir(parents=True)
+    sources = [str(source_dir / "a.vtf"), str(source_dir / "sub" / "b.VTF")]
+    for source in sources:
+        _write_vtf(source)
+    (source_dir / "sub" / "broken.vtf").write_bytes(b"VTF\0broken")
+    (source_dir / "readme.txt").write_bytes(b"not a texture")
+    return str(source_dir), sources
+
+
+def test_convert_directory_to_png(tmp_path):
+    source_dir, sources = _source_dir(tmp_path)
+    dest_dir = str(tmp_path / "dest")
+    stats = BatchStats()
+    results = {os.path.relpath(result.source, source_dir): result
+               for result in convert_directory(source_dir, dest_dir, frame=1, max_workers=2, chunk_size=1,
+                                               stats=stats)}
+    assert sorted(results) == sorted(["a.vtf", os.path.join("sub", "b.VTF"), os.path.join("sub", "broken.vtf")])
+    assert results[os.path.join("sub", "broken.vtf")].error is not None
+    assert (stats.files, stats.failed) == (3, 1)
+    assert stats.bytes_in == sum(os.path.getsize(source) for source in sources)
+    with VTFLib() as vtf:
+        for source in sources:
+            result = results[os.path.relpath(source, source_dir)]
+            assert result.error is None
+            assert result.dest == os.path.join(dest_dir, os.path.splitext(os.path.relpath(source, source_dir))[0]
+                                               + ".png")
+            vtf.load_image_file(source)
+            assert _read_png(result.dest) == (16, 8, vtf.image_as_rgba8888(1))
+            assert result.bytes_out == os.path.getsize(result.dest)
+
+
+def test_convert_files_to_raw_data(tmp_path):
+    source_dir, sources = _source_dir(tmp_path)
+    jobs = [(source, str(tmp_path / "{}.raw".format(i))) for i, source in enumerate(sources)]
+    results = list(convert_files(jobs, BGRA8888, mipmap_lvl=1, max_workers=1))
+    assert sorted(result.dest for result in results) == [dest for _, dest in jobs]
+    with VTFLib() as vtf:
+        for source, dest in jobs:
+            vtf.load_image_file(source)
+            with open(dest, "rb") as f:
+                assert f.read() == vtf.image_get_data(mipmap_lvl=1)
+
+
+def test_command_line(tmp_path, capsys):
+    source_dir, _ = _source_dir(tmp_path)
+    assert main(["convert", source_dir, str(tmp_path / "dest"), "--format", "rgba8888", "--workers", "1"]) == 1
+    err = capsys.readouterr().err
+    assert "broken.vtf" in err and "3 files (1 failed)" in err
+    os.remove(os.path.join(source_dir, "sub", "broken.vtf"))
+    assert main(["convert", source_dir, str(tmp_path / "dest"), "-v"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
+    assert os.path.getsize(str(tmp_path / "dest" / "a.raw")) == 16 * 8 * 4
@@ -0,0 +1,75 @@
+import os
+import time
+
+from pyvtflib import VTFImageFormat, VTFLib
+from pyvtflib.cache import CacheKey, ConversionCache, content_source, file_source
+
+RGBA8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+
+
+def _key(i: int) -> CacheKey:
+    return CacheKey("source", i, 0, 0, 0, RGBA8888)
+
+
+def _disk_bytes(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".bin"))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ConversionCache(max_memory_bytes=300)
+    for i in range(3):
+        cache.put(_key(i), bytes((i,)) * 100)
+    assert cache.get(_key(0)) == b"\x00" * 100
+    cache.put(_key(3), b"\x03" * 100)
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(0)) == b"\x00" * 100
+    assert cache.stats.memory_bytes == 300 and cache.stats.memory_evictions == 1
+    assert (cache.stats.memory_hits, cache.stats.misses) == (2, 1)
+
+
+def test_disk_tier_is_shared_and_bounded_by_the_directory_size(tmp_path):
+    first = ConversionCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=1000)
+    second = ConversionCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=1000)
+    for i in range(6):
+        first.put(_key(i), bytes((i,)) * 100)
+    assert second.get(_key(5)) == b"\x05" * 100
+    assert second.stats.disk_hits == 1
+    for i in range(6, 15):
+        second.put(_key(i), bytes((i,)) * 100)
+    # second only counts the entries it knows about
+    assert _disk_bytes(str(tmp_path)) == 1500
+    second.put(_key(15), b"\x0f" * 100)
+    # then rescans the directory, finds 1600 bytes and evicts down to 7/8 of the limit
+    assert _disk_bytes(str(tmp_path)) == second.stats.disk_bytes == 800
+    assert second.get(_key(15)) == b"\x0f" * 100
+    assert first.get(_key(0)) is None
+
+
+def test_stale_temporary_files_are_removed(tmp_path):
+    stale = tmp_path / "stale.tmp"
+    fresh = tmp_path / "fresh.tmp"
+    stale.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    old = time.time() - 2 * 3600
+    os.utime(str(stale), (old, old))
+    ConversionCache(disk_dir=str(tmp_path))
+    assert not stale.exists() and fresh.exists()
+
+
+def test_image_as_converts_files_and_buffers(tmp_path):
+    rgba = bytes(range(256)) * 2
+    file_path = str(tmp_path / "image.vtf")
+    with VTFLib() as vtf:
+        vtf.create_image(16, 8, img_format=VTFImageFormat.IMAGE_FORMAT_BGRA8888, thumbnail=False, mipmaps=False)
+        vtf.image_set_data(VTFLib.convert_from_rgba8888(rgba, 16, 8, VTFImageFormat.IMAGE_FORMAT_BGRA8888))
+        vtf.save_image_file(file_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    cache = ConversionCache(disk_dir=str(tmp_path / "cache"))
+    for _ in range(2):
+        assert cache.image_as_rgba8888(file_path) == rgba
+        assert cache.image_as_rgba8888(data) == rgba
+    assert (cache.stats.misses, cache.stats.memory_hits, cache.stats.bytes_converted) == (2, 2, 2 * len(rgba))
+    assert file_source(file_path) != content_source(data)
+    assert sorted(os.listdir(str(tmp_path / "cache"))) == sorted(
+        CacheKey(source, 0, 0, 0, 0, RGBA8888).filename for source in (file_source(file_path), content_source(data)))
@@ -0,0 +1,113 @@
+import io
+import os
+import struct
+
+import pytest
+
+from pyvtflib import VTFImageFormat, VTFLib
+from pyvtflib.containers import export_dds, export_ktx, import_dds
+
+DXT1 = VTFImageFormat.IMAGE_FORMAT_DXT1
+DXT5 = VTFImageFormat.IMAGE_FORMAT_DXT5
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+
+
+def _random_image(vtf: VTFLib, width: int, height: int, img_format: VTFImageFormat, frames: int = 1,
+                  faces: int = 1, slices: int = 1) -> None:
+    # the blocks are random, creating compressed images doesn't need NVDXT as long as nothing is encoded
+    vtf.create_image(width, height, frames, faces, slices, img_format, thumbnail=False, null_data=True)
+    for subresource in _subresources(vtf):
+        size = vtf.image_info().mipmap(subresource[3]).slice_size
+        vtf.image_set_data(os.urandom(size), *subresource)
+
+
+def _subresources(vtf: VTFLib):
+    info = vtf.image_info()
+    for frame in range(info.frame_count):
+        for face in range(info.face_count):
+            for mipmap_lvl in range(info.mipmap_count):
+                for z_slice in range(info.mipmap(mipmap_lvl).depth):
+                    yield frame, face, z_slice, mipmap_lvl
+
+
+def _all_data(vtf: VTFLib):
+    return [vtf.image_get_data(*subresource) for subresource in _subresources(vtf)]
+
+
+@pytest.mark.parametrize("img_format, frames, faces, slices", [
+    (DXT1, 1, 1, 1),
+    (DXT5, 3, 1, 1),
+    (BGRA8888, 1, 1, 4),
+    (DXT5, 1, 6, 1),
+    (BGRA8888, 2, 6, 1),
+], ids=["dxt1", "dxt5-frames", "bgra8888-volume", "dxt5-cubemap", "bgra8888-cubemap-array"])
+def test_dds_round_trip(img_format, frames, faces, slices):
+    with VTFLib() as source, VTFLib() as copy:
+        _random_image(source, 32, 8, img_format, frames, faces, slices)
+        dds = io.BytesIO()
+        written = export_dds(source, dds)
+        assert written == len(dds.getvalue())
+        dds.seek(0)
+        import_dds(copy, dds)
+        assert copy.image_format() == img_format
+        assert (copy.image_width(), copy.image_height(), copy.image_depth()) == (32, 8, slices)
+        assert (copy.image_frame_count(), copy.image_face_count()) == (frames, faces)
+        assert copy.image_mipmap_count() == source.image_mipmap_count()
+        assert _all_data(copy) == _all_data(source)
+
+
+def test_dds_header_of_a_dxt5_texture():
+    with VTFLib() as vtf:
+        _random_image(vtf, 16, 8, DXT5)
+        dds = io.BytesIO()
+        export_dds(vtf, dds)
+        data = dds.getvalue()
+        assert data[:4] == b"DDS "
+        height, width, linear_size, _, mipmaps = struct.unpack_from("<5I", data, 12)
+        assert (width, height, linear_size, mipmaps) == (16, 8, 16 * 8, 5)
+        assert data[84:88] == b"DXT5"
+        assert data[128:] == b"".join(_all_data(vtf))
+
+
+def test_import_dds_rejects_truncated_files():
+    with VTFLib() as vtf:
+        _random_image(vtf, 16, 16, DXT1)
+        dds = io.BytesIO()
+        export_dds(vtf, dds)
+        with pytest.raises(ValueError):
+            import_dds(vtf, io.BytesIO(dds.getvalue()[:-1]))
+
+
+def test_ktx_export_stores_each_mipmap_level_in_turn():
+    with VTFLib() as vtf:
+        _random_image(vtf, 8, 4, BGRA8888, frames=2)
+        ktx = io.BytesIO()
+        written = export_ktx(vtf, ktx)
+        data = ktx.getvalue()
+        assert written == len(data)
+        assert data[:12] == b"\xabKTX 11\xbb\r\n\x1a\n"
+        fields = struct.unpack_from("<13I", data, 12)
+        # glFormat BGRA, pixel width and height, pixel depth, array elements, faces, mipmap levels
+        assert (fields[3], fields[6], fields[7], fields[8], fields[9], fields[10], fields[11]) == \
+            (0x80e1, 8, 4, 0, 2, 1, 4)
+        offset = 64
+        for mipmap_lvl in range(4):
+            image_size, = struct.unpack_from("<I", data, offset)
+            offset += 4
+            levels = b"".join(vtf.image_get_data(frame, mipmap_lvl=mipmap_lvl) for frame in range(2))
+            assert image_size == len(levels)
+            assert data[offset:offset + image_size] == levels
+            offset += image_size
+        assert offset == len(data)
+
+
+def test_repeated_exports_dont_accumulate_views():
+    with VTFLib() as vtf:
+        _random_image(vtf, 16, 16, DXT1, frames=4)
+        for _ in range(3):
+            dds = io.BytesIO()
+            export_dds(vtf, dds)
+            export_ktx(vtf, io.BytesIO())
+            dds.seek(0)
+            import_dds(vtf, dds)
+        assert len(vtf._views) <= 1 and len(vtf._arrays) <= 1
@@ -0,0 +1,118 @@
+from ctypes import create_string_buffer
+import os
+
+import pytest
+
+import pyvtflib
+from pyvtflib import VTFImageFormat, VTFLib, set_numpy_backend
+from pyvtflib.header import parse_header
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+requires_numpy = pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+
+HDR = VTFImageFormat.IMAGE_FORMAT_RGBA16161616F
+RGBA8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+ARGB8888 = VTFImageFormat.IMAGE_FORMAT_ARGB8888
+
+
+@pytest.fixture(params=[pytest.param(True, marks=requires_numpy), False], ids=["numpy", "python"])
+def numpy_backend(request):
+    set_numpy_backend(request.param)
+    yield request.param
+    set_numpy_backend(True)
+
+
+def _native_convert(data, width, height, source_format, dest_format):
+    dest = create_string_buffer(VTFLib.compute_image_size(width, height, 1, 1, dest_format))
+    assert pyvtflib._vl_image_convert(data, dest, width, height, source_format, dest_format)
+    return dest.raw
+
+
+def test_argb8888_matches_vtflib(numpy_backend):
+    # the bundled Linux VTFLib only converts ARGB8888 correctly for bytes below 128
+    rgba = bytes(value & 0x7f for value in os.urandom(8 * 6 * 4))
+    argb = VTFLib.convert_from_rgba8888(rgba, 8, 6, ARGB8888)
+    assert argb == _native_convert(rgba, 8, 6, RGBA8888, ARGB8888)
+    assert argb[:4] == bytes((rgba[1], rgba[2], rgba[3], rgba[0]))
+    assert VTFLib.convert_to_rgba8888(argb, 8, 6, ARGB8888) == _native_convert(argb, 8, 6, ARGB8888, RGBA8888) == rgba
+
+
+def _hdr_image(vtf: VTFLib, width: int, height: int, frames: int = 1, slices: int = 1) -> None:
+    # every subresource gets a different brightness, so tonemapping them together changes the result
+    vtf.create_image(width, height, frames=frames, slices=slices, img_format=HDR, thumbnail=False, null_data=True)
+    size, layout = vtf.image_all_layout()
+    data = numpy.empty(size // 2, numpy.float16)
+    rng = numpy.random.default_rng(0)
+    for i, subresource in enumerate(layout):
+        start = subresource.offset // 2
+        data[start:start + subresource.size // 2] = rng.random(subresource.size // 2) * (i + 1) ** 2
+    vtf.image_from_all(data)
+
+
+@requires_numpy
+def test_hdr_image_as_all_matches_image_as():
+    with VTFLib() as vtf:
+        _hdr_image(vtf, 16, 8, frames=3)
+        data, layout = vtf.image_as_all(RGBA8888)
+        for subresource in layout:
+            expected = vtf.image_as(RGBA8888, subresource.frame, subresource.face, subresource.z_slice,
+                                    subresource.mipmap_lvl)
+            assert bytes(data[subresource.offset:subresource.offset + subresource.size]) == expected, subresource
+
+
+@requires_numpy
+def test_hdr_volume_array_matches_image_as():
+    with VTFLib() as vtf:
+        _hdr_image(vtf, 8, 8, slices=4)
+        array = vtf.image_as_array(dest_format=RGBA8888)
+        assert array.shape == (4, 8, 8, 4)
+        for z_slice in range(4):
+            assert array[z_slice].tobytes() == vtf.image_as(RGBA8888, z_slice=z_slice)
+
+
+def _random_image(vtf: VTFLib, img_format: VTFImageFormat, frames: int = 2, faces: int = 1, slices: int = 1) -> None:
+    vtf.create_image(16, 8, frames=frames, faces=faces, slices=slices, img_format=img_format, thumbnail=False,
+                     null_data=True)
+    size, _ = vtf.image_all_layout()
+    vtf.image_from_all(os.urandom(size))
+
+
+# VTFLib gets the offsets of frames after the first of volume textures wrong, which the engine doesn't support
+@pytest.mark.parametrize("img_format, frames, faces, slices", [
+    (VTFImageFormat.IMAGE_FORMAT_BGRA8888, 2, 6, 1),
+    (VTFImageFormat.IMAGE_FORMAT_BGR888, 1, 1, 4),
+    (VTFImageFormat.IMAGE_FORMAT_DXT1, 2, 1, 1),
+], ids=["bgra8888-cubemap", "bgr888-volume", "dxt1"])
+def test_image_as_all_matches_image_as(numpy_backend, img_format, frames, faces, slices):
+    with VTFLib() as vtf:
+        _random_image(vtf, img_format, frames, faces, slices)
+        data = vtf.save_image_bytes()
+        raw, raw_layout = vtf.image_as_all()
+        # without a thumbnail the image data ends the file, in the same order
+        assert data.endswith(raw)
+        assert [(s.frame, s.face, s.z_slice, s.mipmap_lvl) for s in raw_layout] == \
+            [(s.frame, s.face, s.z_slice, s.mipmap_lvl) for s in parse_header(data).layout()]
+        rgba, layout = vtf.image_as_all(RGBA8888)
+        assert len(rgba) == sum(subresource.size for subresource in layout)
+        for subresource in layout:
+            expected = vtf.image_as(RGBA8888, subresource.frame, subresource.face, subresource.z_slice,
+                                    subresource.mipmap_lvl)
+            assert bytes(rgba[subresource.offset:subresource.offset + subresource.size]) == expected, subresource
+            assert (subresource.width, subresource.height) == vtf.image_info().mipmap(subresource.mipmap_lvl)[:2]
+
+
+def test_image_from_all_converts_every_subresource(numpy_backend):
+    bgra8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+    with VTFLib() as vtf:
+        _random_image(vtf, bgra8888, faces=6)
+        rgba, _ = vtf.image_as_all(RGBA8888)
+        expected = vtf.save_image_bytes()
+        vtf.create_image(16, 8, frames=2, faces=6, img_format=bgra8888, thumbnail=False, null_data=True)
+        vtf.image_from_all(rgba, RGBA8888)
+        assert vtf.save_image_bytes() == expected
+        with pytest.raises(ValueError):
+            vtf.image_from_all(rgba[:-1], RGBA8888)
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from pyvtflib import CreateOptions, VTFException, VTFImageFlag, VTFImageFormat, VTFLib
+
+# what the bundled Linux VTFLib, which has no NVDXT, can create
+PLAIN = CreateOptions(mipmaps=False, thumbnail=False)
+FORMATS = [VTFImageFormat.IMAGE_FORMAT_RGBA8888, VTFImageFormat.IMAGE_FORMAT_BGRA8888,
+           VTFImageFormat.IMAGE_FORMAT_ABGR8888, VTFImageFormat.IMAGE_FORMAT_ARGB8888,
+           VTFImageFormat.IMAGE_FORMAT_RGB888, VTFImageFormat.IMAGE_FORMAT_BGR888]
+
+
+@pytest.mark.parametrize("img_format", FORMATS, ids=lambda img_format: img_format.name)
+def test_create_from_rgba8888(img_format):
+    rgba = bytes(value & 0x7f for value in os.urandom(16 * 8 * 4))
+    options = PLAIN._replace(img_format=img_format, version=(7, 4), bumpmap_scale=.5,
+                             flags=VTFImageFlag.TEXTUREFLAGS_CLAMPS)
+    with VTFLib() as vtf:
+        vtf.create_from_rgba8888(16, 8, [rgba], options)
+        assert vtf.image_format() == img_format
+        assert (vtf.image_width(), vtf.image_height(), vtf.image_mipmap_count()) == (16, 8, 1)
+        assert (vtf.image_major_version(), vtf.image_minor_version()) == (7, 4)
+        assert vtf.image_bumpmap_scale() == .5
+        assert vtf.image_get_flag(VTFImageFlag.TEXTUREFLAGS_CLAMPS)
+        has_alpha = VTFLib.get_image_format_info(img_format).uiAlphaBitsPerPixel > 0
+        assert vtf.image_get_flag(VTFImageFlag.TEXTUREFLAGS_EIGHTBITALPHA) == has_alpha
+        assert not vtf.image_has_thumbnail()
+        assert vtf.image_get_data() == VTFLib.convert_from_rgba8888(rgba, 16, 8, img_format)
+        assert vtf.image_reflectivity() == pytest.approx(VTFLib.compute_image_reflectivity(rgba, 16, 8), abs=1e-6)
+
+
+def test_create_frames_cubemap_and_volume():
+    faces = [bytes((i,)) * 4 * 4 * 4 for i in range(6)]
+    with VTFLib() as vtf:
+        vtf.create_from_rgba8888(4, 4, faces[:3], PLAIN._replace(start_frame=2))
+        assert vtf.image_frame_count() == 3 and vtf.image_start_frame() == 2
+        assert [vtf.image_get_data(frame=i) for i in range(3)] == faces[:3]
+        # without a sphere map VTF 7.3 cubemaps have 6 faces
+        vtf.create_from_rgba8888(4, 4, faces, PLAIN._replace(sphere_map=False), cubemap=True)
+        assert vtf.image_face_count() == 6 and vtf.image_get_flag(VTFImageFlag.TEXTUREFLAGS_ENVMAP)
+        assert [vtf.image_get_data(face=i) for i in range(6)] == faces
+        vtf.create_from_rgba8888(4, 4, faces[:4], PLAIN, volume=True)
+        assert vtf.image_depth() == 4
+        assert [vtf.image_get_data(z_slice=i) for i in range(4)] == faces[:4]
+        with pytest.raises(ValueError):
+            vtf.create_from_rgba8888(4, 4, faces, PLAIN, cubemap=True, volume=True)
+        with pytest.raises(ValueError):
+            vtf.create_from_rgba8888(4, 4, [], PLAIN)
+
+
+def test_default_options_explain_missing_nvdxt():
+    with VTFLib() as vtf:
+        try:
+            vtf.create_from_rgba8888(16, 16, [bytes(16 * 16 * 4)])
+        except VTFException as e:
+            assert "without mipmaps, thumbnail" in str(e)
+        else:
+            assert vtf.image_mipmap_count() == 5 and vtf.image_has_thumbnail()
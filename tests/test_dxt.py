@@ -0,0 +1,55 @@
+import pytest
+
+from pyvtflib import VTFImageFormat, VTFLib
+from pyvtflib.header import compute_image_size
+
+numpy = pytest.importorskip("numpy")
+_vectorized = pytest.importorskip("pyvtflib._vectorized")
+
+DXT3 = VTFImageFormat.IMAGE_FORMAT_DXT3
+DXT5 = VTFImageFormat.IMAGE_FORMAT_DXT5
+FORMATS = [VTFImageFormat.IMAGE_FORMAT_DXT1, VTFImageFormat.IMAGE_FORMAT_DXT1_ONEBITALPHA, DXT3, DXT5]
+SIZES = [(1, 1), (2, 2), (1, 4), (4, 1), (3, 5), (7, 9), (12, 2048), (1024, 1024)]
+
+
+def _random_blocks(width, height, img_format, seed=0):
+    data = numpy.random.default_rng(seed).integers(0, 256, compute_image_size(width, height, 1, 1, img_format),
+                                                   dtype=numpy.uint8)
+    blocks = data.reshape(-1, 16 if img_format in (DXT3, DXT5) else 8)
+    color = blocks.shape[1] - 8
+    # equal color endpoints select the 3 color mode of DXT1, equal alpha endpoints the 6 alpha mode of DXT5
+    blocks[::5, color + 2:color + 4] = blocks[::5, color:color + 2]
+    if img_format == DXT5:
+        blocks[::7, 1] = blocks[::7, 0]
+    return data.tobytes()
+
+
+def _decode(data, width, height, img_format, workers):
+    dest = bytearray(width * height * 4)
+    _vectorized.decode_dxt(data, dest, width, height, img_format, workers)
+    return bytes(dest)
+
+
+@pytest.mark.parametrize("img_format", FORMATS, ids=lambda img_format: img_format.name)
+@pytest.mark.parametrize("width,height", SIZES)
+def test_decode_dxt_matches_vtflib(img_format, width, height):
+    data = _random_blocks(width, height, img_format)
+    expected = VTFLib.convert_to_rgba8888(data, width, height, img_format)
+    assert _decode(data, width, height, img_format, 1) == expected
+    assert _decode(data, width, height, img_format, 4) == expected
+
+
+def test_decode_dxt5_alpha_endpoints_on_threads():
+    # a block for every pair of alpha endpoints, each using all 8 alpha indices, split into several chunks
+    endpoints = numpy.arange(65536)
+    blocks = numpy.zeros((65536, 16), numpy.uint8)
+    blocks[:, 0] = endpoints & 0xff
+    blocks[:, 1] = endpoints >> 8
+    indices = sum((i % 8) << (3 * i) for i in range(16))
+    blocks[:, 2:8] = numpy.frombuffer(indices.to_bytes(6, "little"), numpy.uint8)
+    blocks[:, 8:] = numpy.random.default_rng(0).integers(0, 256, (65536, 8))
+    assert len(blocks) > 2 * _vectorized._DXT_CHUNK_BLOCKS
+    data = blocks.tobytes()
+    expected = VTFLib.convert_to_rgba8888(data, 1023, 1021, DXT5)
+    assert _decode(data, 1023, 1021, DXT5, 4) == expected
+    assert VTFLib.decode_dxt(data, 1023, 1021, DXT5, 4) == expected
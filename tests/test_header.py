@@ -0,0 +1,105 @@
+import os
+import struct
+
+import pytest
+
+from pyvtflib import (CreateOptions, SVTFTextureLODControlResource, VTFImageFlag, VTFImageFormat, VTFLib,
+                      VTFResourceEntryType)
+from pyvtflib.header import pack_header, parse_header, read_header
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+DXT5 = VTFImageFormat.IMAGE_FORMAT_DXT5
+
+
+def _filled_image(vtf: VTFLib, width: int, height: int, img_format: VTFImageFormat, frames: int = 1,
+                  faces: int = 1, slices: int = 1) -> None:
+    # every subresource holds different data, so reading the wrong offset fails
+    vtf.create_image(width, height, frames, faces, slices, img_format, null_data=True)
+    info = vtf.image_info()
+    for frame in range(frames):
+        for face in range(info.face_count):
+            for mipmap_lvl in range(info.mipmap_count):
+                for z_slice in range(info.mipmap(mipmap_lvl).depth):
+                    vtf.image_set_data(os.urandom(info.mipmap(mipmap_lvl).slice_size), frame, face, z_slice,
+                                       mipmap_lvl)
+
+
+def test_parse_header_matches_vtflib():
+    with VTFLib() as vtf:
+        _filled_image(vtf, 32, 16, DXT5, frames=3)
+        vtf.image_set_flag(VTFImageFlag.TEXTUREFLAGS_CLAMPS, True)
+        vtf.image_set_start_frame(1)
+        vtf.image_set_bumpmap_scale(.25)
+        vtf.image_set_reflectivity(.5, .25, .125)
+        vtf.image_set_resource(VTFResourceEntryType.VTF_RSRC_CRC, struct.pack("<I", 0xdeadbeef))
+        vtf.image_set_resource(VTFResourceEntryType.VTF_RSRC_TEXTURE_LOD_SETTINGS,
+                               SVTFTextureLODControlResource(5, 4))
+        vtf.image_set_resource(VTFResourceEntryType.VTF_RSRC_KEY_VALUE_DATA, b"key value")
+        vtf.load_image_bytes(vtf.save_image_bytes())
+        header = parse_header(vtf.save_image_bytes())
+        assert (header.major_version, header.minor_version) == (vtf.image_major_version(), vtf.image_minor_version())
+        assert (header.width, header.height, header.depth) == (32, 16, 1)
+        assert (header.format, header.flags, header.mipmap_count) == (DXT5, vtf.image_flags(), 6)
+        assert (header.frame_count, header.start_frame, header.face_count) == (3, 1, 1)
+        assert header.reflectivity == (.5, .25, .125) and header.bumpmap_scale == .25
+        assert (header.thumbnail_format, header.thumbnail_width, header.thumbnail_height) == (
+            vtf.image_thumbnail_format(), vtf.image_thumbnail_width(), vtf.image_thumbnail_height())
+        assert [resource.type for resource in header.resources] == list(vtf.image_resources())
+        assert header.crc == 0xdeadbeef and header.lod_clamp == (5, 4)
+        key_values = header.get_resource_data(VTFResourceEntryType.VTF_RSRC_KEY_VALUE_DATA)
+        data = vtf.save_image_bytes()
+        # resources with a data chunk are stored as their size followed by the data
+        assert data[key_values:key_values + 13] == struct.pack("<I", 9) + b"key value"
+        assert header.image_size == sum(subresource.size for subresource in header.layout())
+
+
+@pytest.mark.parametrize("frames, faces, slices", [(2, 1, 1), (1, 6, 1), (1, 1, 4)],
+                         ids=["frames", "cubemap", "volume"])
+def test_data_offsets_and_layout_match_image_data(frames, faces, slices):
+    with VTFLib() as vtf:
+        _filled_image(vtf, 16, 8, BGRA8888, frames, faces, slices)
+        data = vtf.save_image_bytes()
+        header = parse_header(data)
+        layout = list(header.layout())
+        assert len(layout) == len(vtf.image_all_layout()[1])
+        assert layout[-1].offset + layout[-1].size == len(data)
+        for subresource in layout:
+            offset = header.data_offset(subresource.frame, subresource.face, subresource.z_slice,
+                                        subresource.mipmap_lvl)
+            assert offset == subresource.offset
+            expected = vtf.image_get_data(subresource.frame, subresource.face, subresource.z_slice,
+                                          subresource.mipmap_lvl)
+            assert data[offset:offset + subresource.size] == expected, subresource
+        with pytest.raises(IndexError):
+            header.data_offset(mipmap_lvl=header.mipmap_count)
+
+
+@pytest.mark.parametrize("version", [(7, 1), (7, 2), (7, 4), (7, 5)], ids=lambda version: "7.{}".format(version[1]))
+def test_versions(version):
+    rgba = os.urandom(16 * 8 * 4)
+    with VTFLib() as vtf:
+        vtf.create_from_rgba8888(16, 8, [rgba], CreateOptions(img_format=BGRA8888, version=version, mipmaps=False,
+                                                              thumbnail=False))
+        data = vtf.save_image_bytes()
+        header = parse_header(data)
+        assert (header.major_version, header.minor_version) == version
+        assert header.supports_resources == (version[1] >= 3)
+        offset = header.data_offset()
+        assert data[offset:offset + 16 * 8 * 4] == vtf.image_get_data()
+
+
+def test_pack_header_read_header_and_errors(tmp_path):
+    with VTFLib() as vtf:
+        _filled_image(vtf, 8, 8, BGRA8888)
+        data = vtf.save_image_bytes()
+    header = parse_header(data)
+    assert pack_header(header) == data[:header.header_size]
+    file_path = tmp_path / "image.vtf"
+    file_path.write_bytes(data)
+    assert read_header(str(file_path)) == header
+    with pytest.raises(ValueError):
+        parse_header(data[:header.header_size - 1])
+    with pytest.raises(ValueError):
+        parse_header(b"VTF\0" + data[4:8] + b"\x09" + data[9:])
+    with pytest.raises(ValueError):
+        parse_header(b"DDS " + data[4:])
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from pyvtflib import VTFException, VTFImageFormat, VTFLib
+
+# formats whose conversions from and to RGBA8888 are done by VTFLib in both mipmap generators
+FORMATS = [VTFImageFormat.IMAGE_FORMAT_RGBA8888, VTFImageFormat.IMAGE_FORMAT_DXT5,
+           VTFImageFormat.IMAGE_FORMAT_RGB565]
+
+
+def _image(img_format):
+    vtf = VTFLib()
+    vtf.create_image(64, 32, frames=3, img_format=img_format, thumbnail=False)
+    for frame in range(3):
+        try:
+            vtf.image_from_rgba8888(os.urandom(64 * 32 * 4), frame)
+        except VTFException as e:
+            vtf.close()
+            pytest.skip(" ".join(str(e).split()))
+    return vtf
+
+
+@pytest.mark.parametrize("img_format", FORMATS, ids=lambda img_format: img_format.name)
+def test_parallel_mipmaps_match_vtflib(img_format):
+    with _image(img_format) as vtf:
+        source = vtf.save_image_bytes()
+        try:
+            vtf.image_generate_all_mipmaps()
+        except VTFException as e:
+            if "NVDXT" not in str(e):
+                raise
+            pytest.skip("this VTFLib build has no NVDXT")
+        serial, _ = vtf.image_as_all()
+        for workers in (1, 4):
+            vtf.load_image_bytes(source)
+            vtf.image_generate_all_mipmaps_parallel(max_workers=workers)
+            parallel, _ = vtf.image_as_all()
+            assert parallel == serial
@@ -0,0 +1,45 @@
+import logging
+
+import pytest
+
+from pyvtflib import VTFException, VTFImageFormat, VTFLib, profiling
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+RGBA8888 = VTFImageFormat.IMAGE_FORMAT_RGBA8888
+
+
+def test_profile_records_methods_and_native_calls():
+    rgba = bytes(range(256))
+    with profiling.profile() as scope:
+        with VTFLib() as vtf:
+            vtf.create_image(8, 8, thumbnail=False, mipmaps=False)
+            vtf.image_set_data(rgba)
+            assert vtf.image_get_data() == rgba
+    assert not profiling.is_enabled()
+    assert scope.stats["VTFLib.image_get_data"].calls == 1
+    assert scope.stats["VTFLib.image_get_data"].bytes_out == len(rgba)
+    assert scope.stats["vlImageCreate"].calls == 1
+    assert scope.stats["VTFLib.create_image"].native_time >= scope.stats["vlImageCreate"].total_time
+
+
+def test_failing_hooks_keep_results_and_exceptions(caplog):
+    calls = []
+
+    def hook(name, elapsed, bytes_in, bytes_out, failed):
+        calls.append((name, failed))
+        raise RuntimeError("exporter is down")
+
+    rgba = bytes(range(256))
+    profiling.add_hook(hook)
+    try:
+        with caplog.at_level(logging.ERROR, "pyvtflib.profiling"), profiling.profile() as scope:
+            bgra = VTFLib.convert(rgba, 8, 8, RGBA8888, BGRA8888)
+            assert bgra == VTFLib.convert_from_rgba8888(rgba, 8, 8, BGRA8888)
+            with VTFLib() as vtf, pytest.raises(VTFException):
+                vtf.load_image_bytes(b"not a vtf file")
+    finally:
+        profiling.remove_hook(hook)
+    assert ("VTFLib.convert", False) in calls and ("VTFLib.load_image_bytes", True) in calls
+    assert scope.stats["VTFLib.load_image_bytes"].failures == 1
+    assert len(caplog.records) == len(calls)
+    assert "exporter is down" in caplog.text
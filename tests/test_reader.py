@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from pyvtflib import VTFImageFormat, VTFLib
+from pyvtflib.reader import VTFReader
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+DXT1 = VTFImageFormat.IMAGE_FORMAT_DXT1
+
+
+@pytest.fixture
+def vtf_file(tmp_path):
+    # an animated mipmapped texture with different data in every subresource and in the thumbnail
+    file_path = str(tmp_path / "image.vtf")
+    with VTFLib() as vtf:
+        vtf.create_image(16, 8, frames=3, img_format=BGRA8888, null_data=True)
+        info = vtf.image_info()
+        for frame in range(3):
+            for mipmap_lvl in range(info.mipmap_count):
+                vtf.image_set_data(os.urandom(info.mipmap(mipmap_lvl).slice_size), frame, mipmap_lvl=mipmap_lvl)
+        with vtf.image_thumbnail_data_view(writable=True) as thumbnail:
+            thumbnail[:] = os.urandom(thumbnail.nbytes)
+        vtf.save_image_file(file_path)
+    return file_path
+
+
+def test_reader_matches_vtflib(vtf_file):
+    with VTFLib() as vtf, VTFReader(vtf_file) as reader:
+        vtf.load_image_file(vtf_file)
+        assert reader.header.frame_count == 3 and reader.header.mipmap_count == vtf.image_mipmap_count()
+        for frame in range(3):
+            for mipmap_lvl in range(vtf.image_mipmap_count()):
+                assert reader.dimensions(mipmap_lvl) == vtf.image_info().mipmap(mipmap_lvl)[:3]
+                data = vtf.image_get_data(frame, mipmap_lvl=mipmap_lvl)
+                assert reader.get_data(frame, mipmap_lvl=mipmap_lvl) == data
+                assert reader.as_format(BGRA8888, frame, mipmap_lvl=mipmap_lvl) == data
+                assert reader.as_rgba8888(frame, mipmap_lvl=mipmap_lvl) == vtf.image_as_rgba8888(
+                    frame, mipmap_lvl=mipmap_lvl)
+        assert vtf.image_thumbnail_format() == DXT1
+        assert reader.get_thumbnail_data() == vtf.image_thumbnail_data()
+        assert reader.thumbnail_as_rgba8888() == VTFLib.convert_to_rgba8888(
+            vtf.image_thumbnail_data(), vtf.image_thumbnail_width(), vtf.image_thumbnail_height(), DXT1)
+
+
+def test_close_releases_views(vtf_file):
+    with VTFReader(vtf_file) as reader:
+        view = reader.get_data(2)
+    with pytest.raises(ValueError):
+        view[0]
+
+
+def test_truncated_files(vtf_file):
+    with open(vtf_file, "rb") as f:
+        data = f.read()
+    with open(vtf_file, "wb") as f:
+        f.write(data[:-1])
+    with VTFReader(vtf_file) as reader:
+        # the largest mipmap of the last frame is stored last
+        reader.get_data(0, mipmap_lvl=1)
+        with pytest.raises(ValueError):
+            reader.get_data(2)
+    with open(vtf_file, "wb") as f:
+        f.write(data[:16])
+    with pytest.raises(ValueError):
+        VTFReader(vtf_file)
@@ -0,0 +1,60 @@
+import struct
+
+import pytest
+
+from pyvtflib import (CreateOptions, SVTFTextureLODControlResource, VTFException, VTFImageFormat, VTFLib,
+                      VTFResourceEntryType)
+
+CRC = VTFResourceEntryType.VTF_RSRC_CRC
+LOD = VTFResourceEntryType.VTF_RSRC_TEXTURE_LOD_SETTINGS
+KEY_VALUES = VTFResourceEntryType.VTF_RSRC_KEY_VALUE_DATA
+IMAGE = VTFResourceEntryType.VTF_LEGACY_RSRC_IMAGE
+
+
+def _image_with_resources(vtf: VTFLib) -> bytes:
+    vtf.create_image(8, 8, thumbnail=False, mipmaps=False)
+    vtf.image_set_resource(CRC, struct.pack("<I", 0x12345678))
+    vtf.image_set_resource(LOD, SVTFTextureLODControlResource(6, 7))
+    vtf.image_set_resource(KEY_VALUES, b'"Information" { "Author" "pyvtflib" }')
+    return vtf.save_image_bytes()
+
+
+def test_resources_are_typed_and_saved():
+    with VTFLib() as vtf:
+        data = _image_with_resources(vtf)
+        vtf.load_image_bytes(data)
+        resources = vtf.image_resources()
+        assert set(resources) == {IMAGE, CRC, LOD, KEY_VALUES}
+        assert resources[CRC] == 0x12345678
+        assert (resources[LOD].ResolutionClampU, resources[LOD].ResolutionClampV) == (6, 7)
+        assert bytes(resources[KEY_VALUES]) == b'"Information" { "Author" "pyvtflib" }'
+        assert resources[KEY_VALUES].readonly
+        assert vtf.image_get_has_resouce(KEY_VALUES)
+
+
+def test_directory_resources_are_available_without_image_data():
+    with VTFLib() as vtf:
+        data = _image_with_resources(vtf)
+        vtf.load_image_bytes(data, header_only=True)
+        resources = vtf.image_resources()
+        assert resources[CRC] == 0x12345678
+        assert (resources[LOD].ResolutionClampU, resources[LOD].ResolutionClampV) == (6, 7)
+
+
+def test_writable_views_and_removal():
+    with VTFLib() as vtf:
+        vtf.load_image_bytes(_image_with_resources(vtf))
+        with vtf.image_get_resource_data(KEY_VALUES, writable=True) as view:
+            view[1:12] = b"information"
+        vtf.image_set_resource(CRC, None)
+        vtf.load_image_bytes(vtf.save_image_bytes())
+        assert not vtf.image_get_has_resouce(CRC) and vtf.image_get_resource_data(CRC) is None
+        assert bytes(vtf.image_get_resource_data(KEY_VALUES)).startswith(b'"information"')
+
+
+def test_resources_need_vtf_7_3():
+    with VTFLib() as vtf:
+        vtf.create_from_rgba8888(4, 4, [bytes(64)], CreateOptions(img_format=VTFImageFormat.IMAGE_FORMAT_RGBA8888,
+                                                                  version=(7, 2), mipmaps=False, thumbnail=False))
+        with pytest.raises(VTFException):
+            vtf.image_set_resource(KEY_VALUES, b"data")
@@ -0,0 +1,62 @@
+import os
+
+from pyvtflib import VTFImageFlag, VTFImageFormat, VTFLib, scan
+from pyvtflib.scan import MetadataIndex, scan_metadata
+
+
+def _write_vtf(file_path: str, width: int, frames: int) -> None:
+    with VTFLib() as vtf:
+        vtf.create_image(width, 8, frames=frames, img_format=VTFImageFormat.IMAGE_FORMAT_DXT5, null_data=True)
+        vtf.image_set_flag(VTFImageFlag.TEXTUREFLAGS_CLAMPS, True)
+        vtf.image_set_reflectivity(.5, .25, .125)
+        vtf.save_image_file(file_path)
+
+
+def test_scan_metadata_reads_headers_and_reports_errors(tmp_path):
+    paths = [str(tmp_path / "{}.vtf".format(i)) for i in range(3)]
+    for i, file_path in enumerate(paths):
+        _write_vtf(file_path, 8 << i, i + 1)
+    broken = tmp_path / "broken.vtf"
+    broken.write_bytes(b"VTF\0")
+    errors = {}
+    records = scan_metadata(paths + [str(broken), str(tmp_path / "missing.vtf")], errors=errors)
+    assert [record.path for record in records] == paths
+    assert sorted(errors) == [str(broken), str(tmp_path / "missing.vtf")]
+    with VTFLib() as vtf:
+        for record in records:
+            vtf.load_image_file(record.path, header_only=True)
+            assert (record.width, record.height, record.depth) == (vtf.image_width(), vtf.image_height(), 1)
+            assert (record.format, record.flags) == (vtf.image_format(), vtf.image_flags())
+            assert (record.frame_count, record.face_count) == (vtf.image_frame_count(), vtf.image_face_count())
+            assert record.mipmap_count == vtf.image_mipmap_count()
+            assert record.reflectivity == (.5, .25, .125) and record.has_thumbnail
+            assert record.size == os.path.getsize(record.path)
+
+
+def test_index_only_reparses_changed_files(tmp_path, monkeypatch):
+    paths = [str(tmp_path / "{}.vtf".format(i)) for i in range(3)]
+    for file_path in paths:
+        _write_vtf(file_path, 16, 1)
+    index_path = str(tmp_path / "index.sqlite")
+    with MetadataIndex(index_path) as index:
+        first = scan_metadata(paths, index)
+
+    read = []
+    read_metadata = scan.read_metadata
+
+    def counting_read_metadata(file_path, stat=None):
+        read.append(file_path)
+        return read_metadata(file_path, stat)
+
+    monkeypatch.setattr(scan, "read_metadata", counting_read_metadata)
+    _write_vtf(paths[1], 32, 2)
+    stat = os.stat(paths[1])
+    os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    with MetadataIndex(index_path) as index:
+        second = scan_metadata(paths, index)
+        assert read == [paths[1]]
+        assert second[0] == first[0] and second[2] == first[2]
+        assert (second[1].width, second[1].frame_count) == (32, 2)
+        assert index.get(paths[1]) == second[1]
+        assert index.prune(paths[:2]) == 1
+        assert sorted(record.path for record in index) == paths[:2]
@@ -0,0 +1,80 @@
+import io
+import os
+
+import pytest
+
+from pyvtflib import VTFImageFormat, VTFLib
+
+
+class _Pipe(io.RawIOBase):
+    # a non-seekable stream like a socket or a pipe, reads return at most chunk_size bytes
+    def __init__(self, data: bytes = b"", chunk_size: int = 1000) -> None:
+        self._data = io.BytesIO(data)
+        self.chunk_size = chunk_size
+        self.written = bytearray()
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def readinto(self, buffer):
+        with memoryview(buffer) as view:
+            data = self._data.read(min(len(view), self.chunk_size))
+            view[:len(data)] = data
+            return len(data)
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+
+class _FailingReader(io.BytesIO):
+    def readinto(self, buffer):
+        raise OSError("connection reset")
+
+
+@pytest.fixture
+def vtf_data():
+    with VTFLib() as vtf:
+        vtf.create_image(32, 16, frames=2, img_format=VTFImageFormat.IMAGE_FORMAT_BGRA8888, null_data=True)
+        for frame in range(2):
+            vtf.image_set_data(os.urandom(32 * 16 * 4), frame)
+        return vtf.save_image_bytes()
+
+
+def test_seekable_streams(vtf_data):
+    with VTFLib() as vtf:
+        vtf.load_image_bytes(vtf_data)
+        saved = io.BytesIO()
+        saved.write(b"prefix")
+        vtf.save_image_stream(saved)
+        assert saved.getvalue() == b"prefix" + vtf_data
+    saved.seek(len(b"prefix"))
+    with VTFLib() as vtf:
+        vtf.load_image_stream(saved)
+        assert vtf.save_image_bytes() == vtf_data
+        assert saved.tell() == len(b"prefix") + len(vtf_data)
+
+
+def test_non_seekable_streams(vtf_data):
+    with VTFLib() as vtf:
+        vtf.load_image_stream(_Pipe(vtf_data), size=len(vtf_data))
+        assert vtf.save_image_bytes() == vtf_data
+        pipe = _Pipe()
+        vtf.save_image_stream(pipe)
+        assert pipe.written == vtf_data
+        vtf.load_image_stream(_Pipe(vtf_data, chunk_size=7), header_only=True, size=len(vtf_data))
+        assert (vtf.image_width(), vtf.image_frame_count()) == (32, 2)
+        assert not vtf.image_has_image()
+        with pytest.raises(ValueError):
+            vtf.load_image_stream(_Pipe(vtf_data))
+
+
+def test_stream_errors_are_reraised(vtf_data):
+    with VTFLib() as vtf:
+        with pytest.raises(OSError, match="connection reset"):
+            vtf.load_image_stream(_FailingReader(vtf_data))
+        vtf.load_image_stream(io.BytesIO(vtf_data))
+        assert vtf.save_image_bytes() == vtf_data
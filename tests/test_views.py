@@ -0,0 +1,69 @@
+import gc
+
+import pytest
+
+import pyvtflib
+from pyvtflib import VTFLib, VTFResourceEntryType
+
+
+def _filled_image(vtf: VTFLib, value: int) -> None:
+    vtf.create_image(8, 8, thumbnail=False, mipmaps=False)
+    vtf.image_set_data(bytes((value,)) * 8 * 8 * 4)
+
+
+def test_views_are_released_when_the_image_is_replaced():
+    with VTFLib() as vtf:
+        _filled_image(vtf, 1)
+        view = vtf.image_get_data_view(writable=True)
+        _filled_image(vtf, 2)
+        with pytest.raises(ValueError):
+            view[0]
+
+
+def test_derived_objects_keep_the_old_image_alive():
+    with VTFLib() as vtf:
+        _filled_image(vtf, 1)
+        view = vtf.image_get_data_view()
+        part = view[4:8]
+        old_image = vtf.image
+        _filled_image(vtf, 2)
+        assert vtf.image is not old_image
+        assert bytes(part) == b"\x01" * 4
+        assert vtf.image_get_data()[:4] == b"\x02" * 4
+        vtf.load_image_bytes(vtf.save_image_bytes())
+        assert bytes(part) == b"\x01" * 4
+
+
+def test_close_keeps_the_exception_and_frees_the_image_later():
+    initialize_count = pyvtflib._initialize_count
+    with pytest.raises(KeyError):
+        with VTFLib() as vtf:
+            _filled_image(vtf, 3)
+            part = vtf.image_get_data_view()[:4]
+            raise KeyError
+    with pytest.raises(pyvtflib.VTFException):
+        vtf.image_width()
+    assert bytes(part) == b"\x03" * 4
+    assert pyvtflib._initialize_count == initialize_count + 1
+    del part, vtf
+    gc.collect()
+    assert pyvtflib._initialize_count == initialize_count
+
+
+@pytest.mark.parametrize("numpy_array", [True, False])
+def test_resources_are_not_reallocated_under_used_views(numpy_array):
+    with VTFLib() as vtf:
+        _filled_image(vtf, 4)
+        key_values = VTFResourceEntryType.VTF_RSRC_KEY_VALUE_DATA
+        vtf.image_set_resource(key_values, b"a")
+        view = vtf.image_get_resource_data(key_values)
+        if numpy_array:
+            numpy = pytest.importorskip("numpy")
+            used = numpy.frombuffer(view, numpy.uint8)
+        else:
+            used = view[:1]
+        with pytest.raises(BufferError):
+            vtf.image_set_resource(key_values, b"bc")
+        del used
+        vtf.image_set_resource(key_values, b"bc")
+        assert bytes(vtf.image_get_resource_data(key_values)) == b"bc"
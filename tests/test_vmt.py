@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from pyvtflib import VMTLib
+from pyvtflib.vmt import MaterialIndex, VMTNode, format_vmt, material_textures, parse_files, parse_vmt, texture_name
+
+# only what the VTFLib parser handles, see VMTLib
+MATERIAL = '''"LightmappedGeneric"
+{
+\t"$basetexture" "Brick/BrickWall001a"
+\t"$surfaceprop" "brick"
+\t"$envmap" "env_cubemap"
+\t"$envmaptint" "[.5 .5 .5]"
+\t"$detailscale" 4
+\t"$alpha" 0.5
+\t"LightmappedGeneric_DX9"
+\t{
+\t\t"$bumpmap" "materials\\\\brick\\\\brickwall001a_normal.vtf"
+\t}
+\t"Proxies"
+\t{
+\t\t"AnimatedTexture"
+\t\t{
+\t\t\t"animatedtexturevar" "$basetexture"
+\t\t\t"animatedtextureframerate" 10
+\t\t}
+\t}
+}
+'''
+
+
+def test_parse_vmt_matches_vtflib():
+    with VMTLib() as vmt:
+        vmt.load_material_bytes(MATERIAL.encode())
+        tree = vmt.material_as_tree()
+        assert parse_vmt(MATERIAL) == tree
+        assert format_vmt(tree) == vmt.save_material_bytes().decode()
+        vmt.material_from_tree(tree)
+        assert vmt.material_as_tree() == tree
+
+
+def test_parse_vmt_syntax():
+    material = parse_vmt(b'\xef\xbb\xbfVertexLitGeneric // comment\n{ $baseTexture "a/b" [$X360] $alpha .25 '
+                         b'$frame -2 $color "1" }')
+    assert material == VMTNode("VertexLitGeneric", [VMTNode("$baseTexture", "a/b"), VMTNode("$alpha", .25),
+                                                    VMTNode("$frame", -2), VMTNode("$color", "1")])
+    assert material.get("$BASETEXTURE") == "a/b" and material.get("$missing", 0) == 0
+    for invalid in ["{ }", '"a" { "b" }', '"a" "b"', '"a" { "b" "c"', '"a" { "b" "c" = }']:
+        with pytest.raises(ValueError):
+            parse_vmt(invalid)
+
+
+def test_material_textures():
+    assert texture_name(" Materials\\Brick//BrickWall001a.VTF ") == "brick/brickwall001a"
+    assert material_textures(parse_vmt(MATERIAL)) == {"brick/brickwall001a", "brick/brickwall001a_normal"}
+
+
+def _write(file_path, text):
+    with open(file_path, "w") as f:
+        f.write(text)
+
+
+def test_parse_files_in_worker_processes(tmp_path):
+    paths = [str(tmp_path / "{}.vmt".format(i)) for i in range(5)]
+    for file_path in paths:
+        _write(file_path, MATERIAL)
+    _write(paths[2], '"broken" {')
+    results = {result.path: result for result in parse_files(paths, max_workers=2, chunk_size=2)}
+    assert sorted(results) == sorted(paths)
+    assert results[paths[2]].material is None and results[paths[2]].error.startswith("ValueError")
+    assert all(results[file_path].material == parse_vmt(MATERIAL) for file_path in paths if file_path != paths[2])
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_material_index_updates_incrementally(tmp_path, max_workers):
+    material_dir = tmp_path / "materials"
+    (material_dir / "brick").mkdir(parents=True)
+    brick = str(material_dir / "brick" / "brick.vmt")
+    wall = str(material_dir / "wall.VMT")
+    _write(brick, MATERIAL)
+    _write(wall, '"UnlitGeneric" { "$basetexture" "brick/brickwall001a" }')
+    index = MaterialIndex()
+    assert sorted(index.update_directory(str(material_dir), max_workers, chunk_size=1)) == sorted([brick, wall])
+    assert index.materials("Brick\\BrickWall001a.vtf") == {brick, wall}
+    assert index.unused_textures(["brick/brickwall001a", "concrete/floor"]) == ["concrete/floor"]
+
+    assert index.update_directory(str(material_dir), max_workers, chunk_size=1) == []
+    _write(wall, '"UnlitGeneric" { "$basetexture" "concrete/floor" }')
+    stat = os.stat(wall)
+    os.utime(wall, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    errors = {}
+    _write(brick, '"broken" {')
+    assert sorted(index.update_directory(str(material_dir), max_workers, chunk_size=1, errors=errors)) == \
+        sorted([brick, wall])
+    assert list(errors) == [brick] and brick not in index
+    assert index.textures(wall) == {"concrete/floor"} and index.materials("brick/brickwall001a") == frozenset()
+
+    index_path = str(tmp_path / "index.json")
+    index.save(index_path)
+    loaded = MaterialIndex.load(index_path)
+    assert list(loaded) == [wall] and loaded.textures(wall) == {"concrete/floor"}
+    os.remove(wall)
+    assert loaded.update_directory(str(material_dir), max_workers, chunk_size=1) == [wall]
+    assert len(loaded) == 0
@@ -0,0 +1,54 @@
+from io import BytesIO
+import os
+
+import pytest
+
+from pyvtflib import VTFException, VTFImageFormat, VTFLib
+from pyvtflib.header import parse_header
+from pyvtflib.writer import read_rgba8888_strips, write_vtf_strips
+
+BGRA8888 = VTFImageFormat.IMAGE_FORMAT_BGRA8888
+
+
+class _Unseekable(BytesIO):
+    def seekable(self):
+        return False
+
+
+def test_bgra8888_strips_round_trip():
+    rgba = os.urandom(32 * 16 * 4)
+    file = BytesIO()
+    # strips of 5 rows don't line up with the image height
+    strips = read_rgba8888_strips(BytesIO(rgba), 32, 16, strip_rows=5)
+    written = write_vtf_strips(file, 32, 16, strips, BGRA8888)
+    assert written == len(file.getvalue())
+    header = parse_header(file.getvalue())
+    assert (header.width, header.height, header.format, header.mipmap_count) == (32, 16, BGRA8888, 1)
+    assert header.reflectivity == pytest.approx(VTFLib.compute_image_reflectivity(rgba, 32, 16), abs=1e-6)
+    with VTFLib() as vtf:
+        vtf.load_image_bytes(file.getvalue())
+        assert vtf.image_get_data() == VTFLib.convert_from_rgba8888(rgba, 32, 16, BGRA8888)
+        assert vtf.image_as_rgba8888() == rgba
+
+
+def test_default_format_works_with_a_non_seekable_file():
+    rgba = os.urandom(8 * 8 * 4)
+    file = _Unseekable()
+    with pytest.raises(ValueError):
+        write_vtf_strips(file, 8, 8, [rgba])
+    write_vtf_strips(file, 8, 8, [rgba], reflectivity=(.5, .5, .5))
+    with VTFLib() as vtf:
+        vtf.load_image_bytes(file.getvalue())
+        assert vtf.image_format() == VTFImageFormat.IMAGE_FORMAT_RGBA8888
+        assert vtf.image_get_data() == rgba
+
+
+def test_dxt_without_compressor_is_explained():
+    try:
+        VTFLib.convert_from_rgba8888(bytes(16 * 4), 4, 4, VTFImageFormat.IMAGE_FORMAT_DXT5)
+    except VTFException:
+        pass
+    else:
+        pytest.skip("this VTFLib build can compress DXT")
+    with pytest.raises(VTFException, match="use an uncompressed format"):
+        write_vtf_strips(BytesIO(), 4, 4, [bytes(16 * 4)], VTFImageFormat.IMAGE_FORMAT_DXT5)